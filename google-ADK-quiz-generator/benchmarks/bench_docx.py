@@ -0,0 +1,168 @@
+"""
+Benchmark: Word export of many quizzes, with the previous python-docx path
+(a Document object tree built and saved per quiz) vs. the template-reusing
+writer in tools/docx_writer.py.
+
+Usage:
+    python benchmarks/bench_docx.py [--sizes 10 1000 10000] [--questions 10]
+        [--legacy-max 1000]
+
+For each size it renders that many synthetic quizzes (--questions MCQs
+plus half as many T/F questions, validation notes and sources) three ways:
+one .docx per quiz with python-docx, one .docx per quiz with the fast
+writer, and all quizzes in one combined document with the fast writer.
+Sizes above --legacy-max skip the python-docx run (at ~13 quizzes/s,
+10,000 quizzes take over 12 minutes) and print its time extrapolated from
+the largest measured size instead. Before timing, one quiz is written both
+ways, the ZIP is CRC-checked, and both files are read back with python-docx
+to check that the paragraph text, styles and bold runs match.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+os.environ.setdefault("LLM_MODE", "replay")  # importing the tools package needs no API key
+
+from docx import Document  # noqa: E402
+
+from adk_quiz_generator.tools.word_tools import quiz_to_word_with_sources, write_quizzes_to_word  # noqa: E402
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--questions", type=int, default=10, help="MCQs per quiz")
+    parser.add_argument("--legacy-max", type=int, default=1000, help="largest size to run python-docx on")
+    return parser.parse_args(argv)
+
+
+def make_quiz(n, questions):
+    return {
+        "multiple_choice": [
+            {
+                "question": f"Quiz {n}, question {i}: which statement about prompt injection is correct?",
+                "options": {letter: f"Option {letter} for question {i} <with> markup & symbols" for letter in "ABCD"},
+                "answer": "ABCD"[i % 4],
+            }
+            for i in range(questions)
+        ],
+        "true_false": [
+            {"question": f"Quiz {n}: statement {i} is true.", "answer": i % 2 == 0}
+            for i in range(max(1, questions // 2))
+        ],
+        "validation_notes": "All questions were checked against the source.\nTwo were reworded.",
+        "fact_checking_sources": [f"https://example.com/source/{n}/{i}" for i in range(3)],
+    }
+
+
+def legacy_quiz_to_word(file_path, quiz_json_str):
+    """The previous quiz_to_word_with_sources body (minus its error handling), for comparison."""
+    quiz_data = json.loads(quiz_json_str)
+    doc = Document()
+    doc.add_heading("Generated Quiz", level=0)
+    all_questions = quiz_data.get("multiple_choice", []) + quiz_data.get("true_false", [])
+    for idx, q in enumerate(all_questions, start=1):
+        doc.add_paragraph(f"Q{idx}: {q.get('question', '')}", style='List Number')
+        options = q.get("options")
+        if options and isinstance(options, dict):
+            for key in sorted(options.keys()):
+                p = doc.add_paragraph(f"{key}. {options[key]}")
+                if key == q.get("answer"):
+                    p.runs[0].font.bold = True
+        else:
+            answer = "True" if str(q.get("answer")).lower() == "true" else "False"
+            doc.add_paragraph(f"Answer: {answer}")
+    validation_notes = quiz_data.get("validation_notes")
+    if validation_notes:
+        doc.add_page_break()
+        doc.add_heading("Validation Notes", level=1)
+        doc.add_paragraph(validation_notes)
+    fact_checking_sources = quiz_data.get("fact_checking_sources")
+    if fact_checking_sources:
+        if not validation_notes:
+            doc.add_page_break()
+        doc.add_heading("Fact-Checking Sources", level=1)
+        for source in fact_checking_sources:
+            doc.add_paragraph(source, style='List Bullet')
+    doc.save(file_path)
+
+
+def describe(path):
+    return [
+        (p.text, p.style.name, [bool(r.bold) for r in p.runs])
+        for p in Document(path).paragraphs
+    ]
+
+
+def check_equivalent(work_dir, questions):
+    quiz_json = json.dumps(make_quiz(0, questions))
+    legacy_path, fast_path = os.path.join(work_dir, "legacy.docx"), os.path.join(work_dir, "fast.docx")
+    legacy_quiz_to_word(legacy_path, quiz_json)
+    quiz_to_word_with_sources(fast_path, quiz_json)
+    with zipfile.ZipFile(fast_path) as fast_zip:
+        same = fast_zip.testzip() is None and describe(legacy_path) == describe(fast_path)
+    print(f"python-docx reads back identical paragraphs: {'yes' if same else 'NO'}\n")
+    return same
+
+
+def folder_size(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def timed(label, size, fn, output):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    mb = (folder_size(output) if os.path.isdir(output) else os.path.getsize(output)) / 1e6
+    print(f"{size:>7}  {label:<26}{elapsed:>10.2f}{size / elapsed:>12.0f}{mb:>10.1f}")
+    return elapsed
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix="bench-docx-")
+    try:
+        if not check_equivalent(work_dir, args.questions):
+            return 1
+        legacy_rate = None
+        print(f"{'quizzes':>7}  {'writer':<26}{'time (s)':>10}{'quizzes/s':>12}{'MB':>10}")
+        for size in args.sizes:
+            quizzes = [make_quiz(n, args.questions) for n in range(size)]
+
+            if size <= args.legacy_max:
+                legacy_dir = os.path.join(work_dir, f"legacy-{size}")
+                os.makedirs(legacy_dir)
+
+                def legacy():
+                    for n, quiz in enumerate(quizzes, start=1):
+                        legacy_quiz_to_word(os.path.join(legacy_dir, f"quiz_{n:05d}.docx"), json.dumps(quiz))
+
+                legacy_rate = size / timed("python-docx, per quiz", size, legacy, legacy_dir)
+                shutil.rmtree(legacy_dir)
+            elif legacy_rate:
+                print(f"{size:>7}  {'python-docx, per quiz':<26}{size / legacy_rate:>10.2f}{legacy_rate:>12.0f}"
+                      f"{'(est.)':>10}")
+
+            fast_dir = os.path.join(work_dir, f"fast-{size}")
+            timed("template writer, per quiz", size, lambda: write_quizzes_to_word(quizzes, output_dir=fast_dir), fast_dir)
+            shutil.rmtree(fast_dir)
+
+            combined = os.path.join(work_dir, f"combined-{size}.docx")
+            timed("template writer, combined", size,
+                  lambda: write_quizzes_to_word(quizzes, combined_path=combined), combined)
+            os.remove(combined)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
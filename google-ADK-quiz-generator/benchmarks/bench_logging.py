@@ -0,0 +1,133 @@
+"""
+Benchmark: event-loop cost of DEBUG logging, with the previous synchronous
+FileHandler vs. the queued pipeline in logging_setup.py.
+
+Usage:
+    python benchmarks/bench_logging.py [--tasks 16] [--records 2000] [--record-bytes 2000]
+        [--disk-latency-ms 0 1]
+
+--tasks coroutines each log --records DEBUG records of --record-bytes
+characters (about the size of an ADK event dump) while a heartbeat task
+measures how late the event loop wakes it up. --disk-latency-ms adds a
+per-write sleep to the file handler to stand in for a slow or network
+disk. A final run logs the same volume through sampled library loggers
+to show how many records LOG_SAMPLE_RATES keeps.
+"""
+import os
+import sys
+import time
+import queue
+import asyncio
+import logging
+import tempfile
+import argparse
+import logging.handlers
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+from adk_quiz_generator.logging_setup import (  # noqa: E402
+    DEFAULT_LOG_QUEUE_SIZE, DEFAULT_LOG_SAMPLE_RATES, DroppingQueueHandler, SamplingFilter, parse_sample_rates,
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=16)
+    parser.add_argument("--records", type=int, default=2000, help="records per task")
+    parser.add_argument("--record-bytes", type=int, default=2000)
+    parser.add_argument("--disk-latency-ms", type=float, nargs="+", default=[0.0, 1.0])
+    return parser.parse_args(argv)
+
+
+class SlowFileHandler(logging.FileHandler):
+    def __init__(self, path, latency):
+        super().__init__(path, encoding="utf-8")
+        self.latency = latency
+
+    def emit(self, record):
+        super().emit(record)
+        if self.latency:
+            time.sleep(self.latency)
+
+
+async def workload(tasks, records, payload, loggers):
+    lags = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    async def producer(i):
+        log = loggers[i % len(loggers)]
+        for n in range(records):
+            log.debug(f"ADK_EVENT task={i} n={n} {payload}")
+            if n % 10 == 0:
+                await asyncio.sleep(0)
+
+    beat = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    await asyncio.gather(*(producer(i) for i in range(tasks)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await beat
+    return elapsed, lags
+
+
+def run(mode, args, latency, loggers=("root",), sample_rates=""):
+    fd, path = tempfile.mkstemp(prefix="bench-logging-", suffix=".log")
+    os.close(fd)
+    file_handler = SlowFileHandler(path, latency)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)-5.5s] [%(name)-12.12s]  %(message)s"))
+    listener = None
+    if mode == "sync FileHandler":
+        handler = file_handler
+    else:
+        handler = DroppingQueueHandler(queue.Queue(maxsize=DEFAULT_LOG_QUEUE_SIZE))
+        handler.addFilter(SamplingFilter(parse_sample_rates(sample_rates)))
+        listener = logging.handlers.QueueListener(handler.queue, file_handler)
+        listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.DEBUG)
+    elapsed, lags = asyncio.run(
+        workload(args.tasks, args.records, "x" * args.record_bytes, [logging.getLogger(n) for n in loggers])
+    )
+    drain_start = time.perf_counter()
+    if listener:
+        listener.stop()
+    drain = time.perf_counter() - drain_start
+    file_handler.close()
+    with open(path, encoding="utf-8") as f:
+        written = sum(1 for _ in f)
+    os.remove(path)
+    dropped = getattr(handler, "dropped_total", 0)
+    lags.sort()
+    p99 = lags[int(0.99 * (len(lags) - 1))] if lags else 0.0
+    return elapsed, p99, max(lags, default=0.0), drain, written, dropped
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    total = args.tasks * args.records
+    print(f"{total} records of {args.record_bytes} chars from {args.tasks} tasks\n")
+    print(f"{'disk ms':>8}  {'handler':<18}{'loop busy (s)':>14}{'lag p99 (ms)':>14}{'lag max (ms)':>14}"
+          f"{'drain (s)':>11}{'written':>9}{'dropped':>9}")
+    for latency_ms in args.disk_latency_ms:
+        for mode in ("sync FileHandler", "queued"):
+            elapsed, p99, worst, drain, written, dropped = run(mode, args, latency_ms / 1000)
+            print(f"{latency_ms:>8g}  {mode:<18}{elapsed:>14.3f}{p99 * 1000:>14.2f}{worst * 1000:>14.2f}"
+                  f"{drain:>11.3f}{written:>9}{dropped:>9}")
+
+    loggers = ("httpx", "google_genai.models", "urllib3.connectionpool", "adk_quiz_generator")
+    elapsed, p99, worst, drain, written, dropped = run("queued", args, 0.0, loggers, DEFAULT_LOG_SAMPLE_RATES)
+    print(f"\nsampled library loggers ({', '.join(loggers)}; LOG_SAMPLE_RATES={DEFAULT_LOG_SAMPLE_RATES}):")
+    print(f"  {written} of {total} records written, loop busy {elapsed:.3f}s, lag p99 {p99 * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark: cost of exporting metrics, with the previous blocking
+push_to_gateway call vs. the background, connection-pooled pusher.
+
+Usage:
+    python benchmarks/bench_metrics.py [--runs 8] [--concurrency 4] [--gateway-delay 1.5]
+
+Runs replayed pipelines (LLM_MODE=replay) against a local stub
+Pushgateway that answers after --gateway-delay seconds, then against a
+hung one that accepts connections but never answers (the blocking push
+waits out its --legacy-timeout, prometheus_client's default of 30s). For
+each gateway it reports the time spent waiting on the push after the
+batch, and how many pushes and TCP connections the stub saw. Finally it
+scrapes the pull-mode /metrics endpoint and prints the histogram counts.
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import logging
+import tempfile
+import argparse
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", default=os.path.join(HERE, "cassettes", "adk_orchestrator.jsonl"))
+    parser.add_argument("--latency-scale", type=float, default=0.05, help="multiplier for recorded latencies")
+    parser.add_argument("--runs", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--gateway-delay", type=float, default=1.5, help="seconds the stub gateway takes per push")
+    parser.add_argument("--legacy-timeout", type=float, default=30.0, help="timeout of the blocking push")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    """Must run before adk_quiz_generator is imported: the shared model is built at import time."""
+    os.environ.update({
+        "LLM_MODE": "replay",
+        "LLM_CASSETTE": os.path.abspath(args.cassette),
+        "LLM_LATENCY": "recorded",
+        "LLM_LATENCY_SCALE": str(args.latency_scale),
+    })
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def hung_gateway():
+    """A listening socket that is never accepted from: connects succeed, requests never get an answer."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(16)
+    return sock, f"127.0.0.1:{sock.getsockname()[1]}"
+
+
+class StubGateway:
+    """Local Pushgateway stand-in: accepts pushes after a delay and counts pushes and connections."""
+
+    def __init__(self, delay):
+        stub = self
+        self.pushes = 0
+        self.connections = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are reused
+
+            def setup(self):
+                super().setup()
+                stub.connections += 1
+
+            def do_PUT(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(delay)
+                stub.pushes += 1
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            do_POST = do_PUT
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.address = f"127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+async def run_pipelines(runs, concurrency):
+    from adk_quiz_generator.main import run_batch
+
+    urls = [f"https://example.com/bench/{time.time_ns()}/{i}" for i in range(runs)]
+    output_dir = tempfile.mkdtemp(prefix="bench-metrics-")
+    start = time.perf_counter()
+    await run_batch(urls, use_cache=False, concurrency=concurrency, output_dir=output_dir, session_db=":memory:")
+    return time.perf_counter() - start
+
+
+def bench(args):
+    from prometheus_client import push_to_gateway
+    from adk_quiz_generator.metrics import get_metrics
+
+    metrics = get_metrics()
+    print(f"{'gateway':<14}{'exporter':<20}{'batch (s)':>10}{'exit wait (s)':>15}{'pushes':>8}{'conns':>7}")
+    for label, delay, responsive in (("slow stub", args.gateway_delay, True), ("hung", 0.0, False)):
+        stub = StubGateway(delay)
+        hung_socket, hung_address = hung_gateway()
+        address = stub.address if responsive else hung_address
+
+        # --- 1. Previous behaviour: one blocking push once the batch is done ---
+        batch = asyncio.run(run_pipelines(args.runs, args.concurrency))
+        start = time.perf_counter()
+        try:
+            push_to_gateway(address, job="quiz_generator_batch", registry=metrics.registry, timeout=args.legacy_timeout)
+        except OSError:
+            pass
+        blocking = time.perf_counter() - start
+        pushes, conns = stub.pushes, stub.connections
+        print(f"{label:<14}{'blocking push':<20}{batch:>10.2f}{blocking:>15.2f}{pushes:>8}{conns:>7}")
+
+        # --- 2. Background pusher: a push per run, bounded wait at exit ---
+        metrics.start_pusher(gateway=address)
+        batch = asyncio.run(run_pipelines(args.runs, args.concurrency))
+        start = time.perf_counter()
+        metrics.shutdown()
+        exit_wait = time.perf_counter() - start
+        print(f"{'':<14}{'background pusher':<20}{batch:>10.2f}{exit_wait:>15.2f}"
+              f"{stub.pushes - pushes:>8}{stub.connections - conns:>7}")
+        stub.server.shutdown()
+        hung_socket.close()
+
+    # --- 3. Pull mode ---
+    port = free_port()
+    metrics.serve(port, addr="127.0.0.1")
+    body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+    print("\npull endpoint /metrics:")
+    for line in body.splitlines():
+        if line.startswith(("quiz_generator_stage_duration_seconds_count", "quiz_generator_tool_duration_seconds_count",
+                            "quiz_generator_runs_total", "quiz_generator_cache_requests_total")):
+            print(f"  {line}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+    logging.disable(logging.CRITICAL)
+    bench(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: end-to-end quiz_orchestrator throughput on replayed LLM calls.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--cassette benchmarks/cassettes/adk_orchestrator.jsonl]
+        [--latency recorded|SECONDS] [--latency-scale 0.1] [--concurrency 1 4 16 64] [--runs 16]
+
+Every model request is answered from the cassette (LLM_MODE=replay), so
+the benchmark runs offline and in CI. Record a cassette from live runs
+with LLM_MODE=record LLM_CASSETTE=<path>; the bundled one holds a single
+response per agent. Reports:
+
+- per-stage wall time (agents) for one run at concurrency 1,
+- overhead outside LLM calls: the same run with zero LLM latency,
+- runs per second at each concurrency level (through run_batch).
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+import argparse
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", default=os.path.join(HERE, "cassettes", "adk_orchestrator.jsonl"))
+    parser.add_argument("--latency", default="recorded", help="'recorded' or fixed seconds per LLM call")
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="multiplier for recorded latencies")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--runs", type=int, default=16, help="pipeline runs per concurrency level")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    """Must run before adk_quiz_generator is imported: the shared model is built at import time."""
+    os.environ.update({
+        "LLM_MODE": "replay",
+        "LLM_CASSETTE": os.path.abspath(args.cassette),
+        "LLM_LATENCY": args.latency,
+        "LLM_LATENCY_SCALE": str(args.latency_scale),
+        # Every run replays the same questions for a new URL, so most are dropped as duplicates
+        "QUESTION_INDEX_DB": os.path.join(tempfile.mkdtemp(prefix="bench-questions-"), "questions.db"),
+    })
+
+
+class StageTimer:
+    """Collects per-agent wall time through before/after agent callbacks."""
+
+    def __init__(self):
+        self._started = {}
+        self.durations = defaultdict(list)
+
+    def install(self, agent):
+        agent.before_agent_callback = self._before
+        agent.after_agent_callback = self._after
+        for sub_agent in agent.sub_agents:
+            self.install(sub_agent)
+
+    def _before(self, callback_context):
+        self._started[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+
+    def _after(self, callback_context):
+        started = self._started.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if started is not None:
+            self.durations[callback_context.agent_name].append(time.perf_counter() - started)
+
+    def reset(self):
+        self._started.clear()
+        self.durations.clear()
+
+
+async def run_pipelines(runs, concurrency, output_dir):
+    """Runs `runs` pipelines through run_batch. Returns (wall seconds, failures)."""
+    from adk_quiz_generator.main import run_batch
+
+    urls = [f"https://example.com/bench/{time.time_ns()}/{i}" for i in range(runs)]
+    start = time.perf_counter()
+    results = await run_batch(urls, use_cache=False, concurrency=concurrency, output_dir=output_dir, session_db=":memory:")
+    return time.perf_counter() - start, sum(r["status"] != "success" for r in results)
+
+
+async def bench(args):
+    from adk_quiz_generator.agents import quiz_orchestrator
+    from adk_quiz_generator.config.models import gemini_model
+
+    gemini_model = gemini_model.delegate  # the ReplayLlm behind the rate limiter
+    output_dir = tempfile.mkdtemp(prefix="bench-pipeline-")
+    cassette = gemini_model.cassette
+    timer = StageTimer()
+    timer.install(quiz_orchestrator)
+
+    # --- 1. Per-stage wall time, with and without LLM latency ---
+    columns = {}
+    for label, latency in (("wall (s)", args.latency), ("no-LLM (s)", 0.0)):
+        gemini_model.latency = latency
+        timer.reset()
+        cassette.reset_stats()
+        total, _ = await run_pipelines(1, 1, output_dir)
+        columns[label] = ({stage: sum(d) for stage, d in timer.durations.items()}, total, dict(cassette.stats))
+
+    (stages, total, stats), (overhead_stages, overhead_total, _) = columns["wall (s)"], columns["no-LLM (s)"]
+    print(f"cassette: {cassette.path}  latency: {args.latency} x{args.latency_scale}")
+    print(f"LLM calls per run: {stats['calls']} ({stats['hits']} exact, {stats['fallbacks']} by agent), "
+          f"LLM time {stats['llm_seconds']:.2f}s")
+    print(f"\n{'stage':<28}{'wall (s)':>10}{'no-LLM (s)':>12}")
+    for stage, seconds in stages.items():
+        print(f"{stage:<28}{seconds:>10.3f}{overhead_stages.get(stage, 0.0):>12.3f}")
+    print(f"{'total':<28}{total:>10.3f}{overhead_total:>12.3f}")
+
+    # --- 2. Throughput at each concurrency level ---
+    gemini_model.latency = args.latency
+    print(f"\n{'concurrency':>11}{'runs':>6}{'failed':>8}{'wall (s)':>10}{'runs/s':>9}")
+    for concurrency in args.concurrency:
+        wall, failed = await run_pipelines(args.runs, concurrency, output_dir)
+        print(f"{concurrency:>11}{args.runs:>6}{failed:>8}{wall:>10.2f}{args.runs / wall:>9.2f}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+    logging.disable(logging.CRITICAL)  # per-event logging would dominate the overhead column
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
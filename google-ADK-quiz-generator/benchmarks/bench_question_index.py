@@ -0,0 +1,102 @@
+"""
+Benchmark: near-duplicate question lookups in the MinHash LSH question
+index vs. comparing against every stored signature.
+
+Usage:
+    python benchmarks/bench_question_index.py [--sizes 1000 10000 100000] [--probes 200] [--threshold 0.5]
+        [--scan-limit 100000]
+
+Fills a fresh index with synthetic questions (filtered, then stored with
+add_questions as reviewed questions are), then times filter_questions
+on --probes questions of three kinds: near-duplicates of stored questions
+(one word changed or added), exact repeats and unrelated questions.
+Reports the lookup time per question, the share of duplicates caught and
+the share of unrelated questions wrongly dropped, next to the per-question
+time of a linear scan over all signatures (up to --scan-limit questions).
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from adk_quiz_generator.question_index import (  # noqa: E402
+    DEFAULT_QUESTION_DUPLICATE_THRESHOLD, QuestionIndex, _similarity, minhash, question_shingles,
+)
+
+WORDS = (
+    "prompt injection model attacker plugin context retrieval filter output system user document email browser "
+    "agent memory policy token payload sandbox permission review audit encoding boundary channel schema header "
+    "cookie session upload image table script template index cache queue webhook training data poisoning leak"
+).split()
+STEMS = ("Which of these", "What does", "Why is", "How can", "When should", "Which statement about")
+
+
+def make_question(rng):
+    return f"{rng.choice(STEMS)} {' '.join(rng.choices(WORDS, k=rng.randint(6, 12)))}?"
+
+
+def near_duplicate(question, rng):
+    words = question.rstrip("?").split()
+    if rng.random() < 0.5:
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    else:
+        words.insert(rng.randrange(len(words)), rng.choice(WORDS))
+    return " ".join(words) + "?"
+
+
+def fill(index, stored, size, rng, batch=1000):
+    while len(stored) < size:
+        questions = [("multiple_choice", {"question": make_question(rng)}) for _ in range(min(batch, size - len(stored)))]
+        kept, _ = index.filter_questions(questions, source="https://bench.example/fill", run_id="fill")
+        index.add_questions(kept, source="https://bench.example/fill", run_id="fill")
+        stored.extend(question["question"] for _, question in kept)
+
+
+def probe(index, questions, run_id):
+    start = time.perf_counter()
+    _, duplicates = index.filter_questions([("multiple_choice", {"question": q}) for q in questions],
+                                           source="https://bench.example/probe", run_id=run_id)
+    return (time.perf_counter() - start) / len(questions), len(duplicates) / len(questions)
+
+
+def linear_scan(index, questions):
+    """Per-question time of comparing against every stored signature."""
+    rows = index._conn.execute("SELECT signature FROM questions WHERE section = 'multiple_choice'")
+    signatures = [array("I", blob) for blob, in rows]
+    start = time.perf_counter()
+    for question in questions:
+        signature = minhash(question_shingles(question))
+        any(_similarity(signature, other) >= index.threshold for other in signatures)
+    return (time.perf_counter() - start) / len(questions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_QUESTION_DUPLICATE_THRESHOLD)
+    parser.add_argument("--scan-limit", type=int, default=100000, help="Skip the linear scan above this many questions.")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    index = QuestionIndex(os.path.join(tempfile.mkdtemp(prefix="bench-question-index-"), "questions.db"), args.threshold)
+    stored = []
+    print(f"{'stored':>8}{'lookup (ms)':>13}{'near-dup caught':>17}{'exact caught':>14}{'unrelated dropped':>19}{'scan (ms)':>11}")
+    for size in args.sizes:
+        fill(index, stored, size, rng)
+        # Probes are only looked up, never stored, so later probes are not compared with them
+        near = [near_duplicate(q, rng) for q in rng.sample(stored, args.probes)]
+        lookup, near_caught = probe(index, near, f"near-{size}")
+        _, exact_caught = probe(index, rng.sample(stored, args.probes), f"exact-{size}")
+        _, false_drops = probe(index, [make_question(rng) for _ in range(args.probes)], f"new-{size}")
+        scan = f"{linear_scan(index, near[:20]) * 1000:>11.2f}" if len(stored) <= args.scan_limit else f"{'-':>11}"
+        print(f"{len(stored):>8}{lookup * 1000:>13.2f}{near_caught:>17.1%}{exact_caught:>14.1%}{false_drops:>19.1%}{scan}")
+
+
+if __name__ == "__main__":
+    main()
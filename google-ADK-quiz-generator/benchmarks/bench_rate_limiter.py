@@ -0,0 +1,211 @@
+"""
+Benchmark: LLM requests against a local fake model endpoint that enforces
+rate limits, sent uncoordinated (each caller retrying 429s on its own)
+vs. through the process-wide RateLimiter.
+
+Usage:
+    python benchmarks/bench_rate_limiter.py [--rpm 60] [--tpm 60000] [--window 2] [--batch 120]
+        [--interactive 8] [--latency 0.05]
+
+The endpoint allows --rpm requests and --tpm tokens per sliding --window
+seconds (a stand-in for Gemini's per-minute quotas) and answers anything
+over that with 429 and a Retry-After header. --batch requests are sent at
+once in the batch lane, and --interactive ones in the interactive lane
+while the batch is queued. Paths:
+
+- uncoordinated: every request goes straight to the endpoint and retries
+  429s with its own exponential backoff (0.1s doubling, with jitter),
+- limiter: RateLimitedLlm with the endpoint's real limits,
+- limiter (2x limits): RateLimitedLlm configured with twice the real
+  limits, so adaptive backoff has to find them from the 429s.
+
+Reports wall time, 429 responses and per-lane p50/p95 latency.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import threading
+import statistics
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import requests  # noqa: E402
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from adk_quiz_generator.config import rate_limiter  # noqa: E402
+from adk_quiz_generator.config.rate_limiter import (  # noqa: E402
+    RateLimitedLlm, RateLimiter, is_rate_limit_error, priority_lane, request_tokens,
+)
+
+PROMPT_WORDS = "summarize the key facts and definitions of prompt injection for a quiz writer".split()
+RESPONSE_TOKENS = 200
+
+
+class FakeModelServer:
+    """Answers POST /generate after `latency` seconds, or 429 when a sliding-window limit is exceeded."""
+
+    def __init__(self, rpm, tpm, window, latency):
+        self.rpm, self.tpm, self.window, self.latency = rpm, tpm, window, latency
+        self.accepted = deque()  # (time, tokens) of the requests in the current window
+        self.lock = threading.Lock()
+        self.rejected = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                tokens = body["prompt_tokens"] + RESPONSE_TOKENS
+                retry_after = server.admit(tokens)
+                if retry_after is not None:
+                    self.send_response(429)
+                    self.send_header("Retry-After", f"{retry_after:.2f}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                time.sleep(server.latency)
+                payload = json.dumps({"text": "ok", "total_tokens": tokens}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/generate"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def admit(self, tokens):
+        """Records an accepted request and returns None, or returns the seconds until it would fit."""
+        with self.lock:
+            now = time.monotonic()
+            while self.accepted and self.accepted[0][0] <= now - self.window:
+                self.accepted.popleft()
+            used = sum(t for _, t in self.accepted)
+            if len(self.accepted) < self.rpm and used + tokens <= self.tpm:
+                self.accepted.append((now, tokens))
+                return None
+            self.rejected += 1
+            return max(0.01, self.accepted[0][0] + self.window - now)
+
+    def reset(self):
+        with self.lock:
+            self.accepted.clear()
+            self.rejected = 0
+
+
+class FakeEndpointLlm(BaseLlm):
+    """A model that calls the fake endpoint; 429s surface as requests.HTTPError, like a real client's errors."""
+
+    url: str
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False):
+        body = {"prompt_tokens": request_tokens(llm_request)}
+        response = await asyncio.to_thread(requests.post, self.url, json=body, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=data["text"])]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(total_token_count=data["total_tokens"]),
+        )
+
+
+def make_request(rng):
+    text = " ".join(rng.choices(PROMPT_WORDS, k=rng.randint(300, 900)))
+    return LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text=text)])])
+
+
+async def uncoordinated(model, llm_request, rng):
+    """The old behaviour: the caller retries on its own, unaware of every other caller."""
+    for attempt in range(30):
+        try:
+            return [r async for r in model.generate_content_async(llm_request)]
+        except Exception as e:
+            if not is_rate_limit_error(e):
+                raise
+            await asyncio.sleep(0.1 * 2 ** min(attempt, 6) * rng.uniform(0.5, 1.5))
+    raise RuntimeError("gave up after 30 attempts")
+
+
+async def run_workload(send, args):
+    rng = random.Random(3)
+    latencies = {"interactive": [], "batch": []}
+
+    async def one(lane, llm_request, delay):
+        await asyncio.sleep(delay)
+        start = time.perf_counter()
+        with priority_lane(lane):
+            await send(llm_request, rng)
+        latencies[lane].append(time.perf_counter() - start)
+
+    tasks = [one("batch", make_request(rng), 0.0) for _ in range(args.batch)]
+    # Interactive requests arrive while the batch is queued
+    tasks += [one("interactive", make_request(rng), 0.2 + i * args.window / 4) for i in range(args.interactive)]
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start, latencies
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=int, default=60, help="Requests allowed per window by the endpoint.")
+    parser.add_argument("--tpm", type=int, default=60000, help="Tokens allowed per window by the endpoint.")
+    parser.add_argument("--window", type=float, default=2.0, help="Seconds the endpoint's limits apply to.")
+    parser.add_argument("--batch", type=int, default=120)
+    parser.add_argument("--interactive", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Endpoint response time in seconds.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)  # one retry warning per 429 would bury the table
+
+    server = FakeModelServer(args.rpm, args.tpm, args.window, args.latency)
+    endpoint = FakeEndpointLlm(model="fake-model", url=server.url)
+
+    def limited(name, scale):
+        limiter = RateLimiter(name, args.rpm * scale, args.tpm * scale, max_retries=30,
+                              backoff_seconds=0.1, window_seconds=args.window)
+        # Registered under the wrapper's model name, as get_rate_limiter would
+        with rate_limiter._limiters_lock:
+            rate_limiter._limiters[name] = limiter
+        model = RateLimitedLlm(model=name, delegate=endpoint)
+
+        async def send(llm_request, rng):
+            return [r async for r in model.generate_content_async(llm_request)]
+        return limiter, send
+
+    paths = [("uncoordinated", None, lambda llm_request, rng: uncoordinated(endpoint, llm_request, rng))]
+    for name, scale in (("limiter", 1), ("limiter (2x limits)", 2)):
+        limiter, send = limited(name, scale)
+        paths.append((name, limiter, send))
+
+    print(f"endpoint: {args.rpm} requests / {args.tpm} tokens per {args.window}s; "
+          f"{args.batch} batch + {args.interactive} interactive requests")
+    print(f"{'path':<22}{'wall (s)':>9}{'429s':>7}{'inter p50':>11}{'inter p95':>11}{'batch p50':>11}{'batch p95':>11}")
+    try:
+        for name, limiter, send in paths:
+            server.reset()
+            time.sleep(args.window)  # let the previous path's window expire
+            wall, latencies = asyncio.run(run_workload(send, args))
+            inter, batch = latencies["interactive"], latencies["batch"]
+            print(f"{name:<22}{wall:>9.2f}{server.rejected:>7}{percentile(inter, 50):>11.2f}{percentile(inter, 95):>11.2f}"
+                  f"{percentile(batch, 50):>11.2f}{percentile(batch, 95):>11.2f}")
+    finally:
+        server.httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
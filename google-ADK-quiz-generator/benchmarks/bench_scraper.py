@@ -0,0 +1,109 @@
+"""
+Benchmark: streaming block extractor vs. the previous BeautifulSoup path.
+
+Usage:
+    python benchmarks/bench_scraper.py [saved_page.html ...] [--repeat N]
+
+With no pages given, a synthetic documentation page (~2 MB) is generated.
+Both extractors are timed on the 50-block cap used by scrape_main_content
+and on the full page (no cap).
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from adk_quiz_generator.tools.web_scraper import extract_blocks  # noqa: E402
+
+
+def legacy_extract_blocks(html, max_blocks=50):
+    """The BeautifulSoup implementation scrape_main_content used before the streaming extractor."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        tag.decompose()
+
+    content_blocks = []
+    for heading_tag in ["h1", "h2", "h3"]:
+        for h in soup.find_all(heading_tag):
+            text = h.get_text(strip=True)
+            if text and len(text) > 5:
+                content_blocks.append(text.upper())
+    for p in soup.find_all("p"):
+        text = p.get_text(strip=True)
+        if text and len(text) > 20:
+            content_blocks.append(text)
+    for li in soup.find_all("li"):
+        text = li.get_text(strip=True)
+        if text and len(text) > 20:
+            content_blocks.append(f"- {text}")
+
+    unique_blocks = []
+    seen = set()
+    for block in content_blocks:
+        block_clean = re.sub(r'\s+', ' ', block)
+        if block_clean not in seen:
+            seen.add(block_clean)
+            unique_blocks.append(block_clean)
+    return unique_blocks if max_blocks is None else unique_blocks[:max_blocks]
+
+
+def synthetic_page(sections=4000):
+    parts = [
+        "<html><head><title>Docs</title><style>body{color:#333}</style>",
+        "<script>var analytics = {enabled: true};</script></head><body>",
+        "<header><nav><ul>" + "".join(f"<li><a href='/p{i}'>Navigation link number {i}</a></li>" for i in range(50)) + "</ul></nav></header>",
+        "<main>",
+    ]
+    for i in range(sections):
+        parts.append(
+            f"<section><h2>Section {i}: configuring the component</h2>"
+            f"<p>Paragraph {i} explains how the <code>option_{i}</code> setting changes "
+            f"the behaviour of the system when it is <b>enabled</b> in production.</p>"
+            f"<ul><li>Item {i}.1 describes a default value that is worth remembering</li>"
+            f"<li>Item {i}.2 describes an edge case that is worth remembering</li></ul>"
+            f"<aside>Advertisement {i} that should be skipped entirely</aside></section>"
+        )
+    parts.append("</main><footer><p>Copyright notice that should never be extracted</p></footer></body></html>")
+    return "".join(parts)
+
+
+def best_of(fn, html, max_blocks, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        blocks = fn(html, max_blocks)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(blocks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help="Saved HTML pages to benchmark.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    pages = []
+    for path in args.pages:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append((os.path.basename(path), f.read()))
+    if not pages:
+        pages.append(("synthetic", synthetic_page()))
+
+    print(f"{'page':<24}{'size':>10}{'cap':>6}{'legacy (s)':>13}{'stream (s)':>13}{'speedup':>9}")
+    for name, html in pages:
+        for max_blocks in (50, None):
+            legacy_time, _ = best_of(legacy_extract_blocks, html, max_blocks, args.repeat)
+            stream_time, _ = best_of(extract_blocks, html, max_blocks, args.repeat)
+            print(
+                f"{name[:23]:<24}{len(html) / 1e6:>8.2f}MB{str(max_blocks or '-'):>6}"
+                f"{legacy_time:>13.4f}{stream_time:>13.4f}{legacy_time / stream_time:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
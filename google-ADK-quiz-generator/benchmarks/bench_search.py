@@ -0,0 +1,99 @@
+"""
+Benchmark: the validator's fact-check searches, one uncached call per
+question (the previous search_web) vs. the cached parallel batch API.
+
+Usage:
+    python benchmarks/bench_search.py [--questions 14] [--repeat-rate 0.3] [--slow-rate 0.1]
+        [--latency 0.4] [--slow-latency 6] [--deadline 2]
+
+Runs against a local StaticIndexBackend whose per-query latency is drawn
+from a seeded RNG: most queries take --latency seconds (jittered), a
+--slow-rate share take --slow-latency. --repeat-rate of the queries
+repeat an earlier one with different casing, as happens when two
+questions check the same fact.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from adk_quiz_generator.tools.search_tool import SearchService, StaticIndexBackend  # noqa: E402
+
+FACTS = [
+    "prompt injection alters model behaviour", "indirect injection hides instructions in web pages",
+    "owasp ranks prompt injection llm01", "fine tuning does not prevent injection",
+    "retrieval augmented generation adds external context", "jailbreaking bypasses safety rules",
+    "system prompts set model behaviour", "input filtering reduces injection risk",
+    "least privilege limits plugin damage", "human approval for privileged actions",
+    "output encoding prevents xss in llm apps", "adversarial suffixes transfer between models",
+]
+
+
+def make_queries(count, repeat_rate, rng):
+    queries = []
+    for i in range(count):
+        if queries and rng.random() < repeat_rate:
+            queries.append(rng.choice(queries).upper())
+        else:
+            queries.append(f"{FACTS[i % len(FACTS)]} {i}")
+    return queries
+
+
+def make_backend(args, rng):
+    documents = [{"snippet": f"{fact}. More detail on {fact}.", "source": f"https://example.com/{i}"} for i, fact in enumerate(FACTS)]
+    latencies = {}
+
+    def latency(query):
+        if query not in latencies:
+            slow = rng.random() < args.slow_rate
+            latencies[query] = args.slow_latency if slow else args.latency * rng.uniform(0.5, 1.5)
+        return latencies[query]
+
+    return StaticIndexBackend(documents, latency=latency)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=14)
+    parser.add_argument("--repeat-rate", type=float, default=0.3)
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.4)
+    parser.add_argument("--slow-latency", type=float, default=6.0)
+    parser.add_argument("--deadline", type=float, default=2.0)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    queries = make_queries(args.questions, args.repeat_rate, rng)
+    backend = make_backend(args, rng)
+
+    # --- 1. Previous behaviour: one blocking, uncached search per question ---
+    start = time.perf_counter()
+    for query in queries:
+        backend.search(query.casefold(), 3)
+    legacy = time.perf_counter() - start
+
+    # --- 2. Batch API: dedupe + cache + parallel, bounded by the deadline ---
+    service = SearchService(backend=backend, max_parallel=args.parallel)
+    rows = []
+    for label in ("batch (cold cache)", "batch (warm cache)"):
+        if rows:
+            time.sleep(args.slow_latency)  # let stragglers finish and fill the cache
+        start = time.perf_counter()
+        report = service.search_many(queries, deadline=args.deadline)
+        rows.append((label, time.perf_counter() - start, len(report["results"]), len(report["timed_out"])))
+
+    unique = len({q.casefold() for q in queries})
+    print(f"{len(queries)} queries ({unique} unique), deadline {args.deadline:g}s, {args.parallel} workers")
+    print(f"{'path':<22}{'wall (s)':>10}{'answered':>10}{'timed out':>11}")
+    print(f"{'sequential, no cache':<22}{legacy:>10.2f}{len(queries):>10}{0:>11}")
+    for label, seconds, answered, timed_out in rows:
+        print(f"{label:<22}{seconds:>10.2f}{answered:>10}{timed_out:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: CLI startup cost, from `python -X importtime`.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 10] [--max-import-ms 500]
+
+Each measurement runs in a fresh interpreter. It reports the cumulative
+import time of adk_quiz_generator.main (what `--help` pays) and of the
+modules deferred to the first pipeline run (agents, model, tools), the
+heaviest imports made directly by main, and the wall time of
+`python -m adk_quiz_generator.main --help`. With --max-import-ms the script
+exits with status 1 when importing main takes longer, so a regression can
+fail a CI job.
+"""
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.abspath(os.path.join(HERE, "..", "src"))
+
+# "import time:   self [us] | cumulative | imported package"
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="heaviest direct imports of main to list")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="fail if importing main takes longer")
+    return parser.parse_args(argv)
+
+
+def _env():
+    # Replay mode: nothing below needs a Gemini API key
+    return dict(os.environ, PYTHONPATH=SRC, LLM_MODE="replay")
+
+
+def importtime(statement):
+    """
+    Runs `statement` under -X importtime in a fresh interpreter.
+
+    Returns:
+        A list of (module, depth, self ms, cumulative ms) in import order.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=_env(), cwd=SRC, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, len(indent) // 2, int(self_us) / 1000, int(cumulative_us) / 1000))
+    return rows
+
+
+def cumulative_ms(rows, module):
+    return next((cum for name, _, _, cum in rows if name == module), 0.0)
+
+
+def median_importtime(statement, module, runs):
+    return statistics.median(cumulative_ms(importtime(statement), module) for _ in range(runs))
+
+
+def wall_time(python_args, runs):
+    """Median wall time, in seconds, of `python <python_args>` in a fresh interpreter."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *python_args], env=_env(), cwd=SRC, capture_output=True, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    main_ms = median_importtime("import adk_quiz_generator.main", "adk_quiz_generator.main", args.runs)
+    agents_ms = median_importtime(
+        "import adk_quiz_generator.main, adk_quiz_generator.agents", "adk_quiz_generator.agents", args.runs
+    )
+    print(f"{'import':<44}{'median (ms)':>12}")
+    print(f"{'adk_quiz_generator.main':<44}{main_ms:>12.1f}")
+    print(f"{'adk_quiz_generator.agents (first run)':<44}{agents_ms:>12.1f}")
+
+    print("\nheaviest direct imports of adk_quiz_generator.main:")
+    rows = importtime("import adk_quiz_generator.main")
+    main_depth = next(depth for name, depth, _, _ in rows if name == "adk_quiz_generator.main")
+    direct = [row for row in rows if row[1] == main_depth + 1]
+    for module, _, _, cumulative in sorted(direct, key=lambda row: -row[3])[:args.top]:
+        print(f"  {module:<42}{cumulative:>12.1f}")
+
+    help_s = wall_time(["-m", "adk_quiz_generator.main", "--help"], args.runs)
+    pipeline_s = wall_time(["-c", "import adk_quiz_generator.agents as a; a.get_quiz_orchestrator()"], args.runs)
+    print(f"\n{'wall time':<44}{'median (s)':>12}")
+    print(f"{'main --help':<44}{help_s:>12.3f}")
+    print(f"{'build the default pipeline':<44}{pipeline_s:>12.3f}")
+
+    if args.max_import_ms is not None and main_ms > args.max_import_ms:
+        print(f"FAIL: importing adk_quiz_generator.main took {main_ms:.1f} ms (limit {args.max_import_ms:g} ms)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
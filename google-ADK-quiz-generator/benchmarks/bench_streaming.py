@@ -0,0 +1,84 @@
+"""
+Benchmark: time to first question, waiting for the final event (the
+previous behaviour) vs. parsing the streamed agent output incrementally.
+
+Usage:
+    python benchmarks/bench_streaming.py [--cassette benchmarks/cassettes/adk_orchestrator.jsonl]
+        [--latency recorded|SECONDS] [--latency-scale 0.1] [--runs 3]
+
+Model calls are replayed from the cassette (LLM_MODE=replay); with
+streaming on, each replayed response arrives in LLM_STREAM_CHUNK_CHARS
+chunks spread over its recorded duration, as a streamed Gemini call would.
+"streamed" counts every question event, drafts included; "validated" the
+validator's, which should match the final quiz.
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+import argparse
+import statistics
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", default=os.path.join(HERE, "cassettes", "adk_orchestrator.jsonl"))
+    parser.add_argument("--latency", default="recorded", help="'recorded' or fixed seconds per LLM call")
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="multiplier for recorded latencies")
+    parser.add_argument("--runs", type=int, default=3)
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    """Must run before adk_quiz_generator is imported: the shared model is built at import time."""
+    os.environ.update({
+        "LLM_MODE": "replay",
+        "LLM_CASSETTE": os.path.abspath(args.cassette),
+        "LLM_LATENCY": args.latency,
+        "LLM_LATENCY_SCALE": str(args.latency_scale),
+    })
+
+
+async def run_once(runner, output_dir, stream):
+    from adk_quiz_generator.main import generate_quiz
+
+    url = f"https://example.com/bench/{time.time_ns()}"
+    events = []
+    result = await generate_quiz(
+        runner, url, False,
+        os.path.join(output_dir, "quiz_output.json"), os.path.join(output_dir, "quiz_output.docx"),
+        on_question=events.append if stream else None,
+    )
+    first = result["first_question_seconds"] if stream else result["duration"]
+    validated = sum(event["stage"] == "validated" for event in events)
+    return first, result["duration"], len(events), validated, result["question_count"]
+
+
+async def bench(args):
+    from adk_quiz_generator.main import build_runner, make_session_service
+
+    output_dir = tempfile.mkdtemp(prefix="bench-streaming-")
+    runner = build_runner(make_session_service(":memory:"))
+
+    print(f"{'path':<24}{'first question (s)':>20}{'full quiz (s)':>15}{'streamed':>10}{'validated':>11}{'final':>7}")
+    for label, stream in (("final event only", False), ("incremental stream", True)):
+        rows = [await run_once(runner, output_dir, stream) for _ in range(args.runs)]
+        first = statistics.median(r[0] for r in rows)
+        total = statistics.median(r[1] for r in rows)
+        print(f"{label:<24}{first:>20.3f}{total:>15.3f}{rows[-1][2]:>10}{rows[-1][3]:>11}{rows[-1][4]:>7}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+    logging.disable(logging.CRITICAL)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark: a multi-URL topic quiz built from one merged brief vs. one
+content acquisition per URL.
+
+Usage:
+    python benchmarks/bench_topic.py [--pages 8] [--latency 0.3] [--per-host 4] [--repeat 3]
+
+Serves --pages synthetic pages on two local hosts (127.0.0.1 and
+localhost), each response delayed by --latency seconds. The pages share
+navigation, a footer and paragraphs quoted from each other with small
+edits, as pages on one topic do. "per-url" fetches and extracts each page
+on its own, as N separate runs would; "topic" is build_topic_brief's
+path: concurrent fetches (at most --per-host per host) and one shared
+shingle deduper. The summarize column counts the map-reduce requests each
+path would send for the extracted text.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+# Keep the revalidation cache out of the working tree
+os.environ.setdefault("HTTP_CACHE_DIR", tempfile.mkdtemp(prefix="bench-topic-"))
+
+import asyncio  # noqa: E402
+
+from adk_quiz_generator.tools.chunking import DEFAULT_CHUNK_TOKENS, chunk_blocks, estimate_tokens  # noqa: E402
+from adk_quiz_generator.tools.dedupe import BlockDeduper  # noqa: E402
+from adk_quiz_generator.tools.http_fetch import fetch_url, fetch_urls  # noqa: E402
+from adk_quiz_generator.tools.web_scraper import extract_blocks  # noqa: E402
+
+
+WORDS = (
+    "model prompt attacker plugin context retrieval filter output system user document email browser "
+    "agent memory policy token payload sandbox permission review audit encoding boundary channel "
+    "schema header cookie session upload image table script template index cache queue webhook"
+).split()
+
+
+def paragraph(index, i):
+    """Distinct text for paragraph `i` of chapter `index`."""
+    words = " ".join(random.Random(index * 1000 + i).sample(WORDS, 14))
+    return f"Paragraph {i} of chapter {index} connects {words} in one worked example."
+
+
+def synthetic_page(index, pages, sections=60):
+    nav = "".join(f"<li>Topic guide chapter {i} covering one part of the subject</li>" for i in range(pages))
+    parts = [f"<html><body><ul>{nav}</ul><main><h1>Chapter {index}: prompt injection in practice</h1>"]
+    for i in range(sections):
+        parts.append(f"<h2>Chapter {index} section {i} on attack surfaces</h2><p>{paragraph(index, i)}</p>")
+        if i % 3 == 0:
+            # Quoted from the previous chapter, with one word changed
+            quoted = paragraph((index - 1) % pages, i).replace("worked", "short")
+            parts.append(f"<p>As noted before: {quoted}</p>")
+    parts.append("<p>This guide is maintained by the security team and updated every quarter.</p>")
+    parts.append("</main></body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+def serve(pages, latency):
+    bodies = {f"/chapter/{i}": synthetic_page(i, pages) for i in range(pages)}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = bodies.get(self.path)
+            self.send_response(200 if body else 404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    hosts = ("127.0.0.1", "localhost")
+    return server, [f"http://{hosts[i % 2]}:{port}/chapter/{i}" for i in range(pages)]
+
+
+def summarize_requests(blocks):
+    """Map-reduce requests for one brief: none if it fits, else one per chunk plus the reduce."""
+    if not blocks or estimate_tokens("\n".join(blocks)) <= DEFAULT_CHUNK_TOKENS:
+        return 0
+    return len(chunk_blocks(blocks, DEFAULT_CHUNK_TOKENS)) + 1
+
+
+def per_url(urls):
+    blocks, requests = 0, 0
+    for url in urls:
+        page_blocks = extract_blocks(fetch_url(url).text, max_blocks=None)
+        blocks += len(page_blocks)
+        requests += summarize_requests(page_blocks)
+    return blocks, 0, requests
+
+
+def topic(urls, per_host):
+    results = asyncio.run(fetch_urls(urls, per_host=per_host))
+    seen = BlockDeduper()
+    blocks = []
+    for url, result in zip(urls, results):
+        blocks.append(f"SOURCE: {url}")
+        blocks.extend(extract_blocks(result.text, max_blocks=None, seen=seen))
+    return len(blocks), seen.dropped, summarize_requests(blocks)
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per HTTP response.")
+    parser.add_argument("--per-host", type=int, default=4, help="Max concurrent connections per host.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    server, urls = serve(args.pages, args.latency)
+    try:
+        print(f"{args.pages} pages on 2 hosts, {args.latency}s per response")
+        print(f"{'path':<10}{'time (s)':>10}{'blocks':>8}{'dropped':>9}{'summarize':>11}")
+        for name, fn in (("per-url", lambda: per_url(urls)), ("topic", lambda: topic(urls, args.per_host))):
+            elapsed, (blocks, dropped, requests) = best_of(fn, args.repeat)
+            print(f"{name:<10}{elapsed:>10.3f}{blocks:>8}{dropped:>9}{requests:>11}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
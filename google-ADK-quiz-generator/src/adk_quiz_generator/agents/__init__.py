@@ -1,74 +1,145 @@
+import threading
+
 from google.adk.agents import LlmAgent, ParallelAgent, SequentialAgent
 
 # Local imports
-from ..config.models import gemini_model
-from ..tools.web_scraper import web_scraper_tool
-from ..tools.file_tools import file_reader_tool, file_writer_tool
-from ..tools.search_tool import web_search_tool
+from ..config.models import get_gemini_model
+from ..tools.brief_builder import brief_builder_tool, topic_brief_tool
+from ..tools.brief_cache import brief_cache_reader_tool, brief_cache_writer_tool
+from ..tools.search_tool import web_search_batch_tool, web_search_tool
 from ..tools.word_tools import word_writer_tool  # <- new Word tool
 from . import prompts
 
+# --- Checkpoint keys ---
+# Each stage writes its final output to session state under its key, so a
+# persistent session service can resume a run after the last finished stage.
+CONTENT_BRIEF_KEY = "content_brief"
+MCQ_QUESTIONS_KEY = "mcq_questions"
+TF_QUESTIONS_KEY = "tf_questions"
+VALIDATED_QUIZ_KEY = "validated_quiz"
+
 # --- 1. Content Acquisition ---
-content_acquisition_agent = LlmAgent(
-    model=gemini_model,
-    instruction=prompts.CONTENT_ACQUISITION_INSTRUCTION,
-    tools=[web_scraper_tool, file_reader_tool, file_writer_tool],
-    name="ContentAcquisitionAgent"
-)
+def make_content_acquisition_agent():
+    return LlmAgent(
+        model=get_gemini_model(),
+        instruction=prompts.CONTENT_ACQUISITION_INSTRUCTION,
+        tools=[brief_builder_tool, topic_brief_tool, brief_cache_reader_tool, brief_cache_writer_tool],
+        output_key=CONTENT_BRIEF_KEY,
+        name="ContentAcquisitionAgent"
+    )
 
 # --- 2. Quiz Generation Sub-Agents ---
-mcq_generation_agent = LlmAgent(
-    model=gemini_model,
-    instruction=prompts.MCQ_AGENT_INSTRUCTION,
-    name="MCQGenerationAgent"
-)
+def make_mcq_generation_agent():
+    return LlmAgent(
+        model=get_gemini_model(),
+        instruction=prompts.MCQ_AGENT_INSTRUCTION,
+        output_key=MCQ_QUESTIONS_KEY,
+        name="MCQGenerationAgent"
+    )
 
-tf_generation_agent = LlmAgent(
-    model=gemini_model,
-    instruction=prompts.TRUE_FALSE_AGENT_INSTRUCTION,
-    name="TFGenerationAgent"
-)
+def make_tf_generation_agent():
+    return LlmAgent(
+        model=get_gemini_model(),
+        instruction=prompts.TRUE_FALSE_AGENT_INSTRUCTION,
+        output_key=TF_QUESTIONS_KEY,
+        name="TFGenerationAgent"
+    )
 
-# --- 2b. Parallel Wrapper ---
-quiz_generation_agent = ParallelAgent(
-    sub_agents=[mcq_generation_agent, tf_generation_agent],
-    name="ParallelQuizGenerator"
-)
+# --- 3. Review ---
+# The validator's JSON is repaired and canonicalized in-process by
+# postprocess.postprocess_quiz, so no separate formatting agent runs after it.
+def make_validator_agent():
+    return LlmAgent(
+        model=get_gemini_model(),
+        instruction=prompts.VALIDATOR_AGENT_INSTRUCTION,
+        tools=[web_search_batch_tool, web_search_tool],
+        output_key=VALIDATED_QUIZ_KEY,
+        name="ValidatorAgent"
+    )
 
-# --- 3. Review & Format ---
-validator_agent = LlmAgent(
-    model=gemini_model,
-    instruction=prompts.VALIDATOR_AGENT_INSTRUCTION,
-    tools=[web_search_tool],
-    name="ValidatorAgent"
-)
+# --- 4. Word Document Generation Agent ---
+def make_word_agent():
+    return LlmAgent(
+        model=get_gemini_model(),
+        instruction=prompts.WORD_AGENT_INSTRUCTION,
+        tools=[word_writer_tool],  # tool that writes Word docs
+        name="QuizWordAgent"
+    )
 
-formatter_agent = LlmAgent(
-    model=gemini_model,
-    instruction=prompts.FORMATTER_AGENT_INSTRUCTION,
-    name="FormatterAgent"
-)
+# --- 5. Orchestrator ---
+def build_orchestrator(completed_state=None):
+    """
+    Builds a fresh QuizOrchestrator. Stages whose checkpoint key is already
+    present in `completed_state` are left out, so a resumed session only runs
+    the work that did not finish. Returns None if every stage is done.
 
-review_and_format_agent = SequentialAgent(
-    sub_agents=[validator_agent, formatter_agent],
-    name="ReviewAndFormatAgent"
-)
+    Agents can only have one parent, so every call creates new agent instances.
+    """
+    done = set(completed_state or {})
+    stages = []
 
-# --- 4. Word Document Generation Agent ---
-word_agent = LlmAgent(
-    model=gemini_model,
-    instruction=prompts.WORD_AGENT_INSTRUCTION,
-    tools=[word_writer_tool],  # tool that writes Word docs
-    name="QuizWordAgent"
-)
+    if CONTENT_BRIEF_KEY not in done:
+        stages.append(make_content_acquisition_agent())
 
-# --- 5. Orchestrator ---
-quiz_orchestrator = SequentialAgent(
-    sub_agents=[
-        content_acquisition_agent,
-        quiz_generation_agent,
-        review_and_format_agent
-        #word_agent  # <- added as final step
-    ],
-    name="QuizOrchestrator"
+    # --- 2b. Parallel Wrapper ---
+    generators = []
+    if MCQ_QUESTIONS_KEY not in done:
+        generators.append(make_mcq_generation_agent())
+    if TF_QUESTIONS_KEY not in done:
+        generators.append(make_tf_generation_agent())
+    if generators:
+        stages.append(ParallelAgent(sub_agents=generators, name="ParallelQuizGenerator"))
+
+    if VALIDATED_QUIZ_KEY not in done:
+        stages.append(make_validator_agent())
+
+    #stages.append(make_word_agent())  # <- optional final step
+
+    if not stages:
+        return None
+    return SequentialAgent(sub_agents=stages, name="QuizOrchestrator")
+
+
+# --- 6. Default pipeline, built on first use ---
+# Importing this package builds no agents (and no model); the module-level
+# handles below are created together the first time one is accessed.
+_DEFAULT_PIPELINE_NAMES = (
+    "quiz_orchestrator", "content_acquisition_agent", "quiz_generation_agent", "validator_agent",
+    "mcq_generation_agent", "tf_generation_agent",
 )
+
+
+_pipeline_lock = threading.Lock()
+
+
+def _build_default_pipeline():
+    with _pipeline_lock:
+        if "quiz_orchestrator" not in globals():
+            quiz_orchestrator = build_orchestrator()
+            content_acquisition_agent, quiz_generation_agent, validator_agent = quiz_orchestrator.sub_agents
+            mcq_generation_agent, tf_generation_agent = quiz_generation_agent.sub_agents
+            globals().update({
+                "quiz_orchestrator": quiz_orchestrator,
+                "content_acquisition_agent": content_acquisition_agent,
+                "quiz_generation_agent": quiz_generation_agent,
+                "validator_agent": validator_agent,
+                "mcq_generation_agent": mcq_generation_agent,
+                "tf_generation_agent": tf_generation_agent,
+            })
+
+
+def get_quiz_orchestrator():
+    """Returns the default QuizOrchestrator (every stage), building it on first call."""
+    _build_default_pipeline()
+    return globals()["quiz_orchestrator"]
+
+
+def __getattr__(name):
+    if name in _DEFAULT_PIPELINE_NAMES:
+        _build_default_pipeline()
+        return globals()[name]
+    if name == "word_agent":
+        with _pipeline_lock:
+            globals().setdefault("word_agent", make_word_agent())
+        return globals()["word_agent"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
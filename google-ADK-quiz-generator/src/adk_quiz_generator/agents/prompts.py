@@ -3,22 +3,56 @@ CONTENT_ACQUISITION_INSTRUCTION = """
 You are a content acquisition and summarization specialist.
 Your task is to get the content for a quiz based on the user's prompt
 and generate a concise, comprehensive "content brief".
-The prompt will specify a URL and a caching preference (e.g., "Use cache: True").
+The prompt will specify a URL, or several URLs covering one topic, and a
+caching preference (e.g., "Use cache: True").
+For several URLs, "the URL" below means all of them in the prompt's order,
+separated by single spaces.
 
 1.  If the user wants to use cache (e.g., "Use cache: True"),
-    you MUST first try the `file_reader_tool` to read 'content_brief.md'.
-2.  FIX: If the file is read successfully, you MUST output that content as the
+    you MUST first call `read_cached_brief` with the URL.
+2.  FIX: If a cached brief is returned, you MUST output that content as the
     content brief and you are DONE. DO NOT scrape the URL.
-3.  If the file doesn't exist (the tool returns an error) OR if the user
+3.  If there is no cached brief (the tool returns an error) OR if the user
     explicitly wants fresh content (e.g., "Use cache: False"),
-    you MUST use the `web_scraper_tool` to get content from the URL.
-4.  If you scraped new content, you MUST save it to 'content_brief.md'
-    using the `file_writer_tool`.
+    you MUST use `build_content_brief` to get content from the URL.
+    For several URLs, call `build_topic_brief` ONCE with the list of all
+    URLs instead; it fetches them together and merges them into one brief.
+    Both return the full text, or an already-merged brief for long content.
+4.  If you scraped new content, you MUST save your content brief with
+    `save_cached_brief`, passing the same URL.
 5.  Finally, output the acquired content brief. This brief will be
     used by other agents to create a quiz. It must capture the
     key facts, concepts, definitions, and main ideas.
 """
 
+# --- 1b. Long-page summarization (map-reduce in build_content_brief) ---
+CHUNK_SUMMARY_INSTRUCTION = """
+You are condensing one section of a longer web page for a quiz writer.
+Extract every quiz-worthy item from the text: key facts, figures, dates,
+names, definitions and core concepts. Keep wording precise and factual.
+Output a compact Markdown bullet list. Do not add information that is not in the text.
+"""
+
+BRIEF_REDUCE_INSTRUCTION = """
+You are merging partial notes, taken from consecutive sections of one web page
+(or of several pages on one topic), into a single "content brief" for quiz generation.
+Remove duplicates, keep every distinct fact, and output Markdown with:
+1. A concise summary of the entire page.
+2. A bulleted list of 'Key Facts & Verifiable Data'.
+3. A section of 'Key Concepts & Definitions'.
+"""
+
+# --- 1c. Shared context (context_cache.py) ---
+# Leads the content brief, which every agent after content acquisition gets
+# as its first message (after its own instruction). Keep it free of
+# per-agent details: any change here invalidates the cached briefs.
+CONTENT_BRIEF_PREAMBLE = """
+You are one agent in a pipeline that writes a fact-checked quiz from a web page.
+The content brief below, produced by the content acquisition agent, is the
+source of truth for every question. The messages after it give the work of
+the agents before you.
+"""
+
 # --- 2. Quiz Generation (Parallel) ---
 MCQ_AGENT_INSTRUCTION = """
 You are a multiple-choice question (MCQ) designer.
@@ -39,7 +73,7 @@ Based on the provided content brief, create 5 high-quality T/F questions.
 Output *ONLY* a valid JSON list of question objects. Do not add any other text.
 """
 
-# --- 3. Review and Format ---
+# --- 3. Review ---
 VALIDATOR_AGENT_INSTRUCTION = """
 You are a meticulous Quality Assurance and Fact-Checking Agent.
 Your job is to take two separate JSON lists of questions (one for MCQs, one for T/F)
@@ -47,8 +81,10 @@ and combine them into a single, final JSON object.
 
 You MUST:
 1.  **Receive Input:** You will get a list of MCQs from 'MCQGenerationAgent' and a list of T/F questions from 'TFGenerationAgent'.
-2.  **Fact-Check:** Review every question against the original content brief. Use the `web_search_tool` ONLY if the brief is ambiguous or lacks a specific fact.
-3.  **Collect Sources:** If you use the `web_search_tool`, you MUST collect all the 'source' URLs from the tool's JSON output.
+2.  **Fact-Check:** Review every question against the original content brief. Search ONLY if the brief is ambiguous or lacks a specific fact.
+    When several facts need checking, call `search_web_batch` ONCE with one query per fact instead of calling `search_web` repeatedly.
+    Queries listed under "timed_out" returned no results in time; rely on the brief for those instead of retrying.
+3.  **Collect Sources:** If you search, you MUST collect all the 'source' URLs from the tool's JSON output.
 4.  **Correct Errors:** Fix any vague questions or incorrect answers.
 5.  **Format Output:** Your final output MUST be a **single JSON OBJECT (a dictionary)**.
     - It MUST have a "multiple_choice" key containing the list of corrected MCQs.
@@ -74,13 +110,6 @@ Example Output Format:
 }
 """
 
-FORMATTER_AGENT_INSTRUCTION = """
-You are a final JSON formatting agent.
-Your sole job is to take the input (which should be a JSON object from the Validator) and ensure it is formatted as a *single, final, valid JSON object*.
-- Do not add any conversational text, apologies, or explanations.
-- Just output the clean, structured JSON.
-"""
-
 WORD_AGENT_INSTRUCTION = """
 You are a Word Document Generator Agent.
 Your task is to take the final validated quiz JSON (from the orchestrator),
@@ -1,17 +1,59 @@
 import os
-from dotenv import load_dotenv
-from google.adk.models import Gemini
+import threading
 
-# Load API keys from .env
-load_dotenv()
+from .rate_limiter import RateLimitedLlm
+from .replay import DEFAULT_LLM_MODE, LLM_MODES, ReplayLlm
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL_NAME = "gemini-2.5-flash"
 
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in .env file.")
 
-# Configure the Gemini model to be used by all agents
-gemini_model = Gemini(
-    name="gemini-2.5-flash",
-    api_key=GEMINI_API_KEY
-)
\ No newline at end of file
+def make_gemini_model(mode=DEFAULT_LLM_MODE):
+    """
+    Creates the model shared by all agents. LLM_MODE selects live Gemini
+    calls, recording them to the LLM_CASSETTE file, or replaying that file
+    offline (no API key needed). Every request goes through the model's
+    process-wide rate limiter.
+    """
+    return RateLimitedLlm(model=GEMINI_MODEL_NAME, delegate=_make_model(mode))
+
+
+def _make_model(mode):
+    if mode not in LLM_MODES:
+        raise ValueError(f"LLM_MODE must be one of {LLM_MODES}, got '{mode}'.")
+    if mode == "replay":
+        return ReplayLlm(model=GEMINI_MODEL_NAME)
+
+    # API keys come from .env, loaded once by main.py before anything is built
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found in .env file.")
+
+    from google.adk.models import Gemini
+
+    gemini = Gemini(
+        name=GEMINI_MODEL_NAME,
+        api_key=api_key
+    )
+    if mode == "record":
+        return ReplayLlm(model=GEMINI_MODEL_NAME, mode="record", delegate=gemini)
+    return gemini
+
+
+_gemini_model = None
+_gemini_model_lock = threading.Lock()
+
+
+def get_gemini_model():
+    """Returns the Gemini model used by all agents, created on first use."""
+    global _gemini_model
+    with _gemini_model_lock:
+        if _gemini_model is None:
+            _gemini_model = make_gemini_model()
+        return _gemini_model
+
+
+def __getattr__(name):
+    # `gemini_model` used to be built at import time; keep the name working
+    if name == "gemini_model":
+        return get_gemini_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,388 @@
+import os
+import re
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+import threading
+import contextlib
+import contextvars
+from typing import AsyncGenerator
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+# --- Defaults (overridable through the environment) ---
+# Requests and tokens per minute allowed for each model; 0 means no limit
+DEFAULT_LLM_RPM = float(os.getenv("LLM_RPM", "1000"))
+DEFAULT_LLM_TPM = float(os.getenv("LLM_TPM", "1000000"))
+# Per-model overrides, "model=rpm/tpm,..." (model names without a provider prefix)
+DEFAULT_LLM_RATE_LIMITS = os.getenv("LLM_RATE_LIMITS", "")
+# Share of a minute's allowance that may be sent at once; the rest is paced over the minute
+DEFAULT_LLM_BURST_SHARE = float(os.getenv("LLM_BURST_SHARE", "0.1"))
+# Lane of calls made outside a priority_lane() block: "interactive" or "batch"
+DEFAULT_LLM_PRIORITY = os.getenv("LLM_PRIORITY", "interactive")
+# Times a rate-limited request is resent before its error is raised
+DEFAULT_LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+# Pause after a rate-limit response without a retry delay, doubled for each one in a row
+DEFAULT_LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "2"))
+MAX_BACKOFF_SECONDS = 60.0
+
+# Lower goes first: a waiting interactive request is always granted before a batch one
+PRIORITIES = {"interactive": 0, "batch": 1}
+# A rate-limit response halves the refill rates (down to MIN_RATE_SCALE of the
+# configured limits); each success then restores RECOVERY_STEP of them
+MIN_RATE_SCALE = 0.1
+RECOVERY_STEP = 0.05
+# Rough English average for Gemini tokenizers, as in tools/chunking.py
+CHARS_PER_TOKEN = 4
+
+# Gemini's RetryInfo detail, e.g. 'retryDelay': '17s'
+_RETRY_DELAY_RE = re.compile(r"retry_?delay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", re.IGNORECASE)
+
+_priority = contextvars.ContextVar("llm_priority", default=DEFAULT_LLM_PRIORITY)
+
+
+@contextlib.contextmanager
+def priority_lane(name):
+    """Sends the LLM requests made inside the block (and by tasks it starts) in lane `name`."""
+    if name not in PRIORITIES:
+        raise ValueError(f"LLM priority must be one of {tuple(PRIORITIES)}, got '{name}'.")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_rate_limits(spec):
+    """Parses "model=rpm/tpm,..." into {model: (rpm, tpm)}, ignoring malformed entries."""
+    limits = {}
+    for item in spec.split(","):
+        name, _, values = item.partition("=")
+        rpm, _, tpm = values.partition("/")
+        try:
+            limits[name.strip()] = (float(rpm), float(tpm))
+        except ValueError:
+            continue
+    return limits
+
+
+def is_rate_limit_error(error) -> bool:
+    """True for a 429 / RESOURCE_EXHAUSTED error from google-genai, litellm, requests or httpx."""
+    for attr in ("code", "status_code", "status"):
+        if getattr(error, attr, None) in (429, "429", "RESOURCE_EXHAUSTED"):
+            return True
+    if getattr(getattr(error, "response", None), "status_code", None) == 429:
+        return True
+    return "RESOURCE_EXHAUSTED" in str(error)
+
+
+def retry_after_seconds(error):
+    """The delay a rate-limit error asks for (Retry-After header or Gemini RetryInfo), or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        pass
+    match = _RETRY_DELAY_RE.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class TokenBucket:
+    """
+    Paces units to at most `limit` per `window_seconds` (0 means
+    unlimited): a burst of `burst_share` of the limit can go at once, and
+    the rest of the limit is refilled continuously over the window, so no
+    window ever sees more than `limit` (a full bucket refilling the whole
+    limit would allow twice that). `scale` slows the refill down after
+    rate-limit responses. Taking more than is left drives the level
+    negative, and later requests wait until the debt is refilled.
+    """
+
+    def __init__(self, limit, window_seconds=60.0, burst_share=DEFAULT_LLM_BURST_SHARE, clock=time.monotonic):
+        self.limit = limit
+        self.capacity = max(1.0, limit * burst_share) if limit else 0.0
+        self.base_rate = (limit - self.capacity if limit > self.capacity else limit) / window_seconds
+        self.scale = 1.0
+        self.level = self.capacity
+        self._updated = clock()
+
+    @property
+    def rate(self):
+        """Units refilled per second."""
+        return self.base_rate * self.scale
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount, now) -> float:
+        """Seconds until `amount` units are available (an oversized amount waits for a full bucket)."""
+        if not self.limit:
+            return 0.0
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount, now):
+        if self.limit:
+            self._refill(now)
+            self.level -= amount
+
+    def drain(self, now):
+        """Empties the bucket, so requests resume at the refill rate instead of in a burst."""
+        if self.limit:
+            self._refill(now)
+            self.level = min(self.level, 0.0)
+
+
+class _Waiter:
+    __slots__ = ("tokens", "lane", "wake", "granted", "enqueued")
+
+    def __init__(self, tokens, lane, wake, enqueued):
+        self.tokens = tokens
+        self.lane = lane
+        self.wake = wake
+        self.granted = False
+        self.enqueued = enqueued
+
+
+class RateLimiter:
+    """
+    Process-wide request scheduler for one model.
+
+    Every request waits for one unit of the requests-per-minute bucket and
+    its estimated tokens from the tokens-per-minute bucket. Waiting
+    requests form one queue ordered by lane, then arrival: an interactive
+    request is always granted before any waiting batch request, and
+    requests within a lane go first-come, first-served. Threads (`acquire`)
+    and asyncio tasks (`acquire_async`) share the queue; whichever waiter
+    wakes first grants every request that has become eligible.
+
+    A rate-limit response pauses the whole queue for the delay the server
+    asked for (or an exponential backoff), halves the refill rates and
+    empties the request bucket, so one 429 slows every caller down once
+    instead of each of them retrying on its own. Successes restore the
+    rates step by step.
+    """
+
+    def __init__(self, model="", rpm=DEFAULT_LLM_RPM, tpm=DEFAULT_LLM_TPM, max_retries=DEFAULT_LLM_MAX_RETRIES,
+                 backoff_seconds=DEFAULT_LLM_BACKOFF_SECONDS, window_seconds=60.0, clock=time.monotonic):
+        self.model = model
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        # `rpm` and `tpm` are allowances per `window_seconds` (a minute, unless a test shortens it)
+        self.requests = TokenBucket(rpm, window_seconds, clock=clock)
+        self.tokens = TokenBucket(tpm, window_seconds, clock=clock)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._queue = []  # (priority, sequence, waiter)
+        self._sequence = itertools.count()
+        self._pause_until = 0.0
+        self._consecutive = 0
+        self.stats = {"requests": 0, "rate_limited": 0, "retries": 0}
+        self.waited = {lane: 0.0 for lane in PRIORITIES}
+
+    def summary(self):
+        waited = ", ".join(f"{seconds:.1f}s {lane}" for lane, seconds in self.waited.items())
+        return (f"rate limiter {self.model}: {self.stats['requests']} requests, {self.stats['rate_limited']} "
+                f"rate-limited ({self.stats['retries']} retried), waited {waited}")
+
+    # --- Scheduling ---
+    def _enqueue(self, tokens, priority, wake):
+        lane = priority or _priority.get()
+        if lane not in PRIORITIES:
+            raise ValueError(f"LLM priority must be one of {tuple(PRIORITIES)}, got '{lane}'.")
+        waiter = _Waiter(max(0, int(tokens)), lane, wake, self._clock())
+        with self._lock:
+            heapq.heappush(self._queue, (PRIORITIES[lane], next(self._sequence), waiter))
+        return waiter
+
+    def _dispatch_locked(self):
+        """Grants every request at the head of the queue that fits; returns the wait for the next one."""
+        while self._queue:
+            now = self._clock()
+            waiter = self._queue[0][2]
+            delay = max(self._pause_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(waiter.tokens, now))
+            if delay > 0:
+                return delay
+            heapq.heappop(self._queue)
+            self.requests.take(1, now)
+            self.tokens.take(waiter.tokens, now)
+            self.stats["requests"] += 1
+            self.waited[waiter.lane] += now - waiter.enqueued
+            waiter.granted = True
+            waiter.wake()
+        return None
+
+    def _poll(self, waiter):
+        """Returns None once `waiter` is granted, else the seconds to sleep before polling again."""
+        with self._lock:
+            delay = self._dispatch_locked()
+            return None if waiter.granted else delay
+
+    def _cancel(self, waiter):
+        with self._lock:
+            if not waiter.granted:
+                self._queue = [item for item in self._queue if item[2] is not waiter]
+                heapq.heapify(self._queue)
+
+    def acquire(self, tokens=0, priority=None):
+        """Blocks the calling thread until a request of `tokens` (estimated) may be sent."""
+        event = threading.Event()
+        waiter = self._enqueue(tokens, priority, event.set)
+        try:
+            while (delay := self._poll(waiter)) is not None:
+                event.wait(delay)
+                event.clear()
+        except BaseException:
+            self._cancel(waiter)
+            raise
+
+    async def acquire_async(self, tokens=0, priority=None):
+        """Waits, without blocking the event loop, until a request of `tokens` (estimated) may be sent."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = self._enqueue(tokens, priority, lambda: loop.call_soon_threadsafe(event.set))
+        try:
+            while (delay := self._poll(waiter)) is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+        except BaseException:
+            self._cancel(waiter)
+            raise
+
+    def settle(self, tokens):
+        """Charges `tokens` more (or, if negative, refunds them) once a request's real usage is known."""
+        with self._lock:
+            self.tokens.take(tokens, self._clock())
+
+    # --- Adaptive backoff ---
+    def on_rate_limited(self, error=None, retry=True) -> float:
+        """
+        Pauses the queue after a rate-limit response and lowers the rates.
+        Responses arriving while already paused (from requests sent before
+        the pause) extend the pause but do not lower the rates again.
+        Returns the seconds until requests resume.
+        """
+        with self._lock:
+            now = self._clock()
+            self.stats["rate_limited"] += 1
+            self.stats["retries"] += int(retry)
+            if now >= self._pause_until:
+                self._consecutive += 1
+                for bucket in (self.requests, self.tokens):
+                    bucket.scale = max(MIN_RATE_SCALE, bucket.scale / 2)
+                    bucket.drain(now)
+            delay = retry_after_seconds(error) if error is not None else None
+            if delay is None:
+                delay = min(MAX_BACKOFF_SECONDS, self.backoff_seconds * 2 ** (self._consecutive - 1))
+                delay *= random.uniform(1.0, 1.25)  # jitter: paused callers do not all resume at once
+            self._pause_until = max(self._pause_until, now + delay)
+            return self._pause_until - now
+
+    def on_success(self):
+        with self._lock:
+            self._consecutive = 0
+            for bucket in (self.requests, self.tokens):
+                bucket.scale = min(1.0, bucket.scale + RECOVERY_STEP)
+
+    def call(self, send, tokens=0, priority=None):
+        """
+        Calls `send()` once the limits allow, and again after each
+        rate-limit error it raises, up to `max_retries` times.
+        """
+        for attempt in itertools.count():
+            self.acquire(tokens, priority)
+            try:
+                result = send()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self.on_rate_limited(e, retry=attempt < self.max_retries)
+                if attempt >= self.max_retries:
+                    raise
+                continue
+            self.on_success()
+            return result
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """
+    Returns the process-wide rate limiter of `model` ("gemini/gemini-2.5-flash"
+    and "gemini-2.5-flash" share one), limited by LLM_RATE_LIMITS or else
+    LLM_RPM / LLM_TPM.
+    """
+    name = model.rsplit("/", 1)[-1]
+    with _limiters_lock:
+        if name not in _limiters:
+            rpm, tpm = parse_rate_limits(DEFAULT_LLM_RATE_LIMITS).get(name, (DEFAULT_LLM_RPM, DEFAULT_LLM_TPM))
+            _limiters[name] = RateLimiter(name, rpm, tpm)
+        return _limiters[name]
+
+
+def rate_limiters():
+    """Every rate limiter created so far."""
+    with _limiters_lock:
+        return list(_limiters.values())
+
+
+# --- ADK model wrapper ---
+def request_tokens(llm_request: LlmRequest) -> int:
+    """Estimated input tokens of a request: its system instruction and text parts."""
+    config = llm_request.config
+    chars = len(str(config.system_instruction or "")) if config else 0
+    for content in llm_request.contents:
+        chars += sum(len(part.text or "") for part in content.parts or [])
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class RateLimitedLlm(BaseLlm):
+    """
+    Sends every request of `delegate` through the model's process-wide
+    RateLimiter, in the caller's priority lane. A rate-limit error raised
+    before the first response is retried after the limiter's pause; the
+    estimated input tokens are corrected with the usage the response reports.
+    """
+
+    delegate: BaseLlm
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r".*"]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        limiter = get_rate_limiter(self.model)
+        charged = request_tokens(llm_request)
+        for attempt in itertools.count():
+            await limiter.acquire_async(charged)
+            responded = False
+            try:
+                async for llm_response in self.delegate.generate_content_async(llm_request, stream=stream):
+                    responded = True
+                    usage = llm_response.usage_metadata
+                    if usage and usage.total_token_count and not llm_response.partial:
+                        limiter.settle(usage.total_token_count - charged)
+                        charged = usage.total_token_count
+                    yield llm_response
+            except Exception as e:
+                if responded or not is_rate_limit_error(e):
+                    raise
+                pause = limiter.on_rate_limited(e, retry=attempt < limiter.max_retries)
+                if attempt >= limiter.max_retries:
+                    raise
+                logging.warning(f"{self.model} rate-limited; retrying in {pause:.1f}s (attempt {attempt + 1})")
+                continue
+            limiter.on_success()
+            return
@@ -0,0 +1,229 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import AsyncGenerator, Optional, Union
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import PrivateAttr
+
+# --- Defaults (overridable through the environment) ---
+# LLM_MODE: "live" calls Gemini, "record" calls it and appends every
+# completion to the cassette, "replay" answers from the cassette offline.
+DEFAULT_LLM_MODE = os.getenv("LLM_MODE", "live")
+DEFAULT_CASSETTE = os.getenv("LLM_CASSETTE", "llm_cassette.jsonl")
+# Seconds of synthetic latency per replayed call, or "recorded" to sleep for
+# the duration measured at record time (scaled by LLM_LATENCY_SCALE)
+DEFAULT_LATENCY = os.getenv("LLM_LATENCY", "recorded")
+DEFAULT_LATENCY_SCALE = float(os.getenv("LLM_LATENCY_SCALE", "1.0"))
+# Characters per partial response when a replay is streamed (StreamingMode.SSE)
+DEFAULT_STREAM_CHUNK_CHARS = int(os.getenv("LLM_STREAM_CHUNK_CHARS", "64"))
+
+LLM_MODES = ("live", "record", "replay")
+
+# ADK labels requests with the calling agent, and names it in the system instruction
+_AGENT_NAME_LABEL = "adk_agent_name"
+_AGENT_NAME_RE = re.compile(r'Your internal name is "([^"]+)"')
+
+
+def _lane_for(llm_request: LlmRequest) -> str:
+    """Calls are grouped into lanes by agent name (replay falls back to a lane's entries in order)."""
+    config = llm_request.config
+    labels = (config.labels if config else None) or {}
+    if labels.get(_AGENT_NAME_LABEL):
+        return labels[_AGENT_NAME_LABEL]
+    match = _AGENT_NAME_RE.search(str(config.system_instruction if config else "") or "")
+    return match.group(1) if match else "default"
+
+
+def _strip_ids(value):
+    """Function call IDs are random per run; drop them so prompts hash the same."""
+    if isinstance(value, dict):
+        return {k: _strip_ids(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, list):
+        return [_strip_ids(v) for v in value]
+    return value
+
+
+def _request_key(lane: str, llm_request: LlmRequest) -> str:
+    config = llm_request.config
+    payload = {
+        "lane": lane,
+        "system": str(config.system_instruction if config else "") or "",
+        "contents": _strip_ids([c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents]),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    JSONL file of recorded completions, one entry per line:
+        {"lane": ..., "key": ..., "responses": [<LlmResponse>...], "duration": ...}
+    Hand-written entries may give plain text as "response" instead.
+
+    Lookups match on `key` (a hash of the lane, system instruction and
+    contents) first. On a miss the lane's entries are replayed in recorded
+    order, cycling, so small prompt drift never breaks a replay.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._by_lane = {}
+        self._cursors = {}
+        self.stats = {"calls": 0, "hits": 0, "fallbacks": 0, "llm_seconds": 0.0}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    def _index(self, entry):
+        if entry.get("key"):
+            self._by_key[entry["key"]] = entry
+        self._by_lane.setdefault(entry.get("lane", "default"), []).append(entry)
+
+    def lookup(self, lane, key):
+        with self._lock:
+            self.stats["calls"] += 1
+            entry = self._by_key.get(key)
+            if entry is not None:
+                self.stats["hits"] += 1
+                return entry
+            entries = self._by_lane.get(lane) or self._by_lane.get("default")
+            if not entries:
+                raise KeyError(f"No recorded completion for lane '{lane}' in {self.path}")
+            cursor = self._cursors.get(lane, 0)
+            self._cursors[lane] = cursor + 1
+            self.stats["fallbacks"] += 1
+            return entries[cursor % len(entries)]
+
+    def record(self, entry):
+        with self._lock:
+            self._index(entry)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def add_llm_time(self, seconds):
+        with self._lock:
+            self.stats["llm_seconds"] += seconds
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"calls": 0, "hits": 0, "fallbacks": 0, "llm_seconds": 0.0}
+            self._cursors.clear()
+
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path=DEFAULT_CASSETTE) -> Cassette:
+    """Returns the process-wide cassette for a path (all models share one file)."""
+    path = os.path.abspath(path)
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+def _entry_responses(entry):
+    if "responses" in entry:
+        return [LlmResponse.model_validate(r) for r in entry["responses"]]
+    return [LlmResponse(content=types.Content(role="model", parts=[types.Part(text=entry["response"])]))]
+
+
+def _text_of(llm_response):
+    parts = llm_response.content.parts if llm_response.content else None
+    if not parts or any(not part.text for part in parts):
+        return None  # tool calls are replayed whole
+    return "".join(part.text for part in parts)
+
+
+async def _stream_responses(responses, delay, chunk_chars):
+    """
+    Replays text responses as partial chunks spread over `delay`, each
+    followed by the full (non-partial) response, like a streamed Gemini call.
+    """
+    texts = [_text_of(r) for r in responses]
+    chunks = sum(max(1, -(-len(t) // chunk_chars)) for t in texts if t) or 1
+    for llm_response, text in zip(responses, texts):
+        if text:
+            for i in range(0, len(text), chunk_chars):
+                await asyncio.sleep(delay / chunks)
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text[i:i + chunk_chars])]), partial=True)
+        elif not any(texts):
+            await asyncio.sleep(delay)
+        yield llm_response
+
+
+class ReplayLlm(BaseLlm):
+    """
+    Offline stand-in for the Gemini model.
+
+    In "replay" mode every request is answered from the cassette after a
+    synthetic delay (streamed in chunks when the runner asks for SSE
+    streaming). In "record" mode requests go to `delegate` and its
+    (non-partial) responses, tool calls included, are appended to the
+    cassette.
+    """
+
+    cassette_path: str = DEFAULT_CASSETTE
+    mode: str = "replay"
+    delegate: Optional[BaseLlm] = None
+    latency: Union[str, float] = DEFAULT_LATENCY
+    latency_scale: float = DEFAULT_LATENCY_SCALE
+    stream_chunk_chars: int = DEFAULT_STREAM_CHUNK_CHARS
+
+    _cassette: Cassette = PrivateAttr()
+
+    def model_post_init(self, __context):
+        super().model_post_init(__context)
+        if self.mode == "record" and self.delegate is None:
+            raise ValueError("ReplayLlm in record mode needs a delegate model.")
+        self._cassette = get_cassette(self.cassette_path)
+
+    @property
+    def cassette(self) -> Cassette:
+        return self._cassette
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r".*"]
+
+    def _delay(self, entry) -> float:
+        if self.latency == "recorded":
+            return float(entry.get("duration", 0.0)) * self.latency_scale
+        return float(self.latency)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        lane = _lane_for(llm_request)
+        key = _request_key(lane, llm_request)
+        start = time.perf_counter()
+
+        if self.mode == "record":
+            recorded = []
+            async for llm_response in self.delegate.generate_content_async(llm_request, stream=stream):
+                if not llm_response.partial:
+                    recorded.append(llm_response.model_dump(mode="json", exclude_none=True))
+                yield llm_response
+            duration = time.perf_counter() - start
+            self._cassette.record({"lane": lane, "key": key, "responses": recorded, "duration": round(duration, 3)})
+        else:
+            entry = self._cassette.lookup(lane, key)
+            if stream:
+                async for llm_response in _stream_responses(_entry_responses(entry), self._delay(entry), self.stream_chunk_chars):
+                    yield llm_response
+            else:
+                await asyncio.sleep(self._delay(entry))
+                for llm_response in _entry_responses(entry):
+                    yield llm_response
+
+        self._cassette.add_llm_time(time.perf_counter() - start)
@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+
+from google.genai import types
+
+from adk_quiz_generator.agents import CONTENT_BRIEF_KEY, prompts
+from adk_quiz_generator.config.models import get_gemini_model
+from adk_quiz_generator.metrics import _add_callback
+from adk_quiz_generator.tools.chunking import estimate_tokens
+
+# --- Defaults (overridable through the environment) ---
+# "explicit" registers the shared prefix as a Gemini cached content that
+# later requests reference by name, "implicit" only reorders requests so
+# they start with the same prefix (Gemini's automatic prefix caching),
+# "off" sends every request as the agent built it. Explicit caches hold
+# each agent's instruction and tools too, so they only pay off when the
+# same agent sees the same brief again within the TTL; "implicit" is the
+# default.
+DEFAULT_CONTEXT_CACHE = os.getenv("CONTEXT_CACHE", "implicit")
+DEFAULT_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "600"))
+# Gemini refuses to create caches below a minimum size (1024 tokens for
+# Flash); smaller prefixes fall back to "implicit"
+DEFAULT_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+CONTEXT_CACHE_MODES = ("explicit", "implicit", "off")
+
+# Agent whose output is the brief; its events are replaced by the cached copy
+BRIEF_AUTHOR = "ContentAcquisitionAgent"
+# Caches expiring sooner than this are recreated instead of referenced
+_EXPIRY_MARGIN_SECONDS = 30
+
+
+def _genai_client(model):
+    """The google.genai client behind a live (or recording) Gemini model, or None in replay."""
+    while getattr(model, "delegate", None) is not None:
+        model = model.delegate
+    try:
+        from google.adk.models import Gemini
+    except ImportError:
+        return None
+    return model.api_client if isinstance(model, Gemini) else None
+
+
+def _without_brief_author(contents, author):
+    """
+    Drops the parts ADK forwards from `author`'s turn ("[author] said: ...",
+    its tool calls and results): the brief they carry is in the shared prefix.
+    """
+    marker = f"[{author}]"
+    kept = []
+    for content in contents:
+        parts = content.parts or []
+        if content.role == "user" and parts and parts[0].text == "For context:":
+            parts = [p for p in parts if not (p.text or "").startswith(marker)]
+            if len(parts) == 1:
+                continue
+            content = content.model_copy(update={"parts": parts})
+        kept.append(content)
+    return kept
+
+
+class ContextCache:
+    """
+    Sends the content brief once per run instead of once per agent.
+
+    Every agent after content acquisition keeps its own system instruction
+    and gets the brief (led by CONTENT_BRIEF_PREAMBLE from prompts.py) as
+    its first message, ahead of the rest of its request. In "explicit"
+    mode that prefix is created once as a Gemini cached content and
+    requests reference it by name instead of uploading it. Gemini refuses
+    a system instruction or tools next to a cached content, so they are
+    stored in the cache too: there is one cache per agent instruction,
+    brief and tool set, shared by concurrent runs with the same brief.
+    Otherwise the prefix is left for Gemini's implicit prefix caching.
+
+    Prefixes not used for `ttl_seconds` are forgotten (their caches have
+    expired by then), so a long-running process does not accumulate one
+    entry per brief it has ever seen.
+
+    `stats` keeps a local account of the savings: "tokens_saved" is the
+    estimated prefix tokens not re-sent (explicit) or eligible for the
+    cached rate (implicit) by requests reusing a prefix seen before,
+    "tokens_uploaded" what creating the explicit caches cost, and
+    "cached_tokens" what the API reported as read from cache.
+    """
+
+    def __init__(self, mode=DEFAULT_CONTEXT_CACHE, ttl_seconds=DEFAULT_CONTEXT_CACHE_TTL_SECONDS,
+                 min_tokens=DEFAULT_CONTEXT_CACHE_MIN_TOKENS):
+        if mode not in CONTEXT_CACHE_MODES:
+            raise ValueError(f"CONTEXT_CACHE must be one of {CONTEXT_CACHE_MODES}, got '{mode}'.")
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self._caches = {}      # prefix key -> (cache name, expire time)
+        self._last_used = {}   # prefix key -> time it was last sent
+        self._locks = {}       # prefix key -> lock serializing its cache creation
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"requests": 0, "caches_created": 0, "tokens_uploaded": 0,
+                          "tokens_saved": 0, "cached_tokens": 0}
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self.stats[name] += amount
+
+    def _touch(self, key):
+        """Records a use of prefix `key`; True if it was used before within the TTL."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            reused = key in self._last_used
+            self._last_used[key] = now
+        return reused
+
+    def _expire(self, now):
+        """Forgets the prefixes not used for `ttl_seconds`, unless a cache is being created for them."""
+        for key, last_used in list(self._last_used.items()):
+            lock = self._locks.get(key)
+            if now - last_used > self.ttl_seconds and not (lock and lock.locked()):
+                del self._last_used[key]
+                self._caches.pop(key, None)
+                self._locks.pop(key, None)
+
+    def summary(self):
+        s = self.stats
+        return (f"context cache ({self.mode}): {s['requests']} requests on a shared prefix, "
+                f"{s['caches_created']} caches created ({s['tokens_uploaded']} tokens uploaded), "
+                f"~{s['tokens_saved'] - s['tokens_uploaded']} input tokens saved net, "
+                f"{s['cached_tokens']} reported cached")
+
+    # --- ADK agent callbacks ---
+    def instrument(self, agent):
+        """Adds the prefix callbacks to every LLM agent that reads the brief; instrumenting twice is a no-op."""
+        if self.mode != "off" and hasattr(agent, "before_model_callback") and agent.name != BRIEF_AUTHOR:
+            _add_callback(agent, "before_model_callback", self._before_model)
+            _add_callback(agent, "after_model_callback", self._after_model)
+        for sub_agent in agent.sub_agents:
+            self.instrument(sub_agent)
+        return agent
+
+    async def _before_model(self, callback_context, llm_request):
+        brief = callback_context.state.get(CONTENT_BRIEF_KEY)
+        if not brief or not isinstance(brief, str):
+            return None
+        config = llm_request.config = llm_request.config or types.GenerateContentConfig()
+        if config.cached_content:
+            return None
+
+        own_instruction = config.system_instruction
+        brief_text = f"{prompts.CONTENT_BRIEF_PREAMBLE.strip()}\n\nContent brief:\n{brief}"
+        brief_content = types.Content(role="user", parts=[types.Part(text=brief_text)])
+        rest = _without_brief_author(llm_request.contents, BRIEF_AUTHOR)
+
+        prefix_tokens = estimate_tokens(str(own_instruction or "")) + estimate_tokens(brief_text)
+        tools = [tool.model_dump(mode="json", exclude_none=True) for tool in config.tools or []]
+        key = hashlib.sha256(json.dumps(
+            [llm_request.model, own_instruction, brief_text, tools], sort_keys=True, default=str
+        ).encode("utf-8")).hexdigest()
+
+        client = _genai_client(get_gemini_model())
+        if self.mode == "explicit" and client is not None and prefix_tokens >= self.min_tokens:
+            name, reused = await self._cached_content(client, key, llm_request, brief_content, prefix_tokens)
+            if name:
+                config.cached_content = name
+                config.system_instruction = None
+                config.tools = None
+                config.tool_config = None
+                llm_request.contents = rest
+                # The call that created the cache uploaded the prefix; only reuses save it
+                self._count(requests=1, tokens_saved=prefix_tokens if reused else 0)
+                return None
+
+        # Implicit caching: the same prefix first, so Gemini can reuse it between runs
+        llm_request.contents = [brief_content] + rest
+        reused = self._touch(key)
+        self._count(requests=1, tokens_saved=prefix_tokens if reused else 0)
+        return None
+
+    async def _cached_content(self, client, key, llm_request, brief_content, prefix_tokens):
+        """
+        Returns (name, reused): the cached content for `key` and whether it
+        already existed; it is created on first use ((None, False) on failure).
+        """
+        self._touch(key)
+        with self._lock:
+            lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            name, expire_time = self._caches.get(key, (None, 0.0))
+            if name and expire_time - time.time() > _EXPIRY_MARGIN_SECONDS:
+                return name, True
+            config = llm_request.config
+            try:
+                cached = await client.aio.caches.create(
+                    model=llm_request.model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=config.system_instruction,
+                        contents=[brief_content],
+                        tools=config.tools,
+                        tool_config=config.tool_config,
+                        ttl=f"{self.ttl_seconds}s",
+                        display_name=f"quiz-brief-{key[:12]}",
+                    ),
+                )
+            except Exception as e:
+                logging.warning(f"Could not create context cache, sending the brief inline: {e}")
+                return None, False
+            with self._lock:
+                self._caches[key] = (cached.name, time.time() + self.ttl_seconds)
+            usage = cached.usage_metadata
+            uploaded = (usage.total_token_count if usage else None) or prefix_tokens
+            self._count(caches_created=1, tokens_uploaded=uploaded)
+            logging.info(f"Context cache {cached.name} created ({uploaded} tokens, ttl {self.ttl_seconds}s).")
+            return cached.name, False
+
+    def _after_model(self, callback_context, llm_response):
+        usage = llm_response.usage_metadata
+        if usage and usage.cached_content_token_count and not llm_response.partial:
+            self._count(cached_tokens=usage.cached_content_token_count)
+
+
+_context_cache = None
+_context_cache_lock = threading.Lock()
+
+
+def get_context_cache() -> ContextCache:
+    """Returns the process-wide context cache (mode from CONTEXT_CACHE)."""
+    global _context_cache
+    with _context_cache_lock:
+        if _context_cache is None:
+            _context_cache = ContextCache()
+        return _context_cache
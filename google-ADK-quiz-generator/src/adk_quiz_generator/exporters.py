@@ -0,0 +1,235 @@
+import os
+import re
+import json
+import html
+import xml.etree.ElementTree as ET
+
+from adk_quiz_generator.output_store import AtomicFile
+
+# --- Defaults (overridable through the environment) ---
+# Formats written for every successful run (comma-separated names from EXPORTERS)
+DEFAULT_EXPORT_FORMATS = os.getenv("EXPORT_FORMATS", "json,docx")
+
+# name -> (file extension, binary, write(quiz, f) function)
+EXPORTERS = {}
+
+
+def register_exporter(name, extension, binary=False):
+    """
+    Decorator adding a `write(quiz, f)` function to EXPORTERS under `name`.
+    The function receives a quiz_model.Quiz and an open file, text or (with
+    `binary`) bytes, and writes one document to it.
+    """
+    def decorator(write):
+        EXPORTERS[name] = (extension, binary, write)
+        return write
+    return decorator
+
+
+def parse_formats(formats=None):
+    """
+    Turns "json,docx" (or a list) into a list of exporter names.
+
+    Raises:
+        ValueError: if a name is not registered.
+    """
+    if formats is None:
+        formats = DEFAULT_EXPORT_FORMATS
+    if isinstance(formats, str):
+        formats = formats.split(",")
+    names = list(dict.fromkeys(name.strip().lower() for name in formats if name.strip()))
+    unknown = [name for name in names if name not in EXPORTERS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s) {unknown}; choose from {sorted(EXPORTERS)}.")
+    return names
+
+
+def export_paths(base_path, formats=None):
+    """Maps each format to '<base_path><extension>', e.g. 'quiz_output' -> 'quiz_output.md'."""
+    return {name: base_path + EXPORTERS[name][0] for name in parse_formats(formats)}
+
+
+def export_quiz(quiz, paths, opener=AtomicFile):
+    """
+    Writes `quiz` once per entry of `paths` ({format: file path}), all from
+    the same in-memory model. Each file is opened with `opener(path, mode)`
+    (an AtomicFile by default; pass `OutputStore.opener` for batched fsync
+    and compression), so a failed export never leaves a partial file. One
+    failing format does not stop the others.
+
+    Returns:
+        (written, errors): {format: path} of the files written and
+        {format: error message} of the ones that failed.
+    """
+    written, errors = {}, {}
+    for name, path in paths.items():
+        _, binary, write = EXPORTERS[name]
+        try:
+            atomic = opener(path, "wb" if binary else "w")
+            with atomic as f:
+                write(quiz, f)
+            written[name] = atomic.path
+        except Exception as e:
+            errors[name] = f"Error writing {name} to '{path}': {e}"
+    return written, errors
+
+
+# --- 1. JSON and JSON Lines ---
+@register_exporter("json", ".json")
+def write_json(quiz, f):
+    json.dump(quiz.to_dict(), f, indent=2)
+
+
+def question_records(quiz):
+    """One flat dict per question: source URL, section, 1-based number and the question's fields."""
+    for number, q in enumerate(quiz.questions(), start=1):
+        yield {"source_url": quiz.source_url, "section": q.section, "number": number, **q.to_dict()}
+
+
+def write_jsonl_records(quizzes, f):
+    """Appends one JSON line per question of every quiz in `quizzes` to the open text file `f`."""
+    count = 0
+    for quiz in quizzes:
+        for record in question_records(quiz):
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+@register_exporter("jsonl", ".jsonl")
+def write_jsonl(quiz, f):
+    write_jsonl_records([quiz], f)
+
+
+# --- 2. Markdown and HTML ---
+# Only http(s) URLs become links; anything else (javascript:, data:, ...) is rendered as text
+_LINK_RE = re.compile(r"^https?://[^\s<>\"']+$", re.IGNORECASE)
+# Inline Markdown/HTML metacharacters, backslash-escaped in generated text
+_MARKDOWN_SPECIAL_RE = re.compile(r"([\\`*_\[\]<>#|~&])")
+
+
+def _tf_label(answer):
+    return "True" if answer else "False"
+
+
+def _is_link(url):
+    return bool(_LINK_RE.match(url.strip()))
+
+
+def _md(text):
+    """`text` with Markdown/HTML metacharacters escaped, so it renders as written."""
+    return _MARKDOWN_SPECIAL_RE.sub(r"\\\1", str(text))
+
+
+def _md_link(url):
+    """An autolink for an http(s) URL, escaped text for anything else."""
+    return f"<{url.strip()}>" if _is_link(url) else _md(url)
+
+
+def _html_link(url):
+    """An <a> element for an http(s) URL, escaped text for anything else."""
+    text = html.escape(url.strip())
+    return f'<a href="{text}">{text}</a>' if _is_link(url) else text
+
+
+@register_exporter("markdown", ".md")
+def write_markdown(quiz, f):
+    lines = ["# Generated Quiz", ""]
+    if quiz.source_url:
+        lines += [f"Source: {_md_link(quiz.source_url)}", ""]
+    for number, q in enumerate(quiz.questions(), start=1):
+        lines.append(f"{number}. {_md(q.question)}")
+        if q.section == "multiple_choice":
+            for letter, text in q.options.items():
+                option = f"{_md(letter)}. {_md(text)}"
+                lines.append(f"    - **{option}**" if letter == q.answer else f"    - {option}")
+        else:
+            lines.append(f"    - Answer: **{_tf_label(q.answer)}**")
+        lines.append("")
+    if quiz.validation_notes:
+        lines += ["## Validation Notes", "", _md(quiz.validation_notes), ""]
+    if quiz.fact_checking_sources:
+        lines += ["## Fact-Checking Sources", ""] + [f"- {_md_link(source)}" for source in quiz.fact_checking_sources] + [""]
+    f.write("\n".join(lines))
+
+
+@register_exporter("html", ".html")
+def write_html(quiz, f):
+    e = html.escape
+    parts = ['<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="utf-8"><title>Generated Quiz</title></head>',
+             "<body>\n<h1>Generated Quiz</h1>"]
+    if quiz.source_url:
+        parts.append(f"<p>Source: {_html_link(quiz.source_url)}</p>")
+    parts.append("<ol>")
+    for q in quiz.questions():
+        parts.append(f"<li><p>{e(q.question)}</p>")
+        if q.section == "multiple_choice":
+            parts.append('<ol type="A">')
+            for letter, text in q.options.items():
+                parts.append(f"<li><strong>{e(text)}</strong></li>" if letter == q.answer else f"<li>{e(text)}</li>")
+            parts.append("</ol>")
+        else:
+            parts.append(f"<p>Answer: <strong>{_tf_label(q.answer)}</strong></p>")
+        parts.append("</li>")
+    parts.append("</ol>")
+    if quiz.validation_notes:
+        notes = e(quiz.validation_notes).replace("\n", "<br>\n")
+        parts.append(f"<h2>Validation Notes</h2>\n<p>{notes}</p>")
+    if quiz.fact_checking_sources:
+        parts.append("<h2>Fact-Checking Sources</h2>\n<ul>")
+        parts += [f"<li>{_html_link(source)}</li>" for source in quiz.fact_checking_sources]
+        parts.append("</ul>")
+    parts.append("</body>\n</html>\n")
+    f.write("\n".join(parts))
+
+
+# --- 3. QTI 1.2 (LMS import) ---
+def _qti_item(parent, ident, question_type, question, choices, correct):
+    """One single-answer choice item; `choices` is [(label ident, text)], `correct` a label ident."""
+    item = ET.SubElement(parent, "item", ident=ident, title=question[:80])
+    metadata = ET.SubElement(ET.SubElement(item, "itemmetadata"), "qtimetadata")
+    field = ET.SubElement(metadata, "qtimetadatafield")
+    ET.SubElement(field, "fieldlabel").text = "question_type"
+    ET.SubElement(field, "fieldentry").text = question_type
+
+    presentation = ET.SubElement(item, "presentation")
+    ET.SubElement(ET.SubElement(presentation, "material"), "mattext", texttype="text/plain").text = question
+    response = ET.SubElement(presentation, "response_lid", ident="response1", rcardinality="Single")
+    render = ET.SubElement(response, "render_choice")
+    for label, text in choices:
+        choice = ET.SubElement(render, "response_label", ident=label)
+        ET.SubElement(ET.SubElement(choice, "material"), "mattext", texttype="text/plain").text = text
+
+    processing = ET.SubElement(item, "resprocessing")
+    ET.SubElement(ET.SubElement(processing, "outcomes"), "decvar", maxvalue="100", minvalue="0",
+                  varname="SCORE", vartype="Decimal")
+    condition = ET.SubElement(processing, "respcondition", attrib={"continue": "No"})
+    ET.SubElement(ET.SubElement(condition, "conditionvar"), "varequal", respident="response1").text = correct
+    ET.SubElement(condition, "setvar", action="Set", varname="SCORE").text = "100"
+
+
+@register_exporter("qti", ".qti.xml", binary=True)
+def write_qti(quiz, f):
+    root = ET.Element("questestinterop", xmlns="http://www.imsglobal.org/xsd/ims_qtiasiv1p2")
+    section = ET.SubElement(ET.SubElement(root, "assessment", ident="quiz", title="Generated Quiz"),
+                            "section", ident="root_section")
+    for number, q in enumerate(quiz.questions(), start=1):
+        if q.section == "multiple_choice":
+            _qti_item(section, f"q{number}", "multiple_choice_question", q.question, list(q.options.items()), q.answer)
+        else:
+            _qti_item(section, f"q{number}", "true_false_question", q.question, [("true", "True"), ("false", "False")],
+                      "true" if q.answer else "false")
+    ET.indent(root)
+    ET.ElementTree(root).write(f, encoding="utf-8", xml_declaration=True)
+
+
+# --- 4. Word ---
+@register_exporter("docx", ".docx", binary=True)
+def write_docx(quiz, f):
+    # Imported here: the tools package loads google.adk
+    from adk_quiz_generator.tools.docx_writer import get_docx_template
+    from adk_quiz_generator.tools.word_tools import quiz_paragraphs
+
+    template = get_docx_template()
+    template.write_to(f, quiz_paragraphs(template, quiz.to_dict()))
@@ -0,0 +1,185 @@
+import os
+import queue
+import atexit
+import logging
+import itertools
+import threading
+import logging.handlers
+
+# --- Defaults (overridable through the environment) ---
+DEFAULT_LOG_FILE = os.getenv("LOG_FILE", "quiz_generator.log")
+# Size-based rotation: rotate at LOG_MAX_BYTES, keep LOG_BACKUP_COUNT old files
+DEFAULT_LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+DEFAULT_LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# Time-based rotation instead, e.g. "midnight" or "H" (see TimedRotatingFileHandler)
+DEFAULT_LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "")
+# Records waiting for the writer thread; when full, new records are dropped, not waited on
+DEFAULT_LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of DEBUG records kept per logger (prefix match), "name=rate,..."
+DEFAULT_LOG_SAMPLE_RATES = os.getenv(
+    "LOG_SAMPLE_RATES", "httpcore=0,httpx=0.1,urllib3=0.1,google_genai=0.1,google.auth=0.1"
+)
+
+
+# --- 1. Filters ---
+class AgentLogFilter(logging.Filter):
+    def filter(self, record):
+        return record.getMessage().startswith('[AGENT]')
+
+
+def parse_sample_rates(spec):
+    """Parses "name=rate,..." into {logger name: rate}, ignoring malformed entries."""
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.partition("=")
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every 1/rate DEBUG records from each sampled logger (and
+    its children); INFO and above always pass. Counting instead of drawing
+    random numbers keeps the kept records evenly spread and the check cheap.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self._counters = {name: itertools.count() for name in rates}
+        self._resolved = {}  # logger name -> sampled prefix or None
+
+    def _prefix(self, name):
+        if name not in self._resolved:
+            matches = [p for p in self.rates if name == p or name.startswith(p + ".")]
+            self._resolved[name] = max(matches, key=len) if matches else None
+        return self._resolved[name]
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        prefix = self._prefix(record.name)
+        if prefix is None:
+            return True
+        rate = self.rates[prefix]
+        if rate <= 0:
+            return False
+        return next(self._counters[prefix]) % round(1 / rate) == 0
+
+
+# --- 2. Queue handler ---
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller: when the writer thread falls
+    behind and the queue is full, the record is dropped and counted, and
+    the count is reported with the next record that gets through.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.dropped_total = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # Merge args into the message (they may be mutated after the call
+        # returns) but skip the base class's format-and-copy: formatting
+        # happens once, on the writer thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self.dropped_total += 1
+            return
+        if self.dropped:
+            with self._lock:
+                dropped, self.dropped = self.dropped, 0
+            warning = logging.LogRecord("adk_quiz_generator.logging", logging.WARNING, __file__, 0,
+                                        f"Log queue full: dropped {dropped} records", None, None)
+            try:
+                self.queue.put_nowait(warning)
+            except queue.Full:
+                pass
+
+
+def _file_handler(path, max_bytes, backup_count, rotate_when):
+    if rotate_when:
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=rotate_when, backupCount=backup_count, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        path, mode="a", maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+
+
+# --- 3. Setup ---
+_listener = None
+
+
+def configure_logging(log_file=DEFAULT_LOG_FILE, max_bytes=DEFAULT_LOG_MAX_BYTES,
+                      backup_count=DEFAULT_LOG_BACKUP_COUNT, rotate_when=DEFAULT_LOG_ROTATE_WHEN,
+                      queue_size=DEFAULT_LOG_QUEUE_SIZE, sample_rates=DEFAULT_LOG_SAMPLE_RATES):
+    """
+    Routes the root logger through a queue to a background writer thread
+    that owns the (rotating) DEBUG log file and the [AGENT] console output,
+    so logging calls on the event loop only enqueue a record. Calling it
+    again is a no-op.
+
+    Returns:
+        The running QueueListener; it is stopped (and the queue drained) at exit.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_formatter = logging.Formatter(
+        "%(asctime)s [%(levelname)-5.5s] [%(name)-12.12s]  %(message)s"
+    )
+
+    # File handler
+    file_handler = _file_handler(log_file, max_bytes, backup_count, rotate_when)
+    file_handler.setFormatter(log_formatter)
+    file_handler.setLevel(logging.DEBUG)
+
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(log_formatter)
+    console_handler.setLevel(logging.INFO)
+    console_handler.addFilter(AgentLogFilter())
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(sample_rates)))
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.DEBUG)
+    root_logger.addHandler(queue_handler)
+
+    logging.getLogger('google.adk').setLevel(logging.INFO)
+    logging.getLogger('hpack').setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flushes queued records to the handlers and stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
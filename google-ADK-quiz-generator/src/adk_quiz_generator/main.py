@@ -1,97 +1,49 @@
 import os
+import sys
 import json
+import hashlib
+import contextlib
+import argparse
 import uuid
 import asyncio
 import re
 import time
 import logging
+from collections import deque
 from dotenv import load_dotenv
 
-# --- ADK imports ---
-from google.adk.sessions import InMemorySessionService
-from google.adk.runners import Runner
-from google.genai import types
-import google.generativeai as genai
-
-# --- Prometheus Imports ---
-try:
-    from prometheus_client import CollectorRegistry, Counter, Gauge, push_to_gateway
-    PROMETHEUS_ENABLED = True
-except ImportError:
-    print("[WARNING] prometheus_client not installed. Metrics will not be pushed.")
-    PROMETHEUS_ENABLED = False
+# --- Load environment variables (before any module reads its defaults) ---
+load_dotenv()
 
 # --- Local imports ---
-from adk_quiz_generator.agents import quiz_orchestrator
-from adk_quiz_generator.tools.file_tools import file_writer_tool
-from adk_quiz_generator.tools.word_tools import word_writer_tool
-
-# --- Load environment variables ---
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("❌ GOOGLE_API_KEY not found in .env file.")
-genai.configure(api_key=api_key)
-
-# --- 1. CONFIGURE LOGGING ---
-class AgentLogFilter(logging.Filter):
-    def filter(self, record):
-        return record.getMessage().startswith('[AGENT]')
-
-log_formatter = logging.Formatter(
-    "%(asctime)s [%(levelname)-5.5s] [%(name)-12.12s]  %(message)s"
-)
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.DEBUG)
-
-# File handler
-file_handler = logging.FileHandler("quiz_generator.log", mode="a", encoding="utf-8")
-file_handler.setFormatter(log_formatter)
-file_handler.setLevel(logging.DEBUG)
-root_logger.addHandler(file_handler)
-
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(log_formatter)
-console_handler.setLevel(logging.INFO)
-console_handler.addFilter(AgentLogFilter())
-root_logger.addHandler(console_handler)
-
-logging.getLogger('google.adk').setLevel(logging.INFO)
-logging.getLogger('hpack').setLevel(logging.WARNING)
-
-# --- Prometheus Metrics Definitions ---
-if PROMETHEUS_ENABLED:
-    registry = CollectorRegistry()
-    quiz_runs_total = Counter(
-        "quiz_generator_runs_total",
-        "Total number of quiz generation runs",
-        ["status"],
-        registry=registry
-    )
-    quiz_last_run_duration = Gauge(
-        "quiz_generator_last_run_duration_seconds",
-        "Duration of the last quiz generation run in seconds",
-        registry=registry
-    )
-    quiz_questions_generated = Gauge(
-        "quiz_generator_questions_generated_total",
-        "Total number of questions in the last generated quiz",
-        registry=registry
-    )
+# Only light modules are imported here; google.adk, google.genai, the agents,
+# the model and the tools are imported on first use, so `--help` and other
+# commands that never run a pipeline start quickly.
+from adk_quiz_generator.exporters import DEFAULT_EXPORT_FORMATS, export_paths, export_quiz, parse_formats, write_jsonl_records
+from adk_quiz_generator.logging_setup import configure_logging
+from adk_quiz_generator.metrics import DEFAULT_METRICS_PORT, get_metrics
+from adk_quiz_generator.output_store import DEFAULT_OUTPUT_ROOT, AtomicFile, OutputStore
+from adk_quiz_generator.postprocess import QuestionStreamParser, postprocess_quiz
+from adk_quiz_generator.quiz_model import Quiz
+from adk_quiz_generator.tracing import DEFAULT_RING_EVENTS, get_tracer
+
+APP_NAME = "quiz_generator_terminal"
+# Agents whose streamed output is scanned for questions, and the stage their questions are tagged with
+QUESTION_AGENTS = {"MCQGenerationAgent": "draft", "TFGenerationAgent": "draft", "ValidatorAgent": "validated"}
 
 # --- Helper function: Create session ---
-async def create_session(runner):
+async def create_session(runner, state=None):
     logging.info("Creating new user session...")
     user_id = str(uuid.uuid4())
     new_session = await runner.session_service.create_session(
         user_id=user_id,
-        app_name=runner.app_name
+        app_name=runner.app_name,
+        state=state
     )
     logging.info(f"Session created with ID: {new_session.id}")
     return new_session, user_id
 
-# --- Robust extraction of final JSON ---
+# --- Extraction of the final agent output (parsed by postprocess_quiz) ---
 def extract_final_json(event):
     if not event.content or not event.content.parts:
         return ""
@@ -103,151 +55,594 @@ def extract_final_json(event):
 
     for part in event.content.parts:
         if hasattr(part, "text") and part.text:
-            text = part.text.strip()
-            text = re.sub(r"^```json\s*", "", text)
-            text = re.sub(r"```$", "", text)
-            return text.strip()
+            return part.text
 
     return ""
 
-def main():
-    logging.info("--- Quiz Generator Process Started ---")
-    if PROMETHEUS_ENABLED:
-        start_time = time.time()
-    
+# --- Early question delivery from streamed agent output ---
+def question_id(section, question):
+    """Stable id of a question: a hash of its section and whitespace- and case-normalized text."""
+    text = " ".join(str(question.get("question", "")).lower().split())
+    return hashlib.sha1(f"{section}:{text}".encode("utf-8")).hexdigest()[:12]
+
+class QuestionEventStream:
+    """
+    Feeds the streamed text of each question-producing agent into its own
+    QuestionStreamParser and calls `on_question` for every question as soon
+    as its closing brace arrives.
+
+    Each event carries its "stage": "draft" for the generators' questions,
+    which the validator may still fix or drop, and "validated" for the
+    validator's final ones. Its "id" is derived from the section and the
+    question text. A validated question with the id of a draft supersedes
+    that draft. Repeats of an id within a stage are not sent again.
+    """
+
+    def __init__(self, on_question, start_time):
+        self.on_question = on_question
+        self.start_time = start_time
+        self.first_question_seconds = None
+        self._parsers = {}
+        self._streamed = set()
+        self._sent = set()  # (stage, id) of every question sent
+
+    def consume(self, event):
+        author = getattr(event, "author", None)
+        if author not in QUESTION_AGENTS or not event.content or not event.content.parts:
+            return
+        if event.partial:
+            self._streamed.add(author)
+        elif author in self._streamed:
+            return  # the aggregated final event repeats text that was already streamed
+
+        text = "".join(part.text for part in event.content.parts if part.text)
+        parser = self._parsers.setdefault(author, QuestionStreamParser())
+        stage = QUESTION_AGENTS[author]
+        for section, question in parser.feed(text):
+            qid = question_id(section, question)
+            if (stage, qid) in self._sent:
+                continue
+            self._sent.add((stage, qid))
+            elapsed = time.time() - self.start_time
+            if self.first_question_seconds is None:
+                self.first_question_seconds = elapsed
+                logging.info(f"First question from {author} after {elapsed:.2f}s")
+            self.on_question({"id": qid, "stage": stage, "agent": author, "section": section, "question": question,
+                              "elapsed": elapsed})
+
+# --- Helper function: Prompt wording for one URL or a multi-URL topic ---
+def describe_source(url):
+    """
+    `url` is one URL, or several separated by whitespace for a topic quiz
+    built from one merged brief of all of them.
+    """
+    urls = url.split()
+    if len(urls) > 1:
+        return f"one quiz for the topic covered by these URLs: {' '.join(urls)}"
+    return f"a quiz for the URL: {url}"
+
+# --- Helper function: Per-URL output paths for batch runs ---
+def output_paths_for(url, output_dir):
+    """
+    Builds a unique output directory for a URL so concurrent batch runs
+    never write to the same 'quiz_output.json' / 'quiz_output.docx'.
+    """
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", re.sub(r"^https?://", "", url)).strip("-")[:80]
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:8]
+    run_dir = os.path.join(output_dir, f"{slug or 'quiz'}-{digest}")
+    os.makedirs(run_dir, exist_ok=True)
+    return (
+        os.path.join(run_dir, "quiz_output.json"),
+        os.path.join(run_dir, "quiz_output.docx"),
+    )
+
+# --- Core: Run the orchestrator for a single URL ---
+async def generate_quiz(runner, url, use_cache, output_file_json, output_file_docx, session=None, on_question=None,
+                        formats=None, store=None):
+    """
+    Runs one 'quiz_orchestrator' session for a URL on a shared Runner and
+    writes its outputs: on success, every export format in `formats`
+    (default EXPORT_FORMATS; the "json" and "docx" ones go to
+    `output_file_json` / `output_file_docx`, the others next to the JSON
+    file), on failure a JSON file with the error and recent events. Every
+    file is replaced atomically; pass the run's OutputStore as `store` to
+    fsync in batches and apply its compression.
+
+    Pass an existing `session` to resume it; the runner's orchestrator is then
+    expected to contain only the stages that have not checkpointed yet, and
+    may be None when every stage already finished.
+
+    Pass `on_question` to get each question while the agents are still
+    writing: the runner switches to SSE streaming and the callback receives
+    a dict with the question's "id", its "stage" ("draft" or "validated",
+    see QuestionEventStream), the producing "agent", the "section"
+    ("multiple_choice" or "true_false"), the normalized "question" and the
+    "elapsed" seconds.
+
+    Returns:
+        A result dict with the url, status, question count, output paths, the
+        quiz_model.Quiz (None on failure) and error (if any).
+    """
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.genai import types
+    from adk_quiz_generator.agents import VALIDATED_QUIZ_KEY
+    from adk_quiz_generator.session_store import SqliteSessionService
+    from adk_quiz_generator.tools.file_tools import file_writer_tool
+
+    start_time = time.time()
     final_quiz_json = {}
-    raw_output_for_debugging = []
+    quiz = None
+    outputs = {}
+    recent_events = deque(maxlen=DEFAULT_RING_EVENTS)  # serialized only for failure dumps
+    invocation_id = None
     run_status = "failure"  # <-- FIX: Assume failure until proven success
     question_count = 0
+    error_message = None
+    session_id = session.id if session else None
+    question_stream = QuestionEventStream(on_question, start_time) if on_question else None
 
     try:
-        # --- 1. Initialize Memory and Runner ---
-        logging.info("Initializing InMemorySessionService and Runner...")
-        memory_service = InMemorySessionService()
-        runner = Runner(
-            agent=quiz_orchestrator,
-            session_service=memory_service,
-            app_name="quiz_generator_terminal"
-        )
-
-        # --- 2. Get user inputs ---
-        url = input("Enter the URL for quiz generation: ").strip()
-        use_cache_input = input("Use cached content if available? (yes/no): ").strip().lower()
-        use_cache = use_cache_input in ["yes", "y"]
-        logging.info(f"User input received: URL={url}, UseCache={use_cache}")
-
-        # --- 3. Create session ---
-        new_session, user_id = asyncio.run(create_session(runner))
-        session_id = new_session.id
-
-        # --- 4. Build prompt ---
-        prompt_text = f"Generate a quiz for the URL: {url}. Use cache: {use_cache}"
-        user_message = types.Content(
-            role="user",
-            parts=[types.Part(text=prompt_text)]
-        )
-        logging.debug(f"Built user message: {user_message}")
-
-        logging.info("--- Starting Quiz Orchestrator ---")
-
-        # --- 5. Run the orchestrator ---
-        final_response_events_generator = runner.run(
-            new_message=user_message,
-            session_id=session_id,
-            user_id=user_id
-        )
-
-        # --- 6. Parse output ---
         final_response = ""
         last_final_event = None
 
-        logging.debug("Streaming agent events...")
-        for event in final_response_events_generator:
-            logging.debug(f"ADK_EVENT: {str(event)}")
-            raw_output_for_debugging.append(str(event))
-            author = getattr(event, "author", "UnknownAgent")
-            logging.info(f"[AGENT] {author} is producing output...")
-
-            if event.is_final_response():
-                last_final_event = event
+        if session is None:
+            # --- 1. Create session (source URL and output paths are kept in state for --resume) ---
+            state = {
+                "source_url": url,
+                "use_cache": use_cache,
+                "output_file_json": output_file_json,
+                "output_file_docx": output_file_docx,
+            }
+            if store is not None:
+                state.update(output_root=store.root, output_run_id=store.run_id)
+            session, user_id = await create_session(runner, state=state)
+            session_id = session.id
+            prompt_text = f"Generate {describe_source(url)}. Use cache: {use_cache}"
+        else:
+            user_id = session.user_id
+            prompt_text = f"Resume generating {describe_source(url)}. Use cache: {use_cache}"
+            logging.info(f"Resuming session {session_id} (checkpoints: {sorted(session.state)})")
+
+        if runner is not None:
+            # --- 2. Build prompt ---
+            user_message = types.Content(
+                role="user",
+                parts=[types.Part(text=prompt_text)]
+            )
+            logging.debug(f"Built user message: {user_message}")
+
+            logging.info(f"--- Starting Quiz Orchestrator for {url} ---")
+
+            # --- 3. Run the orchestrator ---
+            run_options = {"run_config": RunConfig(streaming_mode=StreamingMode.SSE)} if question_stream else {}
+            final_response_events_generator = runner.run_async(
+                new_message=user_message,
+                session_id=session_id,
+                user_id=user_id,
+                **run_options
+            )
+
+            # --- 4. Parse output ---
+            logging.debug("Streaming agent events...")
+            async for event in final_response_events_generator:
+                if question_stream:
+                    question_stream.consume(event)
+                if event.partial:
+                    continue  # streamed chunk; the aggregated event follows
+
+                recent_events.append(event)
+                invocation_id = event.invocation_id
+                author = getattr(event, "author", "UnknownAgent")
+                logging.info(f"[AGENT] {author} is producing output...")
+
+                if event.is_final_response():
+                    last_final_event = event
 
         if last_final_event:
             final_response = extract_final_json(last_final_event)
             logging.info("Extracted final JSON response.")
             logging.debug(f"Final JSON content: {final_response}")
+        else:
+            # Every stage was already checkpointed: reuse the stored ValidatorAgent output
+            final_response = session.state.get(VALIDATED_QUIZ_KEY, "")
 
         if not final_response:
             logging.error("No valid JSON found in final agent output.")
             raise ValueError("No valid JSON found in final agent output.")
 
-        final_quiz_json = json.loads(final_response)
-        logging.info("Successfully loaded final JSON string.")
+        # --- Repair, validate and canonicalize the quiz in-process ---
+        with get_metrics().time_stage("Postprocess"):
+            final_quiz_json, issues = postprocess_quiz(final_response)
+        for issue in issues:
+            logging.warning(f"Dropped question: {issue}")
+        logging.info("Successfully normalized final quiz JSON.")
 
-        # --- FIX: Validate JSON structure BEFORE declaring success ---
-        if not isinstance(final_quiz_json, dict):
-            logging.error(f"Final JSON is a {type(final_quiz_json)}, not a dict. Content: {final_quiz_json}")
-            raise ValueError(f"Expected final JSON to be a dictionary (dict), but got {type(final_quiz_json)} instead.")
-
-        mcq_count = len(final_quiz_json.get("multiple_choice", []))
-        tf_count = len(final_quiz_json.get("true_false", []))
-        question_count = mcq_count + tf_count
+        quiz = Quiz.from_dict(final_quiz_json, source_url=url)
+        mcq_count = len(quiz.multiple_choice)
+        tf_count = len(quiz.true_false)
+        question_count = quiz.question_count
 
         if question_count == 0:
             logging.warning("JSON was valid, but contained no questions.")
             # We'll let this count as a "success" but log the warning.
-        
+
         logging.info(f"Quiz contains {mcq_count} MCQs and {tf_count} T/F questions.")
-        
+
         # --- FIX: Move success flag to the VERY END of the 'try' block ---
         run_status = "success"
-        
+
     except Exception as e:
         # Log the full traceback to the file
-        logging.error(f"Error during agent run or parsing: {e}", exc_info=True)
-        raw_output = "\n".join(raw_output_for_debugging)
+        logging.error(f"Error during agent run or parsing for {url}: {e}", exc_info=True)
+        raw_output = "\n".join(str(event) for event in recent_events)
         final_quiz_json = {
             "error": f"Agent run failed: {e}",
             "raw_output": raw_output
         }
+        error_message = str(e)
+        if session_id and isinstance(runner.session_service if runner else None, SqliteSessionService):
+            logging.error(f"Session {session_id} is checkpointed; rerun with --resume {session_id} to continue.")
         # run_status remains "failure"
-
     finally:
-        # --- 7. Save JSON for debugging ---
-        output_file_json = "quiz_output.json"
+        # Ends the run's spans even when it failed or was cancelled before its first event
+        tracer = get_tracer()
+        if invocation_id and tracer.writer.path:
+            logging.info(f"Trace {tracer.trace_id(invocation_id)} written to '{tracer.writer.path}'.")
+        if session_id:
+            tracer.finish_session(session_id, status="ok" if run_status == "success" else "error")
+
+    if run_status == "success":
+        # --- 5. Export the quiz model in every requested format ---
+        paths = export_paths(os.path.splitext(output_file_json)[0], formats)
+        paths.update({name: path for name, path in (("json", output_file_json), ("docx", output_file_docx))
+                      if name in paths})
+        logging.info(f"Exporting quiz as {', '.join(paths)}...")
+        with get_metrics().time_stage("Export"):
+            outputs, errors = await asyncio.to_thread(
+                export_quiz, quiz, paths, store.opener if store else AtomicFile
+            )
+        for error in errors.values():
+            logging.error(error)
+        logging.info(f"Exported quiz to {', '.join(outputs.values()) or 'no files'}.")
+    else:
+        # --- 5. Save the error and recent events as JSON for debugging ---
         logging.info(f"Saving debug JSON to '{output_file_json}'...")
-        result_message_json = file_writer_tool.func(output_file_json, json.dumps(final_quiz_json, indent=2))
+        result_message_json = await asyncio.to_thread(
+            file_writer_tool.func, output_file_json, json.dumps(final_quiz_json, indent=2)
+        )
         logging.info(f"Save JSON result: {result_message_json}")
 
-        # --- 8. Generate Word document (only if successful) ---
-        # This 'if' block will now work correctly
-        if run_status == "success":
-            output_file_docx = "quiz_output.docx"
-            logging.info(f"Generating Word document at '{output_file_docx}'...")
-            quiz_json_str = json.dumps(final_quiz_json)
-            result_message_docx = word_writer_tool.func(output_file_docx, quiz_json_str)
-            logging.info(f"Generate Word result: {result_message_docx}")
-        
-        # --- 9. Push metrics to Pushgateway ---
-        if PROMETHEUS_ENABLED:
-            logging.info("Preparing to push metrics to Prometheus Pushgateway...")
+    duration = time.time() - start_time
+    get_metrics().record_run(run_status, duration, question_count)
+
+    return {
+        "url": url,
+        "status": run_status,
+        "question_count": question_count,
+        "duration": duration,
+        "output_json": outputs.get("json", output_file_json if run_status != "success" else None),
+        "output_docx": outputs.get("docx"),
+        "outputs": outputs,
+        "quiz": quiz,
+        "error": error_message,
+        "session_id": session_id,
+        "first_question_seconds": question_stream.first_question_seconds if question_stream else None,
+    }
+
+async def stream_quiz_questions(runner, url, use_cache, output_file_json, output_file_docx, formats=None, store=None):
+    """
+    Async generator over one quiz run: yields each question event (see
+    `on_question` in generate_quiz) as soon as it is parsed, then a final
+    {"result": <result dict>} item once the outputs are written.
+    """
+    queue = asyncio.Queue()
+    task = asyncio.create_task(
+        generate_quiz(runner, url, use_cache, output_file_json, output_file_docx, on_question=queue.put_nowait,
+                      formats=formats, store=store)
+    )
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    try:
+        while (item := await queue.get()) is not None:
+            yield item
+        yield {"result": await task}
+    finally:
+        if not task.done():
+            task.cancel()
+
+async def print_streamed_questions(runner, url, use_cache, output_file_json, output_file_docx, formats=None,
+                                   store=None):
+    """Prints every question as one JSON line as soon as it is parsed. Returns the run's result dict."""
+    async for item in stream_quiz_questions(runner, url, use_cache, output_file_json, output_file_docx, formats,
+                                            store):
+        if "result" in item:
+            return item["result"]
+        print(json.dumps(item), flush=True)
+
+def make_session_service(session_db=None):
+    """
+    SQLite-backed (resumable) sessions, or in-memory ones for
+    session_db=':memory:'. None selects the default 'quiz_sessions.db'.
+    """
+    from google.adk.sessions import InMemorySessionService
+    from adk_quiz_generator.session_store import DEFAULT_SESSION_DB, SqliteSessionService
+
+    session_db = session_db or DEFAULT_SESSION_DB
+    if session_db == ":memory:":
+        logging.info("Initializing InMemorySessionService...")
+        return InMemorySessionService()
+    logging.info(f"Initializing SqliteSessionService at '{session_db}'...")
+    return SqliteSessionService(session_db)
+
+def build_runner(session_service, agent=None):
+    """
+    Initializes a Runner for the orchestrator on the given session service
+    (the default, full QuizOrchestrator when `agent` is None).
+    """
+    from google.adk.runners import Runner
+    from adk_quiz_generator.agents import get_quiz_orchestrator
+    from adk_quiz_generator.context_cache import get_context_cache
+    from adk_quiz_generator.question_index import get_question_index
+
+    agent = get_context_cache().instrument(agent or get_quiz_orchestrator())
+    question_index = get_question_index()
+    if question_index:
+        agent = question_index.instrument(agent)
+    return Runner(
+        agent=get_tracer().instrument(get_metrics().instrument(agent)),
+        session_service=session_service,
+        app_name=APP_NAME
+    )
+
+def log_cache_summaries():
+    """
+    Logs the input tokens the context cache saved, the questions the
+    question index dropped and the time requests waited for the model's
+    rate limits, if a runner was built (the modules load with it).
+    """
+    context_cache = sys.modules.get("adk_quiz_generator.context_cache")
+    if context_cache:
+        logging.info(context_cache.get_context_cache().summary())
+    question_index = sys.modules.get("adk_quiz_generator.question_index")
+    if question_index and question_index.get_question_index():
+        logging.info(question_index.get_question_index().summary())
+    rate_limiter = sys.modules.get("adk_quiz_generator.config.rate_limiter")
+    for limiter in rate_limiter.rate_limiters() if rate_limiter else []:
+        logging.info(limiter.summary())
+
+def main(session_db=None, stream_questions=False, formats=None, store=None):
+    """Interactive single run; outputs go to the run directory of `store` (a new one by default)."""
+    logging.info("--- Quiz Generator Process Started ---")
+    store = store or OutputStore()
+    start_time = time.time()
+    result = {"url": None, "status": "failure", "question_count": 0}
+    metrics = get_metrics()
+    metrics.start_pusher()
+
+    try:
+        # --- 1. Initialize Memory and Runner ---
+        runner = build_runner(make_session_service(session_db))
+
+        # --- 2. Get user inputs ---
+        # Several URLs (separated by spaces) make one topic quiz
+        url = " ".join(input("Enter the URL(s) for quiz generation: ").split())
+        use_cache_input = input("Use cached content if available? (yes/no): ").strip().lower()
+        use_cache = use_cache_input in ["yes", "y"]
+        logging.info(f"User input received: URL={url}, UseCache={use_cache}")
+
+        # --- 3. Run the orchestrator and save outputs ---
+        run = print_streamed_questions if stream_questions else generate_quiz
+        result = asyncio.run(
+            run(runner, url, use_cache, store.path("quiz_output.json"), store.path("quiz_output.docx"),
+                formats=formats, store=store)
+        )
+    except Exception as e:
+        logging.error(f"Error during quiz generator setup: {e}", exc_info=True)
+        metrics.record_run("failure", time.time() - start_time, 0)
+
+    finally:
+        store.close()
+        metrics.shutdown()
+        log_cache_summaries()
+        logging.info(f"--- Quiz Generator Process Finished (Status: {result['status']}) ---")
+
+# --- Batch mode ---
+def read_manifest(manifest_path):
+    """
+    Reads a URL manifest, one URL per line. Blank lines and lines starting
+    with '#' are ignored. Use '-' to read the manifest from stdin. A line
+    with several URLs separated by spaces is one topic quiz.
+    """
+    if manifest_path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.append(" ".join(line.split()))
+    return urls
+
+async def run_batch(urls, use_cache=True, concurrency=8, output_dir=DEFAULT_OUTPUT_ROOT, session_db=None, formats=None,
+                    jsonl_file=None, store=None):
+    """
+    Runs many 'quiz_orchestrator' sessions concurrently on one Runner and
+    session service, with at most `concurrency` sessions in flight. Outputs
+    go to one directory per URL inside the run directory of `store` (a new
+    run under `output_dir` by default), and are fsynced in batches. A URL
+    listed more than once runs once, since its runs would write to the same
+    directory.
+
+    With `jsonl_file` (an open text file), every question of every
+    successful quiz is also appended to it as one JSON line, for bulk LMS
+    imports.
+
+    Returns:
+        A list of per-URL result dicts, in manifest order of first appearance.
+    """
+    from adk_quiz_generator.config.rate_limiter import priority_lane
+
+    unique_urls = list(dict.fromkeys(urls))
+    if len(unique_urls) < len(urls):
+        logging.warning(f"Skipping {len(urls) - len(unique_urls)} duplicate URL(s) in the manifest.")
+    urls = unique_urls
+
+    runner = build_runner(make_session_service(session_db))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    own_store = store is None
+    store = store or OutputStore(root=output_dir)
+
+    async def run_one(url):
+        async with semaphore:
+            output_file_json, output_file_docx = output_paths_for(url, store.run_dir)
             try:
-                end_time = time.time()
-                duration = end_time - start_time
-                quiz_last_run_duration.set(duration)
-                quiz_runs_total.labels(status=run_status).inc()
-                quiz_questions_generated.set(question_count)
+                result = await generate_quiz(runner, url, use_cache, output_file_json, output_file_docx,
+                                             formats=formats, store=store)
+            except Exception as e:
+                # generate_quiz handles agent errors; this catches I/O failures on save
+                logging.error(f"Batch item failed for {url}: {e}", exc_info=True)
+                get_metrics().record_run("failure", 0.0, 0)
+                return {"url": url, "status": "failure", "question_count": 0, "error": str(e)}
+            if jsonl_file is not None and result["quiz"] is not None:
+                write_jsonl_records([result["quiz"]], jsonl_file)
+            return result
+
+    try:
+        # Batch sessions yield the model's rate limits to interactive runs in the same process
+        with priority_lane("batch"):
+            return await asyncio.gather(*(run_one(url) for url in urls))
+    finally:
+        if own_store:
+            store.close()
+
+def print_batch_summary(results, duration):
+    succeeded = [r for r in results if r["status"] == "success"]
+    print("\n--- Batch Summary ---")
+    for r in results:
+        if r["status"] == "success":
+            outputs = r.get("outputs") or {}
+            target = f"{os.path.dirname(next(iter(outputs.values())))} ({', '.join(outputs)})" if outputs else "no files written"
+            print(f"[OK]   {r['url']} ({r['question_count']} questions) -> {target}")
+        else:
+            resume_hint = f" (resume: --resume {r['session_id']})" if r.get("session_id") else ""
+            print(f"[FAIL] {r['url']}: {r.get('error')}{resume_hint}")
+    print(f"{len(succeeded)}/{len(results)} succeeded in {duration:.2f}s")
+
+def batch_main(args):
+    urls = read_manifest(args.manifest)
+    if args.topic:
+        # One quiz from a merged brief of every page, instead of one per URL
+        urls = [" ".join(urls)]
+    logging.info(f"--- Quiz Generator Batch Started ({len(urls)} URLs, concurrency={args.concurrency}) ---")
+    start_time = time.time()
+    metrics = get_metrics()
+    metrics.start_pusher()  # pushes after every run, in the background
+
+    store = OutputStore(root=args.output_dir, run_id=args.run_id)
+    with contextlib.ExitStack() as stack:
+        # The combined JSONL file only replaces an earlier one once the batch completes
+        jsonl_file = stack.enter_context(AtomicFile(args.jsonl_out, "w")) if args.jsonl_out else None
+        results = asyncio.run(
+            run_batch(
+                urls,
+                use_cache=not args.no_cache,
+                concurrency=args.concurrency,
+                session_db=args.session_db,
+                formats=args.formats,
+                jsonl_file=jsonl_file,
+                store=store,
+            )
+        )
+    store.close()
+
+    duration = time.time() - start_time
+    print_batch_summary(results, duration)
+    metrics.shutdown()
+    log_cache_summaries()
+    logging.info(f"--- Quiz Generator Batch Finished ({duration:.2f}s) ---")
+
+    return 0 if all(r["status"] == "success" for r in results) else 1
+
+# --- Resume mode ---
+def resume_main(args):
+    """
+    Continues a checkpointed session, skipping every stage that already
+    finished. Outputs go to the paths the session was started with (for a
+    batch item, its per-URL directory in the batch's run directory), so a
+    resumed run completes the outputs the original run would have written.
+    """
+    from adk_quiz_generator.agents import build_orchestrator
+    from adk_quiz_generator.session_store import DEFAULT_SESSION_DB, SqliteSessionService
+
+    logging.info(f"--- Resuming Quiz Generator Session {args.resume} ---")
+    session_db = args.session_db or DEFAULT_SESSION_DB
+    session_service = SqliteSessionService(session_db)
+    session = asyncio.run(session_service.find_session(app_name=APP_NAME, session_id=args.resume))
+    if session is None:
+        print(f"No session '{args.resume}' found in '{session_db}'.")
+        return 1
+
+    url = session.state.get("source_url", "")
+    use_cache = session.state.get("use_cache", True)
+    remaining = build_orchestrator(session.state)
+    runner = build_runner(session_service, remaining) if remaining else None
+
+    metrics = get_metrics()
+    metrics.start_pusher()
+    if session.state.get("output_file_json"):
+        # The run directory the session started in, which joins its fsync batches and compression
+        store = OutputStore(root=session.state.get("output_root", args.output_dir),
+                            run_id=session.state.get("output_run_id") or args.run_id)
+        output_file_json, output_file_docx = session.state["output_file_json"], session.state["output_file_docx"]
+    else:
+        store = OutputStore(root=args.output_dir, run_id=args.run_id)
+        output_file_json, output_file_docx = store.path("quiz_output.json"), store.path("quiz_output.docx")
+    logging.info(f"Writing outputs to '{os.path.dirname(output_file_json)}'")
+    result = asyncio.run(
+        generate_quiz(runner, url, use_cache, output_file_json, output_file_docx,
+                      session=session, formats=args.formats, store=store)
+    )
+    store.close()
+    metrics.shutdown()
+    log_cache_summaries()
+    logging.info(f"--- Quiz Generator Resume Finished (Status: {result['status']}) ---")
+    return 0 if result["status"] == "success" else 1
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Generate fact-checked quizzes from web pages.")
+    parser.add_argument("manifest", nargs="?",
+                        help="Batch mode: file with one URL per line (several on a line make one topic quiz), or '-' for stdin.")
+    parser.add_argument("--topic", action="store_true", help="Batch mode: make one topic quiz from all URLs in the manifest.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max concurrent orchestrator sessions.")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_ROOT, help="Root directory for run outputs (<dir>/<run id>/...).")
+    parser.add_argument("--run-id", help="Name of this run's output directory (default: timestamp, pid and a random suffix).")
+    parser.add_argument("--no-cache", action="store_true", help="Always scrape fresh content.")
+    parser.add_argument("--session-db", help="SQLite session store (default: quiz_sessions.db; ':memory:' disables persistence).")
+    parser.add_argument("--resume", metavar="SESSION_ID", help="Resume a checkpointed session.")
+    parser.add_argument("--stream-questions", action="store_true", help="Print each question as a JSON line as soon as it is generated.")
+    parser.add_argument("--formats", default=DEFAULT_EXPORT_FORMATS,
+                        help="Comma-separated export formats: json, jsonl, markdown, html, qti, docx.")
+    parser.add_argument("--jsonl-out", metavar="PATH", help="Batch mode: also write every question to one JSON Lines file.")
+    parser.add_argument("--metrics-port", type=int, default=DEFAULT_METRICS_PORT, help="Serve Prometheus /metrics on this port (0 = off).")
+    args = parser.parse_args(argv)
+    try:
+        args.formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
 
-                push_to_gateway(
-                    "localhost:9091", 
-                    job="quiz_generator_batch", 
-                    registry=registry
-                )
-                logging.info(f"Metrics pushed (Duration: {duration:.2f}s, Status: {run_status}, Questions: {question_count}).")
-            except Exception as push_e:
-                logging.error(f"Could not push metrics to Pushgateway at localhost:9091. Is it running? \n{push_e}", exc_info=True)
+    configure_logging()
+    get_metrics().serve(args.metrics_port)
 
-        logging.info(f"--- Quiz Generator Process Finished (Status: {run_status}) ---")
+    if args.resume:
+        return resume_main(args)
+    if args.manifest:
+        return batch_main(args)
+    main(session_db=args.session_db, stream_questions=args.stream_questions, formats=args.formats,
+         store=OutputStore(root=args.output_dir, run_id=args.run_id))
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(cli(sys.argv[1:]))
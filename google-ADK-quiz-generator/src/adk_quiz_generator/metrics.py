@@ -0,0 +1,319 @@
+import os
+import time
+import logging
+import threading
+import contextlib
+import http.client
+from urllib.parse import urlsplit
+
+# --- Defaults (overridable through the environment) ---
+DEFAULT_PUSHGATEWAY = os.getenv("PUSHGATEWAY_URL", "localhost:9091")
+DEFAULT_PUSH_JOB = os.getenv("METRICS_PUSH_JOB", "quiz_generator_batch")
+DEFAULT_PUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_PUSH_INTERVAL_SECONDS", "15"))
+DEFAULT_PUSH_TIMEOUT_SECONDS = float(os.getenv("METRICS_PUSH_TIMEOUT_SECONDS", "2"))
+# Seconds the process waits for the final push on exit before giving up
+DEFAULT_SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("METRICS_SHUTDOWN_TIMEOUT_SECONDS", "3"))
+# Port for the pull-mode /metrics endpoint (0 = disabled)
+DEFAULT_METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+
+def _prometheus():
+    """
+    Imports prometheus_client on first use (it is not needed to parse the
+    command line). Returns None, with a warning, when it is not installed.
+    """
+    try:
+        import prometheus_client
+        return prometheus_client
+    except ImportError:
+        print("[WARNING] prometheus_client not installed. Metrics will not be pushed.")
+        return None
+
+
+# LLM stages take seconds to minutes; cache reads and searches take milliseconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+# --- 1. Pooled push transport ---
+class PooledPushHandler:
+    """
+    prometheus_client push handler that keeps one HTTP connection to the
+    Pushgateway alive between pushes instead of reconnecting every time.
+    Only used from the pusher thread.
+    """
+
+    def __init__(self):
+        self._conn = None
+        self._netloc = None
+
+    def __call__(self, url, method, timeout, headers, data):
+        def handle():
+            parts = urlsplit(url)
+            if self._conn is None or self._netloc != (parts.scheme, parts.netloc):
+                self.close()
+                conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+                self._conn = conn_cls(parts.netloc, timeout=timeout)
+                self._netloc = (parts.scheme, parts.netloc)
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            try:
+                self._conn.request(method, path, body=data, headers=dict(headers))
+                response = self._conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                self.close()  # reconnect on the next push
+                raise
+            if response.status >= 400:
+                raise OSError(f"Pushgateway returned {response.status} {response.reason}")
+        return handle
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+
+
+class MetricsPusher:
+    """
+    Pushes a registry to a Pushgateway from a single background thread,
+    every `interval` seconds and whenever `push()` is called. Callers never
+    wait on the network: a slow or unreachable gateway only delays the
+    next push, and `close()` gives up after a bounded wait.
+    """
+
+    def __init__(self, registry, gateway=DEFAULT_PUSHGATEWAY, job=DEFAULT_PUSH_JOB,
+                 interval=DEFAULT_PUSH_INTERVAL_SECONDS, timeout=DEFAULT_PUSH_TIMEOUT_SECONDS):
+        self.registry = registry
+        self.gateway = gateway
+        self.job = job
+        self.interval = interval
+        self.timeout = timeout
+        self.pushes = 0
+        self.failures = 0
+        self._handler = PooledPushHandler()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-pusher", daemon=True)
+        self._thread.start()
+
+    def push(self):
+        """Requests a push as soon as the pusher thread is free; returns immediately."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._push_once()
+            if self._stop.is_set():
+                break
+        self._handler.close()
+
+    def _push_once(self):
+        try:
+            _prometheus().push_to_gateway(self.gateway, job=self.job, registry=self.registry,
+                            timeout=self.timeout, handler=self._handler)
+            self.pushes += 1
+            logging.debug(f"Metrics pushed to {self.gateway}.")
+        except Exception as e:
+            self.failures += 1
+            logging.warning(f"Could not push metrics to Pushgateway at {self.gateway}. Is it running? {e}")
+
+    def close(self, timeout=DEFAULT_SHUTDOWN_TIMEOUT_SECONDS):
+        """Makes a final push and waits at most `timeout` seconds for it. Returns True if it finished."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+
+# --- 2. Metric families ---
+def _add_callback(agent, slot, callback):
+    """Appends to an ADK callback slot, which holds one callback or a list of them."""
+    current = getattr(agent, slot)
+    callbacks = current if isinstance(current, list) else ([current] if current else [])
+    if callback not in callbacks:
+        setattr(agent, slot, callbacks + [callback])
+
+
+class QuizMetrics:
+    """
+    Prometheus metrics for the quiz pipeline: per-stage and per-tool latency
+    histograms, LLM token counters, cache hit/miss counters and run totals.
+    Every method is a no-op when prometheus_client is not installed.
+    """
+
+    def __init__(self):
+        prometheus = _prometheus()
+        self.enabled = prometheus is not None
+        self.pusher = None
+        self._started = {}
+        self._lock = threading.Lock()
+        if not self.enabled:
+            return
+
+        self.registry = prometheus.CollectorRegistry()
+        self.runs_total = prometheus.Counter(
+            "quiz_generator_runs_total", "Total number of quiz generation runs",
+            ["status"], registry=self.registry
+        )
+        self.run_duration = prometheus.Histogram(
+            "quiz_generator_run_duration_seconds", "Duration of quiz generation runs in seconds",
+            buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.last_run_duration = prometheus.Gauge(
+            "quiz_generator_last_run_duration_seconds", "Duration of the last quiz generation run in seconds",
+            registry=self.registry
+        )
+        self.questions_generated = prometheus.Gauge(
+            "quiz_generator_questions_generated_total", "Total number of questions in the last generated quiz",
+            registry=self.registry
+        )
+        self.stage_duration = prometheus.Histogram(
+            "quiz_generator_stage_duration_seconds", "Wall time of each pipeline stage (agent or in-process step)",
+            ["stage"], buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.tool_duration = prometheus.Histogram(
+            "quiz_generator_tool_duration_seconds", "Wall time of each tool call, scrape and search",
+            ["tool"], buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.llm_tokens = prometheus.Counter(
+            "quiz_generator_llm_tokens_total", "LLM tokens used, by agent and kind (prompt/completion/cached)",
+            ["agent", "kind"], registry=self.registry
+        )
+        self.cache_requests = prometheus.Counter(
+            "quiz_generator_cache_requests_total", "Cache lookups, by cache and result (hit/miss)",
+            ["cache", "result"], registry=self.registry
+        )
+
+    # --- Recording ---
+    def observe_stage(self, stage, seconds):
+        if self.enabled:
+            self.stage_duration.labels(stage=stage).observe(seconds)
+
+    def observe_tool(self, tool, seconds):
+        if self.enabled:
+            self.tool_duration.labels(tool=tool).observe(seconds)
+
+    def count_tokens(self, agent, prompt_tokens=0, completion_tokens=0, cached_tokens=0):
+        if self.enabled:
+            if prompt_tokens:
+                self.llm_tokens.labels(agent=agent, kind="prompt").inc(prompt_tokens)
+            if completion_tokens:
+                self.llm_tokens.labels(agent=agent, kind="completion").inc(completion_tokens)
+            if cached_tokens:  # part of prompt_tokens, read from a context cache
+                self.llm_tokens.labels(agent=agent, kind="cached").inc(cached_tokens)
+
+    def count_cache(self, cache, hit):
+        if self.enabled:
+            self.cache_requests.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+    @contextlib.contextmanager
+    def time_stage(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def time_tool(self, tool):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_tool(tool, time.perf_counter() - start)
+
+    def record_run(self, status, duration, question_count):
+        """Records a finished run and requests a (non-blocking) push."""
+        if not self.enabled:
+            return
+        self.runs_total.labels(status=status).inc()
+        self.run_duration.observe(duration)
+        self.last_run_duration.set(duration)
+        self.questions_generated.set(question_count)
+        if self.pusher:
+            self.pusher.push()
+
+    # --- ADK agent callbacks ---
+    def instrument(self, agent):
+        """
+        Adds timing callbacks to `agent` and all its sub-agents: stage wall
+        time for every agent, plus tool latency and token usage for LLM
+        agents. Existing callbacks are kept; instrumenting twice is a no-op.
+        """
+        _add_callback(agent, "before_agent_callback", self._before_agent)
+        _add_callback(agent, "after_agent_callback", self._after_agent)
+        if hasattr(agent, "after_model_callback"):
+            _add_callback(agent, "after_model_callback", self._after_model)
+            _add_callback(agent, "before_tool_callback", self._before_tool)
+            _add_callback(agent, "after_tool_callback", self._after_tool)
+        for sub_agent in agent.sub_agents:
+            self.instrument(sub_agent)
+        return agent
+
+    def _start(self, key):
+        with self._lock:
+            self._started[key] = time.perf_counter()
+
+    def _elapsed(self, key):
+        with self._lock:
+            started = self._started.pop(key, None)
+        return None if started is None else time.perf_counter() - started
+
+    def _before_agent(self, callback_context):
+        self._start((callback_context.invocation_id, callback_context.agent_name))
+
+    def _after_agent(self, callback_context):
+        seconds = self._elapsed((callback_context.invocation_id, callback_context.agent_name))
+        if seconds is not None:
+            self.observe_stage(callback_context.agent_name, seconds)
+
+    def _after_model(self, callback_context, llm_response):
+        usage = llm_response.usage_metadata
+        if usage and not llm_response.partial:
+            self.count_tokens(callback_context.agent_name, usage.prompt_token_count or 0, usage.candidates_token_count or 0,
+                              usage.cached_content_token_count or 0)
+
+    def _before_tool(self, tool, args, tool_context):
+        self._start(("tool", tool_context.function_call_id))
+
+    def _after_tool(self, tool, args, tool_context, tool_response):
+        seconds = self._elapsed(("tool", tool_context.function_call_id))
+        if seconds is not None:
+            self.observe_tool(tool.name, seconds)
+
+    # --- Export ---
+    def start_pusher(self, gateway=DEFAULT_PUSHGATEWAY, job=DEFAULT_PUSH_JOB, interval=DEFAULT_PUSH_INTERVAL_SECONDS):
+        """Starts background pushes to a Pushgateway (push mode, for short-lived runs)."""
+        if self.enabled and self.pusher is None:
+            self.pusher = MetricsPusher(self.registry, gateway=gateway, job=job, interval=interval)
+        return self.pusher
+
+    def serve(self, port=DEFAULT_METRICS_PORT, addr="0.0.0.0"):
+        """Exposes /metrics on `port` for Prometheus to scrape (pull mode, for long-running workers)."""
+        if self.enabled and port:
+            _prometheus().start_http_server(port, addr=addr, registry=self.registry)
+            logging.info(f"Serving Prometheus metrics on http://{addr}:{port}/metrics")
+
+    def shutdown(self, timeout=DEFAULT_SHUTDOWN_TIMEOUT_SECONDS):
+        """Makes a final push, waiting at most `timeout` seconds so exit never stalls on the gateway."""
+        if self.pusher is None:
+            return
+        if not self.pusher.close(timeout):
+            logging.warning(f"Final metrics push did not finish within {timeout:g}s; exiting without it.")
+        else:
+            logging.info(f"Metrics pushed ({self.pusher.pushes} pushes, {self.pusher.failures} failed).")
+        self.pusher = None
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> QuizMetrics:
+    """Returns the process-wide metrics registry."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = QuizMetrics()
+        return _metrics
@@ -0,0 +1,338 @@
+import re
+import json
+import string
+
+# --- Canonical quiz schema ---
+# {
+#   "multiple_choice": [{"question": str, "options": {"A": str, ...}, "answer": "A", ...}],
+#   "true_false": [{"question": str, "answer": bool, ...}],
+#   "validation_notes": str,
+#   "fact_checking_sources": [str, ...]
+# }
+# Extra per-question keys (e.g. "explanation") are kept as they are.
+
+MCQ_KEYS = ("multiple_choice", "multiple_choice_questions", "mcq", "mcqs", "mcq_questions")
+TF_KEYS = ("true_false", "true_false_questions", "tf", "tf_questions", "truefalse")
+SOURCE_KEYS = ("fact_checking_sources", "sources")
+QUESTION_KEYS = ("question", "prompt", "text", "statement")
+ANSWER_KEYS = ("answer", "correct_answer", "correct_option", "correct")
+
+OPTION_LETTERS = string.ascii_uppercase
+_TRUE_WORDS = {"true", "t", "yes", "y", "1"}
+_FALSE_WORDS = {"false", "f", "no", "n", "0"}
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.S)
+_LETTER_PREFIX_RE = re.compile(r"^\(?([A-Za-z])[\).:]\s+")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class QuizFormatError(ValueError):
+    """Raised when model output cannot be turned into a quiz."""
+
+
+# --- 1. Tolerant JSON repair ---
+def _drop_trailing_comma(out):
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+
+
+def _repair(text):
+    """
+    Rewrites near-JSON into JSON in one pass: single-quoted strings,
+    Python literals (True/False/None), trailing commas, raw newlines in
+    strings, and brackets left open by a truncated response.
+    """
+    out = []
+    closers = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in "\"'":
+            quote, buf = ch, []
+            i += 1
+            while i < n and text[i] != quote:
+                c = text[i]
+                if c == "\\" and i + 1 < n:
+                    buf.append("'" if text[i + 1] == "'" else text[i:i + 2])
+                    i += 2
+                    continue
+                buf.append('\\"' if c == '"' else "\\n" if c == "\n" else c)
+                i += 1
+            out.append('"' + "".join(buf) + '"')
+            i += 1
+            continue
+        if ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if closers:
+                closers.pop()
+        elif ch.isalpha():
+            start = i
+            while i < n and (text[i].isalnum() or text[i] == "_"):
+                i += 1
+            word = text[start:i]
+            out.append(_PY_LITERALS.get(word, word))
+            continue
+        out.append(ch)
+        i += 1
+
+    _drop_trailing_comma(out)
+    out.extend(reversed(closers))
+    return "".join(out)
+
+
+def _candidates(text):
+    yield text
+    for match in _FENCE_RE.finditer(text):
+        yield match.group(1).strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if starts:
+        start = min(starts)
+        end = max(text.rfind("}"), text.rfind("]"))
+        yield text[start:end + 1] if end > start else text[start:]
+
+
+def repair_json(text):
+    """
+    Parses JSON out of LLM output: tolerates code fences, prose around the
+    JSON, smart quotes, single quotes, Python literals, trailing commas and
+    truncated closing brackets.
+
+    Raises:
+        QuizFormatError: if no JSON value can be recovered.
+    """
+    if not isinstance(text, str):
+        return text
+    text = text.strip().translate(_SMART_QUOTES)
+    for candidate in _candidates(text):
+        if not candidate:
+            continue
+        for attempt in (candidate, _repair(candidate)):
+            try:
+                return json.loads(attempt)
+            except ValueError:
+                continue
+    raise QuizFormatError(f"No JSON found in model output: {text[:200]!r}")
+
+
+# --- 2. Schema normalization ---
+def _first(q, keys):
+    for key in keys:
+        if key in q and q[key] not in (None, ""):
+            return key, q[key]
+    return None, None
+
+
+def _normalize_options(options):
+    if isinstance(options, dict):
+        items = list(options.items())
+        keys = [str(k).strip(" ).:").upper() for k, _ in items]
+        if all(len(k) == 1 and k in OPTION_LETTERS for k in keys) and len(set(keys)) == len(keys):
+            return {k: str(v).strip() for k, (_, v) in sorted(zip(keys, items))}
+        values = [v for _, v in items]
+    elif isinstance(options, list):
+        values = options
+    else:
+        return {}
+    values = [_LETTER_PREFIX_RE.sub("", str(v).strip()) for v in values if str(v).strip()]
+    return dict(zip(OPTION_LETTERS, values))
+
+
+def _resolve_letter(answer, options):
+    if isinstance(answer, bool):
+        return None
+    if isinstance(answer, int):
+        return OPTION_LETTERS[answer] if 0 <= answer < len(options) else None
+    text = str(answer).strip()
+    letter = text.strip(" ).:").upper()
+    if len(letter) == 1 and letter in options:
+        return letter
+    prefix = _LETTER_PREFIX_RE.match(text)
+    if prefix and prefix.group(1).upper() in options:
+        return prefix.group(1).upper()
+    folded = text.casefold()
+    for key, value in options.items():
+        if value.casefold() == folded:
+            return key
+    return None
+
+
+def _resolve_bool(answer):
+    if isinstance(answer, bool):
+        return answer
+    word = str(answer).strip().strip(".").casefold()
+    if word in _TRUE_WORDS:
+        return True
+    if word in _FALSE_WORDS:
+        return False
+    return None
+
+
+def _extras(q, used):
+    return {k: v for k, v in q.items() if k not in used and k != "options"}
+
+
+def _normalize_mcq(q):
+    q_key, question = _first(q, QUESTION_KEYS)
+    options = _normalize_options(q.get("options"))
+    a_key, answer = _first(q, ANSWER_KEYS)
+    if not question:
+        return None, "multiple-choice question without question text"
+    if len(options) < 2:
+        return None, f"multiple-choice question with fewer than two options: {question[:60]!r}"
+    letter = _resolve_letter(answer, options)
+    if letter is None:
+        return None, f"answer {answer!r} does not match an option: {question[:60]!r}"
+    return {"question": str(question).strip(), "options": options, "answer": letter, **_extras(q, {q_key, a_key})}, None
+
+
+def _normalize_tf(q):
+    q_key, question = _first(q, QUESTION_KEYS)
+    a_key, answer = _first(q, ANSWER_KEYS)
+    if not question:
+        return None, "true/false question without question text"
+    value = _resolve_bool(answer)
+    if value is None:
+        return None, f"answer {answer!r} is not true/false: {question[:60]!r}"
+    return {"question": str(question).strip(), "answer": value, **_extras(q, {q_key, a_key})}, None
+
+
+def _split_questions(data):
+    """Returns (mcq list, tf list, top-level dict) from any supported layout."""
+    if isinstance(data, list):
+        data = {"questions": data}
+    if not isinstance(data, dict):
+        raise QuizFormatError(f"Expected a JSON object or list, got {type(data).__name__}.")
+
+    mcqs, tfs = [], []
+    for key in MCQ_KEYS:
+        mcqs.extend(data.get(key) or [])
+    for key in TF_KEYS:
+        tfs.extend(data.get(key) or [])
+    for q in data.get("questions") or []:
+        (mcqs if isinstance(q, dict) and q.get("options") else tfs).append(q)
+    return mcqs, tfs, data
+
+
+def normalize_quiz(data):
+    """
+    Canonicalizes a parsed quiz: question lists under "multiple_choice" and
+    "true_false", MCQ options as an {"A": ...} dict with a letter answer,
+    T/F answers as booleans, and de-duplicated fact-checking sources.
+    Questions that fail validation are dropped.
+
+    Returns:
+        (quiz, issues): the canonical quiz dict and one message per dropped question.
+    """
+    mcqs, tfs, data = _split_questions(data)
+    quiz = {"multiple_choice": [], "true_false": []}
+    issues = []
+
+    for target, questions, normalize in (("multiple_choice", mcqs, _normalize_mcq), ("true_false", tfs, _normalize_tf)):
+        for q in questions:
+            if not isinstance(q, dict):
+                issues.append(f"skipped non-object question: {q!r:.60}")
+                continue
+            normalized, issue = normalize(q)
+            if issue:
+                issues.append(issue)
+            else:
+                quiz[target].append(normalized)
+
+    notes = data.get("validation_notes")
+    if isinstance(notes, list):
+        notes = "\n".join(str(n) for n in notes)
+    if notes:
+        quiz["validation_notes"] = str(notes).strip()
+
+    _, sources = _first(data, SOURCE_KEYS)
+    if isinstance(sources, str):
+        sources = [sources]
+    quiz["fact_checking_sources"] = list(dict.fromkeys(str(s).strip() for s in sources or [] if str(s).strip()))
+    return quiz, issues
+
+
+def postprocess_quiz(text):
+    """Repairs, validates and canonicalizes raw model output. Returns (quiz, issues)."""
+    return normalize_quiz(repair_json(text))
+
+
+# --- 3. Incremental parsing of streamed output ---
+class QuestionStreamParser:
+    """
+    Consumes model output as it streams in and returns each question as
+    soon as its closing brace arrives, instead of after the whole response.
+
+    Any JSON object that is an element of an array counts as a question, so
+    bare lists, {"multiple_choice": [...]} objects and fenced blocks all
+    work; prose outside the JSON is skipped. Questions are repaired and
+    normalized like `normalize_quiz` does; rejected ones go to `issues`.
+    """
+
+    def __init__(self):
+        self.issues = []
+        self._stack = []      # open containers, "{" or "["
+        self._quote = None    # delimiter of the string being scanned
+        self._escape = False
+        self._capture = None  # chars of the question object being read
+        self._capture_depth = 0
+
+    def feed(self, text):
+        """
+        Scans the next chunk of output.
+
+        Returns:
+            A list of (section, question) pairs completed by this chunk, where
+            section is "multiple_choice" or "true_false".
+        """
+        completed = []
+        for ch in text:
+            if self._capture is not None:
+                self._capture.append(ch)
+            if self._quote:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == self._quote:
+                    self._quote = None
+                continue
+            if not self._stack and ch not in "{[":
+                continue  # prose or code fence around the JSON
+
+            if ch in "\"'":
+                self._quote = ch
+            elif ch in "{[":
+                if ch == "{" and self._capture is None and self._stack and self._stack[-1] == "[":
+                    self._capture = ["{"]
+                    self._capture_depth = len(self._stack)
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._capture is not None and len(self._stack) == self._capture_depth:
+                    question = self._finish("".join(self._capture))
+                    self._capture = None
+                    if question:
+                        completed.append(question)
+        return completed
+
+    def _finish(self, text):
+        try:
+            q = repair_json(text)
+        except QuizFormatError as e:
+            self.issues.append(str(e))
+            return None
+        if not isinstance(q, dict):
+            return None
+        section, normalize = ("multiple_choice", _normalize_mcq) if q.get("options") else ("true_false", _normalize_tf)
+        normalized, issue = normalize(q)
+        if issue:
+            self.issues.append(issue)
+            return None
+        return section, normalized
@@ -0,0 +1,319 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from typing import NamedTuple
+
+from adk_quiz_generator.agents import MCQ_QUESTIONS_KEY, TF_QUESTIONS_KEY, VALIDATED_QUIZ_KEY
+from adk_quiz_generator.metrics import _add_callback, get_metrics
+from adk_quiz_generator.postprocess import QuestionStreamParser, postprocess_quiz
+from adk_quiz_generator.tools.brief_cache import normalize_source
+from adk_quiz_generator.tools.dedupe import shingles
+
+# --- Defaults (overridable through the environment) ---
+# SQLite file shared by every run; "" turns the index off
+DEFAULT_QUESTION_INDEX_DB = os.getenv("QUESTION_INDEX_DB", "quiz_questions.db")
+# Estimated Jaccard similarity of two questions' word pairs at which the later one is dropped
+DEFAULT_QUESTION_DUPLICATE_THRESHOLD = float(os.getenv("QUESTION_DUPLICATE_THRESHOLD", "0.5"))
+
+# MinHash signature length and LSH banding (32 bands of 4 rows): questions
+# at 0.5 similarity share a band with ~87% probability (~99% at 0.6),
+# questions sharing one word pair in ten with ~0.3%
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32
+QUESTION_SHINGLE_WORDS = 2
+# Left out before shingling, so shared stems ("which of the following") do not count
+_STOPWORDS = frozenset(
+    "a an the of to in on for by with and or is are was were be been does do did which what who whom whose "
+    "when where why how that this these those it its following statement statements true false".split()
+)
+_WORD_RE = re.compile(r"\w+")
+
+# The stage whose output is filtered, and the agent that reviews it
+GENERATOR_STAGE = "ParallelQuizGenerator"
+REVIEW_AGENT = "ValidatorAgent"
+GENERATOR_KEYS = {"MCQGenerationAgent": MCQ_QUESTIONS_KEY, "TFGenerationAgent": TF_QUESTIONS_KEY}
+# Set once a run's generated questions were filtered (the number dropped)
+QUESTION_INDEX_DROPPED_KEY = "question_index_dropped"
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x51D)  # fixed: stored signatures must stay comparable
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(MINHASH_PERMUTATIONS)
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    section TEXT NOT NULL,
+    question TEXT NOT NULL,
+    source TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    bucket INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, question_id)
+) WITHOUT ROWID;
+"""
+
+
+class Duplicate(NamedTuple):
+    """A dropped question and the stored question it repeats."""
+    section: str
+    question: dict
+    similarity: float
+    match: str
+    match_source: str
+
+
+def question_shingles(text: str) -> set:
+    """Hashed word pairs of a question, stopwords left out."""
+    words = [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+    return shingles(" ".join(words), QUESTION_SHINGLE_WORDS)
+
+
+def minhash(hashes) -> array:
+    """MinHash signature of a set of 64-bit shingle hashes (32 bits kept per slot)."""
+    return array("I", (
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS
+    ))
+
+
+def _buckets(section, signature):
+    """One LSH bucket per band: a signed 64-bit hash of the section, band number and band rows."""
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    buckets = []
+    for band in range(LSH_BANDS):
+        key = f"{section}:{band}:{signature[band * rows:(band + 1) * rows].tolist()}"
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "big", signed=True))
+    return buckets
+
+
+def _similarity(a, b):
+    """Estimated Jaccard similarity: the share of equal signature slots."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class QuestionIndex:
+    """
+    Persistent index of every question that passed review, used to drop
+    near-duplicates of them from later runs before review.
+
+    Questions are MinHashed over their word pairs and stored with one LSH
+    bucket per band, so a lookup reads LSH_BANDS index entries and compares
+    only the few questions sharing a bucket, however many are stored. A
+    question is a duplicate when its estimated similarity to one of them,
+    or to an earlier question of the same batch, reaches `threshold`.
+    Questions stored by earlier runs on the same source are ignored, so
+    regenerating a quiz for a page does not drop its own questions.
+    """
+
+    def __init__(self, db_path=DEFAULT_QUESTION_INDEX_DB, threshold=DEFAULT_QUESTION_DUPLICATE_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self.stats = {"checked": 0, "dropped": 0}
+
+    def summary(self):
+        return f"question index: {self.stats['dropped']} of {self.stats['checked']} generated questions dropped as near-duplicates"
+
+    def _find(self, section, signature, source, run_id):
+        """The best (similarity, question, source) match among the stored questions, or None."""
+        buckets = _buckets(section, signature)
+        rows = self._conn.execute(
+            "SELECT q.question, q.source, q.run_id, q.signature FROM questions q WHERE q.id IN "
+            f"(SELECT question_id FROM lsh_buckets WHERE bucket IN ({', '.join('?' * len(buckets))}))",
+            buckets,
+        ).fetchall()
+        best = None
+        for question, match_source, match_run, blob in rows:
+            if match_source == source and match_run != run_id:
+                continue
+            similarity = _similarity(signature, array("I", blob))
+            if similarity >= self.threshold and (best is None or similarity > best[0]):
+                best = (similarity, question, match_source)
+        return best
+
+    def filter_questions(self, questions, source="", run_id=""):
+        """
+        Drops the questions of `questions` that repeat a stored question or
+        an earlier question of the batch. Nothing is stored: only the
+        questions that pass review are, through `add_questions`.
+
+        Args:
+            questions: (section, question dict) pairs, section being
+                "multiple_choice" or "true_false".
+            source: The URL(s) the questions were generated from.
+            run_id: Identifies the run, so its questions are not compared
+                with those of earlier runs on the same source.
+
+        Returns:
+            (kept, duplicates): the kept (section, question) pairs, in input
+            order, and a Duplicate for every dropped question.
+        """
+        source = normalize_source(source) if source else ""
+        kept, duplicates = [], []
+        batch = []  # (section, signature, question text) of the kept questions
+        with self._lock:
+            for section, question in questions:
+                hashes = question_shingles(str(question.get("question", "")))
+                if not hashes:
+                    kept.append((section, question))
+                    continue
+                signature = minhash(hashes)
+                best = self._find(section, signature, source, run_id)
+                for batch_section, batch_signature, batch_question in batch:
+                    similarity = _similarity(signature, batch_signature) if batch_section == section else 0.0
+                    if similarity >= self.threshold and (best is None or similarity > best[0]):
+                        best = (similarity, batch_question, "")
+                if best:
+                    duplicates.append(Duplicate(section, question, *best))
+                    continue
+                batch.append((section, signature, str(question["question"])))
+                kept.append((section, question))
+            self.stats["checked"] += len(kept) + len(duplicates)
+            self.stats["dropped"] += len(duplicates)
+
+        metrics = get_metrics()
+        for _ in kept:
+            metrics.count_cache("question_index", False)
+        for duplicate in duplicates:
+            metrics.count_cache("question_index", True)
+            logging.info(f"Dropped near-duplicate {duplicate.section} question ({duplicate.similarity:.2f} similar to "
+                         f"{duplicate.match[:60]!r} from {duplicate.match_source or 'this run'}): "
+                         f"{duplicate.question['question'][:60]!r}")
+        return kept, duplicates
+
+    def add_questions(self, questions, source="", run_id=""):
+        """
+        Stores reviewed questions, so later runs drop their near-duplicates.
+        Questions that would be dropped as near-duplicates themselves (of
+        this run's or another source's stored questions) are skipped.
+
+        Args:
+            questions: (section, question dict) pairs, as for filter_questions.
+            source: The URL(s) the questions were generated from.
+            run_id: Identifies the run the questions belong to.
+
+        Returns:
+            The number of questions stored.
+        """
+        source = normalize_source(source) if source else ""
+        added = 0
+        with self._lock:
+            for section, question in questions:
+                text = str(question.get("question", ""))
+                hashes = question_shingles(text)
+                if not hashes:
+                    continue
+                signature = minhash(hashes)
+                if self._find(section, signature, source, run_id):
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT INTO questions (section, question, source, run_id, signature, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (section, text, source, run_id, signature.tobytes(), time.time()),
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO lsh_buckets (bucket, question_id) VALUES (?, ?)",
+                    [(bucket, cursor.lastrowid) for bucket in _buckets(section, signature)],
+                )
+                added += 1
+            self._conn.commit()
+        return added
+
+    # --- ADK agent callbacks ---
+    def instrument(self, agent):
+        """
+        Filters the generators' questions once the ParallelQuizGenerator
+        stage finishes, shows the validator only the kept ones, and stores
+        the questions the validator approves. Instrumenting twice is a no-op.
+        """
+        if agent.name == GENERATOR_STAGE:
+            _add_callback(agent, "after_agent_callback", self._after_generators)
+        if agent.name == REVIEW_AGENT:
+            _add_callback(agent, "before_model_callback", self._before_review)
+            _add_callback(agent, "after_agent_callback", self._after_review)
+        for sub_agent in agent.sub_agents:
+            self.instrument(sub_agent)
+        return agent
+
+    async def _after_generators(self, callback_context):
+        state = callback_context.state
+        if state.get(QUESTION_INDEX_DROPPED_KEY) is not None:
+            return None
+        generated = {}
+        for author, key in GENERATOR_KEYS.items():
+            if isinstance(state.get(key), str):
+                generated[key] = QuestionStreamParser().feed(state[key])
+
+        dropped = 0
+        for key, questions in generated.items():
+            kept, duplicates = await asyncio.to_thread(
+                self.filter_questions, questions, state.get("source_url", ""), callback_context.invocation_id
+            )
+            if duplicates:
+                state[key] = json.dumps([question for _, question in kept], indent=2)
+                dropped += len(duplicates)
+        state[QUESTION_INDEX_DROPPED_KEY] = dropped
+        return None
+
+    async def _after_review(self, callback_context):
+        """Stores the validated quiz's questions, so later runs on other pages drop their near-duplicates."""
+        state = callback_context.state
+        if not isinstance(state.get(VALIDATED_QUIZ_KEY), str):
+            return None
+        quiz, _ = postprocess_quiz(state[VALIDATED_QUIZ_KEY])
+        questions = [(section, question) for section in ("multiple_choice", "true_false") for question in quiz[section]]
+        await asyncio.to_thread(self.add_questions, questions, state.get("source_url", ""), callback_context.invocation_id)
+        return None
+
+    def _before_review(self, callback_context, llm_request):
+        """Replaces the generators' forwarded output with the filtered questions in session state."""
+        state = callback_context.state
+        if not state.get(QUESTION_INDEX_DROPPED_KEY):
+            return None
+        prefixes = {f"[{author}] said: ": key for author, key in GENERATOR_KEYS.items()}
+        contents = []
+        for content in llm_request.contents:
+            parts = content.parts or []
+            if content.role == "user" and parts and parts[0].text == "For context:":
+                rewritten = []
+                for part in parts:
+                    prefix = next((p for p in prefixes if (part.text or "").startswith(p)), None)
+                    if prefix is None:
+                        rewritten.append(part)
+                    elif not any((p.text or "").startswith(prefix) for p in rewritten):
+                        # An agent's output may arrive in several parts; the filtered copy replaces them all
+                        rewritten.append(part.model_copy(update={"text": prefix + str(state.get(prefixes[prefix], ""))}))
+                content = content.model_copy(update={"parts": rewritten})
+            contents.append(content)
+        llm_request.contents = contents
+        return None
+
+
+_question_index = None
+_question_index_lock = threading.Lock()
+
+
+def get_question_index():
+    """Returns the process-wide question index at QUESTION_INDEX_DB, or None if it is turned off."""
+    global _question_index
+    with _question_index_lock:
+        if _question_index is None and DEFAULT_QUESTION_INDEX_DB:
+            _question_index = QuestionIndex()
+        return _question_index
@@ -0,0 +1,188 @@
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+DEFAULT_SESSION_DB = "quiz_sessions.db"
+
+# Session state under this prefix only lives for one invocation (ADK convention)
+_TEMP_PREFIX = "temp:"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    last_update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    session_id TEXT NOT NULL,
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (session_id, seq);
+"""
+
+
+class SqliteSessionService(BaseSessionService):
+    """
+    Session service that persists sessions, state and events to a local
+    SQLite file, so a crashed run can be resumed from the last checkpoint.
+
+    Every non-partial event is committed as it is appended, together with
+    the session state it produced (minus 'temp:' keys). Agents that set an
+    `output_key` therefore checkpoint their output the moment they finish.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_SESSION_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # --- SQLite access (run off the event loop) ---
+    def _execute(self, sql, params=(), fetch=False):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            rows = cursor.fetchall() if fetch else None
+            self._conn.commit()
+            return rows
+
+    async def _run(self, sql, params=(), fetch=False):
+        return await asyncio.to_thread(self._execute, sql, params, fetch)
+
+    @staticmethod
+    def _persistent_state(state):
+        return {k: v for k, v in state.items() if not k.startswith(_TEMP_PREFIX)}
+
+    # --- BaseSessionService API ---
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = Session(
+            id=session_id or str(uuid.uuid4()),
+            app_name=app_name,
+            user_id=user_id,
+            state=dict(state or {}),
+            last_update_time=time.time(),
+        )
+        await self._run(
+            "INSERT INTO sessions (app_name, user_id, id, state, last_update_time) VALUES (?, ?, ?, ?, ?)",
+            (app_name, user_id, session.id, json.dumps(self._persistent_state(session.state)), session.last_update_time),
+        )
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        rows = await self._run(
+            "SELECT state, last_update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+            (app_name, user_id, session_id),
+            fetch=True,
+        )
+        if not rows:
+            return None
+        state, last_update_time = rows[0]
+
+        sql = "SELECT event FROM events WHERE session_id = ?"
+        params = [session_id]
+        if config and config.after_timestamp:
+            sql += " AND timestamp >= ?"
+            params.append(config.after_timestamp)
+        sql += " ORDER BY seq"
+        events = [Event.model_validate_json(row[0]) for row in await self._run(sql, tuple(params), fetch=True)]
+        if config and config.num_recent_events is not None:
+            events = events[-config.num_recent_events:] if config.num_recent_events else []
+
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=json.loads(state),
+            events=events,
+            last_update_time=last_update_time,
+        )
+
+    async def find_session(self, *, app_name: str, session_id: str) -> Optional[Session]:
+        """Looks a session up by ID alone (used by --resume, which has no user ID)."""
+        rows = await self._run(
+            "SELECT user_id FROM sessions WHERE app_name = ? AND id = ?",
+            (app_name, session_id),
+            fetch=True,
+        )
+        if not rows:
+            return None
+        return await self.get_session(app_name=app_name, user_id=rows[0][0], session_id=session_id)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        if user_id is None:
+            rows = await self._run(
+                "SELECT user_id, id, state, last_update_time FROM sessions WHERE app_name = ?",
+                (app_name,), fetch=True,
+            )
+        else:
+            rows = await self._run(
+                "SELECT user_id, id, state, last_update_time FROM sessions WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id), fetch=True,
+            )
+        return ListSessionsResponse(sessions=[
+            Session(id=sid, app_name=app_name, user_id=uid, state=json.loads(state), last_update_time=updated)
+            for uid, sid, state, updated in rows
+        ])
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self._run("DELETE FROM events WHERE session_id = ?", (session_id,))
+        await self._run(
+            "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+            (app_name, user_id, session_id),
+        )
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session, event)
+        if event.partial:
+            return event
+
+        session.last_update_time = event.timestamp
+        await asyncio.to_thread(self._checkpoint, session, event)
+        return event
+
+    def _checkpoint(self, session, event):
+        """Writes the event and the resulting session state in one transaction."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO events (session_id, timestamp, event) VALUES (?, ?, ?)",
+                    (session.id, event.timestamp, event.model_dump_json(exclude_none=True)),
+                )
+                self._conn.execute(
+                    "UPDATE sessions SET state = ?, last_update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (
+                        json.dumps(self._persistent_state(session.state)),
+                        session.last_update_time,
+                        session.app_name,
+                        session.user_id,
+                        session.id,
+                    ),
+                )
@@ -0,0 +1,179 @@
+import re
+import asyncio
+import logging
+
+import requests
+from google.adk.models.llm_request import LlmRequest
+from google.adk.tools import FunctionTool
+from google.genai import types
+
+from ..config.models import get_gemini_model
+from ..metrics import get_metrics
+from .chunking import DEFAULT_CHUNK_TOKENS, chunk_blocks, estimate_tokens, truncate_to_budget
+from .dedupe import BlockDeduper
+from .http_fetch import fetch_url, fetch_urls
+from .web_scraper import extract_blocks
+
+# Max chunk summaries in flight at once
+MAX_PARALLEL_SUMMARIES = 4
+# Merge rounds before partial summaries that still do not fit are truncated
+MAX_REDUCE_ROUNDS = 4
+
+
+async def _generate(system_instruction: str, text: str) -> str:
+    """Runs one bounded single-turn request through the shared Gemini model."""
+    gemini_model = get_gemini_model()
+    llm_request = LlmRequest(
+        model=gemini_model.model,
+        contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+        config=types.GenerateContentConfig(system_instruction=system_instruction),
+    )
+    parts = []
+    async for llm_response in gemini_model.generate_content_async(llm_request):
+        if llm_response.content and llm_response.content.parts:
+            parts.extend(p.text for p in llm_response.content.parts if p.text)
+    return "".join(parts).strip()
+
+
+async def map_reduce_summarize(blocks, chunk_tokens=DEFAULT_CHUNK_TOKENS, max_parallel=MAX_PARALLEL_SUMMARIES) -> str:
+    """
+    Summarizes arbitrarily long source text without any single request
+    exceeding `chunk_tokens` of input.
+
+    Map: blocks are packed into token-bounded chunks and each chunk is
+    summarized in parallel. Reduce: the partial summaries are merged into
+    one content brief, re-chunking and merging again while they still do
+    not fit in a single request. If a round stops shrinking them (or after
+    MAX_REDUCE_ROUNDS), the partials are truncated to the budget before the
+    final request.
+    """
+    # Imported here: the agents package imports this tool module
+    from ..agents import prompts
+
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def run(system_instruction, text):
+        async with semaphore:
+            return await _generate(system_instruction, text)
+
+    chunks = chunk_blocks(blocks, chunk_tokens)
+    partials = await asyncio.gather(
+        *(run(prompts.CHUNK_SUMMARY_INSTRUCTION, chunk) for chunk in chunks)
+    )
+
+    total = estimate_tokens("\n\n".join(partials))
+    for _ in range(MAX_REDUCE_ROUNDS):
+        if total <= chunk_tokens:
+            break
+        # Oversized partials are split by chunk_blocks and condensed on their own
+        groups = chunk_blocks(partials, chunk_tokens, separator="\n\n")
+        merged = await asyncio.gather(
+            *(run(prompts.CHUNK_SUMMARY_INSTRUCTION, group) for group in groups)
+        )
+        merged_total = estimate_tokens("\n\n".join(merged))
+        if merged_total >= total:
+            break
+        partials, total = merged, merged_total
+
+    if total > chunk_tokens:
+        logging.warning(f"Partial summaries still total ~{total} tokens; truncating them to {chunk_tokens}.")
+        partials = truncate_to_budget(partials, chunk_tokens, separator="\n\n")
+    return await run(prompts.BRIEF_REDUCE_INSTRUCTION, "\n\n".join(partials))
+
+
+async def build_content_brief(url: str) -> str:
+    """
+    Scrapes the full page at a URL and condenses it into a content brief.
+    Short pages are returned as cleaned text; long pages are split into
+    token-bounded chunks that are summarized in parallel and merged, so
+    nothing is silently cut off.
+
+    Args:
+        url: The URL to build the content brief from.
+
+    Returns:
+        The page text or merged content brief, or an error message.
+    """
+    try:
+        with get_metrics().time_tool("scraper"):
+            response = await asyncio.to_thread(fetch_url, url, 10)
+            blocks = extract_blocks(response.text, max_blocks=None)
+    except requests.RequestException as e:
+        return f"Error: Could not retrieve URL. {e}"
+
+    if not blocks:
+        return "Error: No meaningful content found at the URL."
+
+    page_text = "\n".join(blocks)
+    if estimate_tokens(page_text) <= DEFAULT_CHUNK_TOKENS:
+        return page_text
+
+    try:
+        return await map_reduce_summarize(blocks)
+    except Exception as e:
+        return f"Error: Could not summarize the page content. {e}"
+
+
+def split_urls(urls) -> list:
+    """
+    The URLs of a topic, from a list or a whitespace/comma separated string,
+    in their given order with repeats removed.
+    """
+    if isinstance(urls, str):
+        urls = re.split(r"[\s,]+", urls)
+    return list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+
+
+async def build_topic_brief(urls: list[str]) -> str:
+    """
+    Scrapes several pages on one topic and condenses them into a single
+    content brief. The pages are fetched concurrently, blocks repeated
+    across pages (navigation, footers, quoted paragraphs) are dropped, and
+    the merged text is summarized once if it is too long.
+
+    Args:
+        urls: The URLs of the pages covering the topic.
+
+    Returns:
+        The merged page text or content brief, or an error message.
+    """
+    urls = split_urls(urls)
+    if not urls:
+        return "Error: No URLs given."
+
+    seen = BlockDeduper()
+    blocks = []
+    failed = []
+    with get_metrics().time_tool("topic_scraper"):
+        results = await fetch_urls(urls, timeout=10)
+        # Extracted in input order, so earlier pages keep the blocks they share with later ones
+        for url, result in zip(urls, results):
+            if isinstance(result, requests.RequestException):
+                logging.warning(f"Could not retrieve {url} for the topic brief: {result}")
+                failed.append(url)
+                continue
+            page_blocks = extract_blocks(result.text, max_blocks=None, seen=seen)
+            if page_blocks:
+                blocks.append(f"SOURCE: {url}")
+                blocks.extend(page_blocks)
+
+    if not blocks:
+        if failed:
+            return f"Error: Could not retrieve any of the URLs: {', '.join(failed)}"
+        return "Error: No meaningful content found at the URLs."
+    logging.info(f"Topic brief: {len(blocks)} blocks from {len(urls) - len(failed)} of {len(urls)} pages, "
+                 f"{seen.dropped} repeated blocks dropped")
+
+    topic_text = "\n".join(blocks)
+    if estimate_tokens(topic_text) > DEFAULT_CHUNK_TOKENS:
+        try:
+            topic_text = await map_reduce_summarize(blocks)
+        except Exception as e:
+            return f"Error: Could not summarize the page content. {e}"
+    if failed:
+        topic_text += f"\n\n(Could not retrieve: {', '.join(failed)})"
+    return topic_text
+
+
+brief_builder_tool = FunctionTool(func=build_content_brief)
+topic_brief_tool = FunctionTool(func=build_topic_brief)
@@ -0,0 +1,202 @@
+import os
+import re
+import time
+import zlib
+import struct
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+from ..output_store import AtomicFile
+
+# --- Defaults (overridable through the environment) ---
+# Styled .docx whose styles, numbering and page setup every document reuses
+# ("" = python-docx's default template)
+DEFAULT_DOCX_TEMPLATE = os.getenv("DOCX_TEMPLATE", "")
+# zlib level for the document body (template parts are compressed once, at load)
+DEFAULT_DOCX_COMPRESSLEVEL = int(os.getenv("DOCX_COMPRESSLEVEL", "6"))
+
+_DOCUMENT_PART = "word/document.xml"
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Characters XML 1.0 cannot carry (python-docx raises on them; they are dropped here)
+_INVALID_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_BREAK_RE = re.compile(r"(\r\n|\n|\r|\t)")
+# Compressed body bytes are flushed to disk in chunks of about this size
+_FLUSH_CHARS = 64 * 1024
+
+# --- ZIP records (no ZIP64: parts stay far below 4 GiB) ---
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+
+
+def _default_template_path():
+    import docx
+    return os.path.join(os.path.dirname(docx.__file__), "templates", "default.docx")
+
+
+def _dos_timestamp(seconds):
+    t = time.localtime(seconds)
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+def _run_content(text):
+    pieces = []
+    for piece in _BREAK_RE.split(_INVALID_XML_RE.sub("", text)):
+        if piece == "\t":
+            pieces.append("<w:tab/>")
+        elif piece in ("\n", "\r", "\r\n"):
+            pieces.append("<w:br/>")
+        elif piece:
+            pieces.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+    return "".join(pieces)
+
+
+# --- 1. Template ---
+class DocxTemplate:
+    """
+    A styled .docx loaded once and reused for every document written from it.
+
+    Every part except the document body (styles, numbering, theme, settings,
+    ...) is compressed once at load time and copied verbatim into each new
+    file. The body is streamed from paragraph XML strings straight into the
+    ZIP container, so writing a document never builds an object tree.
+    Paragraphs come from `paragraph`, `heading` and `page_break`, which
+    produce the same XML python-docx's `add_paragraph`, `add_heading` and
+    `add_page_break` would.
+    """
+
+    def __init__(self, path=DEFAULT_DOCX_TEMPLATE, compresslevel=DEFAULT_DOCX_COMPRESSLEVEL):
+        self.path = path or _default_template_path()
+        self.compresslevel = compresslevel
+        self._parts = []  # (name, crc32, compressed bytes, size), in template order
+        with zipfile.ZipFile(self.path) as template:
+            for info in template.infolist():
+                data = template.read(info)
+                if info.filename == _DOCUMENT_PART:
+                    document = data.decode("utf-8")
+                elif not info.is_dir():
+                    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+                    compressed = compressor.compress(data) + compressor.flush()
+                    self._parts.append((info.filename, zlib.crc32(data), compressed, len(data)))
+            styles = template.read("word/styles.xml")
+
+        # Body head (up to and including <w:body> plus any template content)
+        # and tail (the final section properties onwards)
+        body_start = document.index("<w:body>") + len("<w:body>")
+        tail_start = document.rfind("<w:sectPr")
+        if tail_start < body_start:
+            tail_start = document.rindex("</w:body>")
+        self._head = document[:tail_start]
+        self._tail = document[tail_start:]
+
+        self._style_ids = {}
+        for style in ET.fromstring(styles).iter(f"{_W_NS}style"):
+            name = style.find(f"{_W_NS}name")
+            if name is not None:
+                self._style_ids[name.get(f"{_W_NS}val").lower()] = style.get(f"{_W_NS}styleId")
+
+    # --- Paragraph XML ---
+    def style_id(self, style_name):
+        """Maps a style name ("List Number") to its id in this template ("ListNumber")."""
+        try:
+            return self._style_ids[style_name.lower()]
+        except KeyError:
+            raise KeyError(f"no style with name '{style_name}' in template '{self.path}'") from None
+
+    def paragraph(self, text="", style=None, bold=False):
+        properties = f'<w:pPr><w:pStyle w:val="{self.style_id(style)}"/></w:pPr>' if style else ""
+        if not text:
+            return f"<w:p>{properties}</w:p>"
+        run_properties = "<w:rPr><w:b/></w:rPr>" if bold else ""
+        return f"<w:p>{properties}<w:r>{run_properties}{_run_content(str(text))}</w:r></w:p>"
+
+    def heading(self, text, level=1):
+        return self.paragraph(text, style="Title" if level == 0 else f"Heading {level}")
+
+    @staticmethod
+    def page_break():
+        return '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+    # --- Writing ---
+    def write(self, file_path, paragraphs, fsync=True):
+        """
+        Writes a .docx at `file_path` whose body is the concatenated
+        `paragraphs` (any iterable of paragraph XML strings, consumed lazily).
+        The file is replaced atomically; pass fsync=False when the caller
+        syncs a batch of files itself.
+        """
+        with AtomicFile(file_path, "wb", fsync=fsync) as f:
+            self.write_to(f, paragraphs)
+
+    def write_to(self, f, paragraphs):
+        """Writes the .docx to `f`, a seekable binary file positioned at its start."""
+        dos_time, dos_date = _dos_timestamp(time.time())
+        entries = []
+        for name, crc, compressed, size in self._parts:
+            entries.append((name, f.tell(), crc, len(compressed), size))
+            f.write(_LOCAL_HEADER.pack(0x04034B50, 20, 0, zipfile.ZIP_DEFLATED, dos_time, dos_date,
+                                       crc, len(compressed), size, len(name), 0))
+            f.write(name.encode("ascii"))
+            f.write(compressed)
+        entries.append(self._stream_body(f, paragraphs, dos_time, dos_date))
+
+        central_start = f.tell()
+        for name, offset, crc, compressed_size, size in entries:
+            f.write(_CENTRAL_HEADER.pack(0x02014B50, 20, 20, 0, zipfile.ZIP_DEFLATED, dos_time, dos_date,
+                                         crc, compressed_size, size, len(name), 0, 0, 0, 0, 0, offset))
+            f.write(name.encode("ascii"))
+        f.write(_END_RECORD.pack(0x06054B50, 0, 0, len(entries), len(entries),
+                                 f.tell() - central_start, central_start, 0))
+
+    def _stream_body(self, f, paragraphs, dos_time, dos_date):
+        name = _DOCUMENT_PART
+        offset = f.tell()
+        f.write(_LOCAL_HEADER.pack(0x04034B50, 20, 0, zipfile.ZIP_DEFLATED, dos_time, dos_date,
+                                   0, 0, 0, len(name), 0))  # crc and sizes patched below
+        f.write(name.encode("ascii"))
+
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+        crc, size, compressed_size = 0, 0, 0
+
+        def emit(text):
+            nonlocal crc, size, compressed_size
+            data = text.encode("utf-8")
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            compressed = compressor.compress(data)
+            compressed_size += len(compressed)
+            f.write(compressed)
+
+        emit(self._head)
+        pending, pending_chars = [], 0
+        for paragraph in paragraphs:
+            pending.append(paragraph)
+            pending_chars += len(paragraph)
+            if pending_chars >= _FLUSH_CHARS:
+                emit("".join(pending))
+                pending, pending_chars = [], 0
+        emit("".join(pending) + self._tail)
+        tail = compressor.flush()
+        compressed_size += len(tail)
+        f.write(tail)
+
+        end = f.tell()
+        f.seek(offset + 14)
+        f.write(struct.pack("<III", crc, compressed_size, size))
+        f.seek(end)
+        return name, offset, crc, compressed_size, size
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_docx_template(path=DEFAULT_DOCX_TEMPLATE):
+    """Returns the DocxTemplate for `path`, loading it on first use."""
+    with _templates_lock:
+        if path not in _templates:
+            _templates[path] = DocxTemplate(path)
+        return _templates[path]
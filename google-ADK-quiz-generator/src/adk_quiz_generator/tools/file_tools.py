@@ -1,6 +1,8 @@
 import os
 from google.adk.tools import FunctionTool
 
+from ..output_store import atomic_write
+
 def read_file_content(file_path: str) -> str:
     """
     (CUSTOM TOOL) Reads and returns the content of a local file
@@ -25,7 +27,8 @@ def read_file_content(file_path: str) -> str:
 def write_file_content(file_path: str, content: str) -> str:
     """
     (CUSTOM TOOL) Writes the given content to a local file,
-    overwriting it if it exists.
+    overwriting it if it exists. The file is replaced atomically, so
+    concurrent readers never see a partial write.
     
     Args:
         file_path: The path to the local file (e.g., 'content_brief.md').
@@ -35,8 +38,7 @@ def write_file_content(file_path: str, content: str) -> str:
         A confirmation message on success, or an error message.
     """
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        atomic_write(file_path, content)
         return f"Successfully wrote content to '{file_path}'."
     except Exception as e:
         return f"Error writing to file: {e}"
@@ -0,0 +1,249 @@
+import os
+import re
+import json
+import codecs
+import asyncio
+import hashlib
+import threading
+from typing import NamedTuple, Optional, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..metrics import get_metrics
+from ..output_store import atomic_write
+
+# --- Defaults (overridable through the environment) ---
+DEFAULT_HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".http_cache")
+# Cached bodies plus metadata above this size evict the least recently used pages; 0 means unbounded
+DEFAULT_HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DEFAULT_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+# Max concurrent connections to any one host when fetching several URLs
+DEFAULT_PER_HOST_CONNECTIONS = int(os.getenv("HTTP_PER_HOST_CONNECTIONS", "4"))
+DEFAULT_USER_AGENT = "Mozilla/5.0"
+
+# Bytes searched for a <meta charset> / http-equiv declaration (browsers prescan 1024)
+CHARSET_SNIFF_BYTES = 4096
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([-\w.:]+)""", re.IGNORECASE)
+
+
+def sniff_charset(content: bytes) -> Optional[str]:
+    """
+    Returns the encoding a page declares in its byte order mark or in a
+    <meta charset> / <meta http-equiv="Content-Type"> tag near its start,
+    or None if it declares none that Python knows.
+    """
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding
+    match = _META_CHARSET_RE.search(content[:CHARSET_SNIFF_BYTES])
+    if not match:
+        return None
+    try:
+        name = codecs.lookup(match.group(1).decode("ascii")).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+    # A page whose bytes could be read to find the tag is not UTF-16 (HTML spec)
+    return "utf-8" if name.startswith("utf-16") else name
+
+
+class FetchResult(NamedTuple):
+    """A fetched page body, either freshly downloaded or revalidated from the cache."""
+    url: str
+    status_code: int
+    content: bytes
+    encoding: Optional[str]
+    from_cache: bool
+
+    @property
+    def text(self) -> str:
+        # requests reports ISO-8859-1 for any text/* response without a charset,
+        # which garbles UTF-8 pages, so only trust an explicit non-default charset,
+        # then the page's own declaration, then UTF-8
+        if self.encoding and self.encoding.lower() != "iso-8859-1":
+            try:
+                return self.content.decode(self.encoding, errors="replace")
+            except LookupError:
+                pass
+        declared = sniff_charset(self.content)
+        if declared:
+            return self.content.decode(declared, errors="replace")
+        try:
+            return self.content.decode("utf-8")
+        except UnicodeDecodeError:
+            return self.content.decode("iso-8859-1")
+
+
+class CachedFetcher:
+    """
+    HTTP GET with a pooled requests.Session and an on-disk validator cache.
+
+    Responses carrying an ETag or Last-Modified header are stored under
+    `cache_dir`. Later fetches of the same URL send If-None-Match /
+    If-Modified-Since, and a 304 Not Modified answer returns the cached
+    body without downloading it again. Once the cache holds more than
+    `max_bytes`, the least recently used pages are evicted.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_HTTP_CACHE_DIR, pool_size=DEFAULT_POOL_SIZE, user_agent=DEFAULT_USER_AGENT,
+                 max_bytes=DEFAULT_HTTP_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return (
+            os.path.join(self.cache_dir, f"{key}.json"),
+            os.path.join(self.cache_dir, f"{key}.body"),
+        )
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        try:
+            os.utime(meta_path)  # metadata mtime doubles as the LRU access time
+        except OSError:
+            pass
+        return meta, body
+
+    def _store(self, url, meta, body):
+        meta_path, body_path = self._paths(url)
+        # Body first, so a reader never sees metadata without its body
+        if body is not None:
+            atomic_write(body_path, body, fsync=False)
+        atomic_write(meta_path, json.dumps(meta).encode("utf-8"), fsync=False)
+        if body is not None:
+            self._evict()
+
+    def _evict(self):
+        """Removes the least recently used pages until the cache fits in `max_bytes`."""
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            pages, total = {}, 0
+            for item in os.scandir(self.cache_dir):
+                key, ext = os.path.splitext(item.name)
+                if ext not in (".json", ".body"):
+                    continue
+                try:
+                    stat = item.stat()
+                except OSError:
+                    continue
+                total += stat.st_size
+                page = pages.setdefault(key, [0.0, 0])
+                page[1] += stat.st_size
+                if ext == ".json":
+                    page[0] = stat.st_mtime
+            for key, (_, size) in sorted(pages.items(), key=lambda item: item[1][0]):
+                if total <= self.max_bytes:
+                    break
+                # Metadata first, so a reader never sees metadata without its body
+                for ext in (".json", ".body"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, key + ext))
+                    except OSError:
+                        pass
+                total -= size
+
+    def fetch(self, url: str, timeout: float = 10, headers: Optional[dict] = None) -> FetchResult:
+        """
+        Fetches `url`, revalidating any cached copy.
+
+        Raises:
+            requests.RequestException: on network errors or non-2xx/304 responses.
+        """
+        request_headers = dict(headers or {})
+        meta, body = self._load(url)
+        if meta is not None:
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = self.session.get(url, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and meta is not None:
+            # Servers may send refreshed validators with a 304
+            refreshed = dict(meta)
+            if response.headers.get("ETag"):
+                refreshed["etag"] = response.headers["ETag"]
+            if response.headers.get("Last-Modified"):
+                refreshed["last_modified"] = response.headers["Last-Modified"]
+            if refreshed != meta:
+                self._store(url, refreshed, None)
+            return FetchResult(url, 304, body, meta.get("encoding"), True)
+
+        response.raise_for_status()
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._store(url, {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "encoding": response.encoding,
+            }, response.content)
+
+        return FetchResult(url, response.status_code, response.content, response.encoding, False)
+
+
+_default_fetcher = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> CachedFetcher:
+    """Returns the process-wide fetcher shared by all scrapers."""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = CachedFetcher()
+        return _default_fetcher
+
+
+def fetch_url(url: str, timeout: float = 10) -> FetchResult:
+    """Fetches `url` through the shared pooled, revalidating fetcher."""
+    result = get_fetcher().fetch(url, timeout=timeout)
+    get_metrics().count_cache("http", result.from_cache)
+    return result
+
+
+async def fetch_urls(urls, timeout: float = 10, per_host: int = DEFAULT_PER_HOST_CONNECTIONS,
+                     max_parallel: int = DEFAULT_POOL_SIZE) -> list[Union[FetchResult, requests.RequestException]]:
+    """
+    Fetches several URLs concurrently through the shared fetcher, with at
+    most `per_host` requests in flight to any one host and `max_parallel`
+    overall (the connection pool size).
+
+    Returns:
+        One entry per URL, in input order: its FetchResult, or the
+        requests.RequestException that fetching it raised.
+    """
+    overall = asyncio.Semaphore(max_parallel)
+    hosts = {}
+
+    async def fetch_one(url):
+        host = hosts.setdefault((urlsplit(url).hostname or "").lower(), asyncio.Semaphore(per_host))
+        async with host, overall:
+            try:
+                return await asyncio.to_thread(fetch_url, url, timeout)
+            except requests.RequestException as e:
+                return e
+
+    return await asyncio.gather(*(fetch_one(url) for url in urls))
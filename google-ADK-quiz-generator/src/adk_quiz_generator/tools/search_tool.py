@@ -1,37 +1,238 @@
+import os
+import re
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import List
+
 from duckduckgo_search import DDGS
 from google.adk.tools import FunctionTool
-import json
 
-def search_web(query: str) -> str:
+from ..metrics import get_metrics
+
+# --- Defaults (overridable through the environment) ---
+DEFAULT_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "3"))
+DEFAULT_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "3600"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "8"))
+DEFAULT_MAX_PARALLEL = int(os.getenv("SEARCH_MAX_PARALLEL", "4"))
+# JSON file with a list of {"snippet", "source"} documents to search instead of DuckDuckGo
+DEFAULT_SEARCH_INDEX = os.getenv("SEARCH_INDEX")
+
+
+def normalize_query(query: str) -> str:
+    """Case-folds and collapses whitespace so trivially different queries share a cache entry."""
+    return " ".join(query.casefold().split()).strip(" .,;:!?\"'")
+
+
+# --- 1. Backends ---
+class DuckDuckGoBackend:
+    """DuckDuckGo text search. Each worker thread keeps and reuses its own DDGS client."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = DDGS()
+        return client
+
+    def search(self, query, max_results):
+        results = self._client().text(query, max_results=max_results) or []
+        return [{"snippet": r["body"], "source": r["href"]} for r in results]
+
+
+class StaticIndexBackend:
+    """
+    Offline backend over a fixed list of {"snippet", "source"} documents,
+    ranked by how many query terms they contain. For tests and benchmarks.
+    """
+
+    def __init__(self, documents, latency=0.0):
+        self.documents = [(set(re.findall(r"\w+", d["snippet"].casefold())), d) for d in documents]
+        self.latency = latency
+
+    def search(self, query, max_results):
+        if self.latency:
+            time.sleep(self.latency(query) if callable(self.latency) else self.latency)
+        terms = set(re.findall(r"\w+", query.casefold()))
+        scored = [(len(terms & words), i, doc) for i, (words, doc) in enumerate(self.documents)]
+        ranked = sorted((s for s in scored if s[0]), key=lambda s: (-s[0], s[1]))
+        return [dict(doc) for _, _, doc in ranked[:max_results]]
+
+
+# --- 2. Result cache ---
+class SearchCache:
+    """In-memory normalized-query -> results cache with a TTL and LRU eviction."""
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return results
+
+    def put(self, key, results):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# --- 3. Search service ---
+class SearchService:
+    """
+    Cached search over a pluggable backend.
+
+    Identical normalized queries are answered from the cache, and a query
+    already in flight is shared instead of sent twice. `search_many` runs
+    queries in parallel and returns whatever finished by the deadline;
+    stragglers keep running and land in the cache for the next caller.
+    """
+
+    def __init__(self, backend=None, cache=None, max_results=DEFAULT_MAX_RESULTS, max_parallel=DEFAULT_MAX_PARALLEL):
+        self.backend = backend or DuckDuckGoBackend()
+        self.cache = cache or SearchCache()
+        self.max_results = max_results
+        self._executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="search")
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, key):
+        try:
+            with get_metrics().time_tool("search"):
+                results = self.backend.search(key, self.max_results)
+            self.cache.put(key, results)
+            return results
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def submit(self, query):
+        """Returns a future for a query's results (already resolved on a cache hit)."""
+        key = normalize_query(query)
+        with self._lock:
+            future = self._inflight.get(key)
+            hit = future is not None  # shared with the same query in flight
+            if future is None:
+                cached = self.cache.get(key)
+                hit = cached is not None
+                if hit:
+                    future = Future()
+                    future.set_result(cached)
+                else:
+                    future = self._inflight[key] = self._executor.submit(self._fetch, key)
+        get_metrics().count_cache("search", hit)
+        return future
+
+    def search(self, query, timeout=DEFAULT_DEADLINE_SECONDS):
+        return self.submit(query).result(timeout=timeout)
+
+    def search_many(self, queries, deadline=DEFAULT_DEADLINE_SECONDS):
+        """
+        Runs `queries` in parallel for at most `deadline` seconds.
+
+        Returns:
+            A dict with "results" (query -> snippets) for finished queries,
+            "timed_out" (queries still running at the deadline) and
+            "errors" (query -> message).
+        """
+        futures = {query: self.submit(query) for query in dict.fromkeys(queries)}
+        wait(futures.values(), timeout=deadline)
+
+        report = {"results": {}, "timed_out": [], "errors": {}}
+        for query, future in futures.items():
+            if not future.done():
+                report["timed_out"].append(query)
+            elif future.exception() is not None:
+                report["errors"][query] = str(future.exception())
+            else:
+                report["results"][query] = future.result()
+        return report
+
+
+_search_service = None
+
+
+def get_search_service() -> SearchService:
+    """Returns the process-wide search service (DuckDuckGo, or the SEARCH_INDEX file when set)."""
+    global _search_service
+    if _search_service is None:
+        backend = None
+        if DEFAULT_SEARCH_INDEX:
+            with open(DEFAULT_SEARCH_INDEX, "r", encoding="utf-8") as f:
+                backend = StaticIndexBackend(json.load(f))
+        _search_service = SearchService(backend=backend)
+    return _search_service
+
+
+def set_search_backend(backend):
+    """Swaps the search backend (e.g. a StaticIndexBackend for offline runs); clears the cache."""
+    global _search_service
+    _search_service = SearchService(backend=backend)
+
+
+# --- 4. ADK tools ---
+async def search_web(query: str) -> str:
     """
     Performs a web search using DuckDuckGo to get relevant snippets
-    for fact-checking.
-    
+    for fact-checking. Results are cached, so repeating a query is free.
+
     Args:
         query: The search term to use for finding factual information.
-    
+
     Returns:
         A JSON string containing search snippets and their sources.
     """
     try:
-        with DDGS() as ddgs:
-            # Get top 3 results
-            results = list(ddgs.text(query, max_results=3))
-            
-        if not results:
-            return "No search results found."
-            
-        # Format snippets for the LLM
-        snippets = [
-            {"snippet": r['body'], "source": r['href']} 
-            for r in results
-        ]
-        return json.dumps(snippets)
-        
+        results = await asyncio.to_thread(get_search_service().search, query)
+    except FutureTimeoutError:
+        return f"Error during web search: no results within {DEFAULT_DEADLINE_SECONDS:g}s."
     except Exception as e:
         return f"Error during web search: {e}"
 
+    if not results:
+        return "No search results found."
+    return json.dumps(results)
+
+
+async def search_web_batch(queries: List[str]) -> str:
+    """
+    Runs several web searches at once to fact-check multiple questions in
+    one step. Queries that do not finish within the search deadline are
+    listed under "timed_out" instead of delaying the other results.
+
+    Args:
+        queries: The search terms, one per fact to check.
+
+    Returns:
+        A JSON string with "results" (query -> list of snippets with their
+        sources), "timed_out" (queries without results) and "errors".
+    """
+    report = await asyncio.to_thread(get_search_service().search_many, queries)
+    return json.dumps(report)
+
+
 # FIX: Use 'func' instead of 'impl' and rely on the docstring for description
 web_search_tool = FunctionTool(
     func=search_web
 )
+web_search_batch_tool = FunctionTool(
+    func=search_web_batch
+)
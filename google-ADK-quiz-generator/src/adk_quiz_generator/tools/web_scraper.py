@@ -1,13 +1,190 @@
 from google.adk.tools import FunctionTool
 import requests
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 import re
 
+from ..metrics import get_metrics
+from .dedupe import BlockDeduper
+from .http_fetch import fetch_url
+
+# Subtrees that never contain page content (scripts, styles, nav, footer, header, ads)
+SKIP_TAGS = {"script", "style", "nav", "footer", "header", "aside"}
+HEADING_TAGS = {"h1", "h2", "h3"}
+BLOCK_TAGS = HEADING_TAGS | {"p", "li"}
+# Start tags that implicitly close an open <p> (HTML paragraph end rules)
+P_CLOSING_TAGS = BLOCK_TAGS | {
+    "div", "ul", "ol", "dl", "table", "section", "article", "main",
+    "blockquote", "pre", "form", "h4", "h5", "h6", "hr",
+}
+LIST_TAGS = {"ul", "ol"}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "source", "track", "wbr",
+}
+# Elements tracked inside a skipped subtree; deeper ones are not, so a
+# malformed page cannot grow the stack without bound
+MAX_SKIP_DEPTH = 64
+
+# Join top N blocks to avoid overly long briefs
+MAX_BLOCKS = 50
+
+
+class _BlockLimitReached(Exception):
+    pass
+
+
+class _BlockExtractor(HTMLParser):
+    """
+    Single forward pass over the HTML that emits cleaned heading, paragraph
+    and list-item blocks in document order, skipping SKIP_TAGS subtrees.
+    Repeated blocks are dropped through `seen` (a BlockDeduper; exact
+    repeats only by default).
+
+    Unclosed elements are closed the way browsers close them: an <li> by
+    the next <li> of the same list or the list's end tag, and a skipped
+    subtree by the end tag of any element that was open before it, so an
+    unbalanced <nav> or <header> cannot swallow the rest of the page.
+    """
+
+    def __init__(self, max_blocks=None, seen=None):
+        super().__init__(convert_charrefs=True)
+        self.max_blocks = max_blocks
+        self.blocks = []
+        self._seen = seen if seen is not None else BlockDeduper(shingle_words=0)
+        self._skip_stack = []  # open elements of the skipped subtree, its SKIP_TAGS root first
+        self._elements = []  # open non-void elements outside skipped subtrees
+        self._lists = []  # len(self._open_blocks) when each open <ul>/<ol> started
+        self._open_blocks = []  # [tag, text parts] for every open block element
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_stack:
+            if tag not in VOID_TAGS and len(self._skip_stack) < MAX_SKIP_DEPTH:
+                self._skip_stack.append(tag)
+            return
+        if tag in SKIP_TAGS:
+            self._skip_stack.append(tag)
+            return
+        # An unclosed <p> ends where the next block-level element starts
+        if tag in P_CLOSING_TAGS and self._open_blocks and self._open_blocks[-1][0] == "p":
+            self._close_element("p")
+        # ...and an unclosed <li> where the next item of its own list starts
+        if tag == "li":
+            self._close_element("li", scope=LIST_TAGS)
+        if tag in VOID_TAGS:
+            return
+        self._elements.append(tag)
+        if tag in LIST_TAGS:
+            self._lists.append(len(self._open_blocks))
+        if tag in BLOCK_TAGS:
+            self._open_blocks.append([tag, []])
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        # <div/> and the like: the end tag never comes
+        if tag not in VOID_TAGS and not (self._skip_stack and self._skip_stack[-1] != tag):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._skip_stack:
+            if tag in self._skip_stack:
+                del self._skip_stack[len(self._skip_stack) - 1 - self._skip_stack[::-1].index(tag):]
+                return
+            if tag not in self._elements:
+                return
+            # The end tag of an element opened before the skipped subtree closes it too
+            self._skip_stack.clear()
+        self._close_element(tag)
+
+    def _close_element(self, tag, scope=()):
+        """
+        Closes the innermost open `tag` and every element opened inside it,
+        unless an element in `scope` is reached first.
+        """
+        for i in range(len(self._elements) - 1, -1, -1):
+            if self._elements[i] == tag:
+                break
+            if self._elements[i] in scope:
+                return
+        else:
+            return
+        while len(self._elements) > i:
+            closed = self._elements.pop()
+            if closed in LIST_TAGS:
+                self._close_blocks_from(self._lists.pop())
+            elif closed in BLOCK_TAGS:
+                self._close_blocks_from(self._find_block(closed))
+
+    def handle_data(self, data):
+        if self._skip_stack or not self._open_blocks:
+            return
+        text = data.strip()
+        if text:
+            for block in self._open_blocks:
+                block[1].append(text)
+
+    def close(self):
+        super().close()
+        while self._open_blocks:
+            self._close_block()
+
+    def _find_block(self, tag, start=0):
+        """Index of the innermost open `tag` block at or after `start`, or None."""
+        for i in range(len(self._open_blocks) - 1, start - 1, -1):
+            if self._open_blocks[i][0] == tag:
+                return i
+        return None
+
+    def _close_blocks_from(self, index):
+        """Closes the open blocks from `index` inward (nothing if `index` is None)."""
+        if index is None:
+            return
+        while len(self._open_blocks) > index:
+            self._close_block()
+
+    def _close_block(self):
+        tag, parts = self._open_blocks.pop()
+        text = "".join(parts)
+
+        if tag in HEADING_TAGS:
+            if len(text) <= 5:
+                return
+            text = text.upper()  # headings in uppercase
+        elif len(text) <= 20:
+            return
+        elif tag == "li":
+            text = f"- {text}"
+
+        # Remove duplicates
+        block_clean = re.sub(r'\s+', ' ', text)
+        if not self._seen.add(block_clean):
+            return
+        self.blocks.append(block_clean)
+
+        if self.max_blocks is not None and len(self.blocks) >= self.max_blocks:
+            raise _BlockLimitReached()
+
+
+def extract_blocks(html: str, max_blocks=MAX_BLOCKS, seen=None) -> list:
+    """
+    Extracts unique heading (h1-h3), paragraph and list-item blocks from HTML
+    in document order, stopping as soon as `max_blocks` have been collected.
+    Pass max_blocks=None to extract the whole page, and a shared
+    BlockDeduper as `seen` to also drop blocks repeated from other pages.
+    """
+    parser = _BlockExtractor(max_blocks, seen)
+    try:
+        parser.feed(html)
+        parser.close()
+    except _BlockLimitReached:
+        pass
+    return parser.blocks
+
+
 def scrape_main_content(url: str) -> str:
     """
     Scrapes and cleans the main textual content from a given URL.
     Focuses on headings (h1-h3), paragraphs, and list items.
-    
+
     Args:
         url: The URL to scrape content from.
 
@@ -15,50 +192,15 @@ def scrape_main_content(url: str) -> str:
         The cleaned, summarized text content of the page.
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, "html.parser")
-        
-        # Remove scripts, styles, nav, footer, header, ads
-        for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            tag.decompose()
-        
-        content_blocks = []
-
-        # Extract headings
-        for heading_tag in ["h1", "h2", "h3"]:
-            for h in soup.find_all(heading_tag):
-                text = h.get_text(strip=True)
-                if text and len(text) > 5:
-                    content_blocks.append(text.upper())  # headings in uppercase
-
-        # Extract paragraphs
-        for p in soup.find_all("p"):
-            text = p.get_text(strip=True)
-            if text and len(text) > 20:
-                content_blocks.append(text)
-
-        # Extract list items
-        for li in soup.find_all("li"):
-            text = li.get_text(strip=True)
-            if text and len(text) > 20:
-                content_blocks.append(f"- {text}")
-
-        # Remove duplicates and very short lines
-        unique_blocks = []
-        seen = set()
-        for block in content_blocks:
-            block_clean = re.sub(r'\s+', ' ', block)
-            if block_clean not in seen:
-                seen.add(block_clean)
-                unique_blocks.append(block_clean)
+        # Pooled session + ETag/Last-Modified revalidation; raises on HTTP errors
+        with get_metrics().time_tool("scraper"):
+            response = fetch_url(url, timeout=10)
+            unique_blocks = extract_blocks(response.text, max_blocks=MAX_BLOCKS)
 
         if not unique_blocks:
             return "Error: No meaningful content found at the URL."
 
-        # Join top N blocks to avoid overly long briefs
-        cleaned_text = "\n".join(unique_blocks[:50])
+        cleaned_text = "\n".join(unique_blocks)
         return cleaned_text
 
     except requests.RequestException as e:
@@ -1,77 +1,132 @@
 # adk_quiz_generator/src/adk_quiz_generator/tools/word_tools.py
 
-from google.adk.tools import FunctionTool
-from docx import Document
+import os
 import json
 
-def quiz_to_word_with_sources(file_path: str, quiz_json_str: str) -> str:
-    """
-    Generates a Word document from the final quiz JSON object.
-    Handles a dictionary containing MCQs, T/F questions, validation notes,
-    and fact-checking sources.
-    """
-    try:
-        quiz_data = json.loads(quiz_json_str)
-    except json.JSONDecodeError as e:
-        return f"Invalid JSON: {e}"
+from google.adk.tools import FunctionTool
 
-    if not isinstance(quiz_data, dict):
-        return "Expected a JSON object (dict) at the top level."
+from ..output_store import fsync_paths
+from .docx_writer import get_docx_template
 
-    doc = Document()
-    doc.add_heading("Generated Quiz", level=0)
 
-    # Get the lists of questions
-    mcq_questions = quiz_data.get("multiple_choice", [])
-    tf_questions = quiz_data.get("true_false", [])
-    all_questions = mcq_questions + tf_questions
+def quiz_paragraphs(template, quiz_data):
+    """
+    Yields the paragraph XML of one quiz: numbered questions (MCQ options
+    with the correct one in bold, T/F answers), then validation notes and
+    fact-checking sources on a new page.
+    """
+    yield template.heading("Generated Quiz", level=0)
 
-    if not all_questions:
-        return "No questions found in the JSON."
+    # Get the lists of questions
+    all_questions = quiz_data.get("multiple_choice", []) + quiz_data.get("true_false", [])
 
     # --- Process all questions ---
     for idx, q in enumerate(all_questions, start=1):
         question_text = q.get("question", "")
-        doc.add_paragraph(f"Q{idx}: {question_text}", style='List Number')
+        yield template.paragraph(f"Q{idx}: {question_text}", style="List Number")
 
         options = q.get("options")
         if options and isinstance(options, dict):
-            # This is an MCQ
+            # This is an MCQ; bold the correct answer
             for key in sorted(options.keys()):
-                p = doc.add_paragraph(f"{key}. {options[key]}")
-                # Bold the correct answer
-                if key == q.get("answer"):
-                    p.runs[0].font.bold = True
+                yield template.paragraph(f"{key}. {options[key]}", bold=key == q.get("answer"))
         else:
             # This is a True/False question
             answer_val = q.get("answer")
             answer = "True" if str(answer_val).lower() == "true" else "False"
-            doc.add_paragraph(f"Answer: {answer}")
+            yield template.paragraph(f"Answer: {answer}")
 
     # --- Add Validation Notes ---
     validation_notes = quiz_data.get("validation_notes")
     if validation_notes:
-        doc.add_page_break()
-        doc.add_heading("Validation Notes", level=1)
-        doc.add_paragraph(validation_notes)
+        yield template.page_break()
+        yield template.heading("Validation Notes", level=1)
+        yield template.paragraph(validation_notes)
 
-    # --- FIX: Add Fact-Checking Sources ---
+    # --- Add Fact-Checking Sources ---
     fact_checking_sources = quiz_data.get("fact_checking_sources")
-    if fact_checking_sources: # Check if list is not None and not empty
+    if fact_checking_sources:
         # Add page break if notes were not added, to keep sources separate
         if not validation_notes:
-            doc.add_page_break()
-            
-        doc.add_heading("Fact-Checking Sources", level=1)
+            yield template.page_break()
+        yield template.heading("Fact-Checking Sources", level=1)
         for source in fact_checking_sources:
-            # Add as a bullet point
-            doc.add_paragraph(source, style='List Bullet')
+            yield template.paragraph(source, style="List Bullet")
+
+
+def _has_questions(quiz_data):
+    return bool(quiz_data.get("multiple_choice") or quiz_data.get("true_false"))
+
+
+def quiz_to_word_with_sources(file_path: str, quiz_json_str: str) -> str:
+    """
+    Generates a Word document from the final quiz JSON object.
+    Handles a dictionary containing MCQs, T/F questions, validation notes,
+    and fact-checking sources.
+    """
+    try:
+        quiz_data = json.loads(quiz_json_str)
+    except json.JSONDecodeError as e:
+        return f"Invalid JSON: {e}"
+
+    if not isinstance(quiz_data, dict):
+        return "Expected a JSON object (dict) at the top level."
+
+    if not _has_questions(quiz_data):
+        return "No questions found in the JSON."
 
     try:
-        doc.save(file_path)
+        template = get_docx_template()
+        template.write(file_path, quiz_paragraphs(template, quiz_data))
         return f"Quiz successfully saved as Word document at '{file_path}'."
     except Exception as e:
         return f"Error saving Word document: {e}"
 
 
-word_writer_tool = FunctionTool(func=quiz_to_word_with_sources)
\ No newline at end of file
+def write_quizzes_to_word(quizzes, output_dir=None, combined_path=None):
+    """
+    Renders many quiz dicts in a single pass: one 'quiz_00001.docx', ... per
+    quiz in `output_dir`, and/or all of them in one document at
+    `combined_path`, each quiz starting on a new page. Quizzes without
+    questions are skipped. Every file is replaced atomically, and all of
+    them are fsynced together at the end.
+
+    Raises:
+        TypeError: If `quizzes` is not a list (or tuple) of quiz dicts.
+
+    Returns:
+        The list of files written.
+    """
+    if not isinstance(quizzes, (list, tuple)):
+        raise TypeError(f"Expected a list of quiz dicts, got {type(quizzes).__name__}.")
+    template = get_docx_template()
+    written = []
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    def combined_paragraphs():
+        first = True
+        for idx, quiz_data in enumerate(quizzes, start=1):
+            if not isinstance(quiz_data, dict) or not _has_questions(quiz_data):
+                continue
+            paragraphs = list(quiz_paragraphs(template, quiz_data))
+            if output_dir:
+                file_path = os.path.join(output_dir, f"quiz_{idx:05d}.docx")
+                template.write(file_path, paragraphs, fsync=False)
+                written.append(file_path)
+            if not first:
+                yield template.page_break()
+            first = False
+            yield from paragraphs
+
+    if combined_path:
+        template.write(combined_path, combined_paragraphs(), fsync=False)
+        written.append(combined_path)
+    else:
+        for _ in combined_paragraphs():
+            pass
+    fsync_paths(written)
+    return written
+
+
+word_writer_tool = FunctionTool(func=quiz_to_word_with_sources)
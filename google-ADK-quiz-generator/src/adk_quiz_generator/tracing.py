@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from collections import defaultdict
+
+from adk_quiz_generator.metrics import _add_callback
+
+# --- Defaults (overridable through the environment) ---
+# JSONL file spans are appended to; off ("") unless set, so runs and benchmarks leave no file behind
+DEFAULT_TRACE_FILE = os.getenv("TRACE_FILE", "")
+# Raw events kept per run for failure dumps
+DEFAULT_RING_EVENTS = int(os.getenv("TRACE_RING_EVENTS", "200"))
+
+
+def _new_id(nbytes):
+    return os.urandom(nbytes).hex()
+
+
+# --- 1. Span sink ---
+class SpanWriter:
+    """
+    Appends finished spans to a JSONL file, one compact object per line.
+    Field names follow the OTLP JSON span encoding (traceId, spanId,
+    parentSpanId, startTimeUnixNano, ...), with attributes as a flat dict.
+    """
+
+    def __init__(self, path=DEFAULT_TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        atexit.register(self.close)
+
+    def write(self, span):
+        if self._file is None:
+            return
+        line = json.dumps(span, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def flush(self):
+        if self._file is not None:
+            with self._lock:
+                self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            with self._lock:
+                self._file.close()
+                self._file = None
+
+
+# --- 2. Tracer ---
+class Tracer:
+    """
+    Records a span for every agent turn, LLM call and tool call through ADK
+    agent callbacks. One trace per invocation; LLM and tool spans are
+    children of their agent's span, and agent spans of their parent agent's.
+    """
+
+    def __init__(self, writer=None):
+        self.writer = writer or SpanWriter()
+        self._lock = threading.Lock()
+        self._traces = {}                 # invocation id -> trace id
+        self._open = {}                   # span key -> span dict
+        self._parents = {}                # agent name -> parent agent name
+        self._sessions = {}               # session id -> invocation ids with a trace
+
+    def _start(self, key, name, kind, invocation_id, parent_key=None, **attributes):
+        with self._lock:
+            trace_id = self._traces.setdefault(invocation_id, _new_id(16))
+            parent = self._open.get(parent_key) if parent_key else None
+            self._open[key] = {
+                "traceId": trace_id,
+                "spanId": _new_id(8),
+                "parentSpanId": parent["spanId"] if parent else "",
+                "name": name,
+                "kind": kind,
+                "startTimeUnixNano": time.time_ns(),
+                "attributes": {"invocation.id": invocation_id, **attributes},
+            }
+
+    def _end(self, key, status="ok", **attributes):
+        with self._lock:
+            span = self._open.pop(key, None)
+        if span is None:
+            return
+        span["endTimeUnixNano"] = time.time_ns()
+        span["status"] = status
+        span["attributes"].update({k: v for k, v in attributes.items() if v is not None})
+        self.writer.write(span)
+
+    def finish(self, invocation_id, status="ok"):
+        """Ends any span still open for an invocation (e.g. after a failure) and flushes."""
+        with self._lock:
+            keys = [key for key in self._open if key[1] == invocation_id]
+            self._traces.pop(invocation_id, None)
+            for invocations in self._sessions.values():
+                invocations.discard(invocation_id)
+        for key in keys:
+            self._end(key, status=status)
+        self.writer.flush()
+
+    def finish_session(self, session_id, status="ok"):
+        """
+        Ends every span still open for the invocations of a session. Callers
+        that never saw an event (a run failing before its first one) only
+        know the session, not the invocation id.
+        """
+        with self._lock:
+            invocations = self._sessions.pop(session_id, set())
+        for invocation_id in invocations:
+            self.finish(invocation_id, status=status)
+
+    def trace_id(self, invocation_id):
+        return self._traces.get(invocation_id)
+
+    # --- ADK callbacks ---
+    def instrument(self, agent):
+        """Adds span callbacks to `agent` and all its sub-agents; instrumenting twice is a no-op."""
+        _add_callback(agent, "before_agent_callback", self._before_agent)
+        _add_callback(agent, "after_agent_callback", self._after_agent)
+        if hasattr(agent, "before_model_callback"):
+            _add_callback(agent, "before_model_callback", self._before_model)
+            _add_callback(agent, "after_model_callback", self._after_model)
+            _add_callback(agent, "before_tool_callback", self._before_tool)
+            _add_callback(agent, "after_tool_callback", self._after_tool)
+        for sub_agent in agent.sub_agents:
+            self._parents[sub_agent.name] = agent.name
+            self.instrument(sub_agent)
+        return agent
+
+    def _agent_key(self, invocation_id, agent_name):
+        return ("agent", invocation_id, agent_name)
+
+    def _before_agent(self, callback_context):
+        invocation_id, agent_name = callback_context.invocation_id, callback_context.agent_name
+        with self._lock:
+            self._sessions.setdefault(callback_context.session.id, set()).add(invocation_id)
+        parent = self._parents.get(agent_name)
+        self._start(
+            self._agent_key(invocation_id, agent_name), f"agent {agent_name}", "agent", invocation_id,
+            parent_key=self._agent_key(invocation_id, parent) if parent else None,
+            author=agent_name,
+        )
+
+    def _after_agent(self, callback_context):
+        self._end(self._agent_key(callback_context.invocation_id, callback_context.agent_name))
+
+    def _before_model(self, callback_context, llm_request):
+        invocation_id, agent_name = callback_context.invocation_id, callback_context.agent_name
+        self._start(
+            ("llm", invocation_id, agent_name), f"llm {llm_request.model or 'model'}", "llm", invocation_id,
+            parent_key=self._agent_key(invocation_id, agent_name),
+            author=agent_name,
+        )
+
+    def _after_model(self, callback_context, llm_response):
+        if llm_response.partial:
+            return  # streamed chunk; the span ends with the aggregated response
+        usage = llm_response.usage_metadata
+        self._end(
+            ("llm", callback_context.invocation_id, callback_context.agent_name),
+            status="error" if llm_response.error_code else "ok",
+            **{
+                "llm.usage.prompt_tokens": usage.prompt_token_count if usage else None,
+                "llm.usage.completion_tokens": usage.candidates_token_count if usage else None,
+                "llm.usage.cached_tokens": usage.cached_content_token_count if usage else None,
+            },
+        )
+
+    def _before_tool(self, tool, args, tool_context):
+        invocation_id, agent_name = tool_context.invocation_id, tool_context.agent_name
+        self._start(
+            ("tool", invocation_id, tool_context.function_call_id), f"tool {tool.name}", "tool", invocation_id,
+            parent_key=self._agent_key(invocation_id, agent_name),
+            author=agent_name, **{"tool.name": tool.name},
+        )
+
+    def _after_tool(self, tool, args, tool_context, tool_response):
+        failed = isinstance(tool_response, str) and tool_response.startswith("Error")
+        self._end(("tool", tool_context.invocation_id, tool_context.function_call_id), status="error" if failed else "ok")
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide tracer writing to TRACE_FILE."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+# --- 3. Offline report ---
+def summarize(path):
+    """
+    Reads a span file and returns (name, count, p50 ms, p95 ms, max ms)
+    rows, slowest p95 first.
+    """
+    durations = defaultdict(list)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                durations[span["name"]].append((span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e6)
+
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+        rows.append((name, len(values), pick(0.5), pick(0.95), values[-1]))
+    return sorted(rows, key=lambda row: -row[3])
+
+
+if __name__ == "__main__":
+    # python -m adk_quiz_generator.tracing [quiz_traces.jsonl]
+    print(f"{'span':<40}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, count, p50, p95, worst in summarize(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TRACE_FILE or "quiz_traces.jsonl"):
+        print(f"{name:<40}{count:>7}{p50:>10.1f}{p95:>10.1f}{worst:>10.1f}")
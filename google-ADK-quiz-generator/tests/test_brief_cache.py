@@ -0,0 +1,49 @@
+"""
+The content brief cache tools the content acquisition agent calls:
+save_cached_brief / read_cached_brief round trips, URL normalization and
+misses, against a temporary cache directory.
+
+Usage:
+    python -m unittest discover -s tests   (or: python -m pytest tests)
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from adk_quiz_generator.tools import brief_cache  # noqa: E402
+from adk_quiz_generator.tools.brief_cache import BriefCache, read_cached_brief, save_cached_brief  # noqa: E402
+
+
+class BriefCacheToolsTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="test-brief-cache-")
+        self._previous = brief_cache._default_cache
+        brief_cache._default_cache = BriefCache(self.cache_dir)
+
+    def tearDown(self):
+        brief_cache._default_cache = self._previous
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_round_trip(self):
+        message = save_cached_brief("https://example.com/page", "# Brief\nKey facts.")
+        self.assertTrue(message.startswith("Successfully"), message)
+        self.assertEqual(read_cached_brief("https://example.com/page"), "# Brief\nKey facts.")
+
+    def test_equivalent_urls_share_an_entry(self):
+        save_cached_brief("https://Example.com/page?utm_source=x", "brief")
+        self.assertEqual(read_cached_brief("https://example.com/page"), "brief")
+
+    def test_topic_brief_ignores_url_order(self):
+        save_cached_brief("https://a.example/ https://b.example/", "topic brief")
+        self.assertEqual(read_cached_brief("https://b.example/ https://a.example/"), "topic brief")
+
+    def test_miss_returns_an_error_message(self):
+        self.assertTrue(read_cached_brief("https://example.com/missing").startswith("Error:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+CachedFetcher against a local http.server stand-in: ETag and Last-Modified
+revalidation, and size-capped LRU eviction. Also FetchResult's decoding of
+pages that declare their charset only in the markup.
+
+Usage:
+    python -m unittest discover -s tests   (or: python -m pytest tests)
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from adk_quiz_generator.tools.http_fetch import CachedFetcher, FetchResult  # noqa: E402
+
+
+class PageServer:
+    """Serves `pages` ({path: (body, etag, last_modified)}) and honours conditional GETs."""
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []  # (path, status) of every request
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body, etag, last_modified = server.pages[self.path]
+                not_modified = (
+                    (etag and self.headers.get("If-None-Match") == etag)
+                    or (not etag and last_modified and self.headers.get("If-Modified-Since") == last_modified)
+                )
+                status = 304 if not_modified else 200
+                server.requests.append((self.path, status))
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                if last_modified:
+                    self.send_header("Last-Modified", last_modified)
+                if not_modified:
+                    self.end_headers()
+                    return
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class CachedFetcherTest(unittest.TestCase):
+    def setUp(self):
+        self.server = PageServer()
+        self.cache_dir = tempfile.mkdtemp(prefix="test-http-cache-")
+        self.fetcher = CachedFetcher(cache_dir=self.cache_dir)
+
+    def tearDown(self):
+        self.fetcher.session.close()
+        self.server.close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_etag_revalidation_returns_cached_body(self):
+        self.server.pages["/a"] = (b"<p>first</p>", '"v1"', None)
+        first = self.fetcher.fetch(self.server.base + "/a")
+        second = self.fetcher.fetch(self.server.base + "/a")
+
+        self.assertEqual((first.status_code, first.from_cache), (200, False))
+        self.assertEqual((second.status_code, second.from_cache), (304, True))
+        self.assertEqual(second.content, b"<p>first</p>")
+        self.assertEqual(second.text, "<p>first</p>")
+        self.assertEqual(self.server.requests, [("/a", 200), ("/a", 304)])
+
+    def test_changed_etag_downloads_new_body(self):
+        self.server.pages["/a"] = (b"<p>first</p>", '"v1"', None)
+        self.fetcher.fetch(self.server.base + "/a")
+        self.server.pages["/a"] = (b"<p>second</p>", '"v2"', None)
+        changed = self.fetcher.fetch(self.server.base + "/a")
+        again = self.fetcher.fetch(self.server.base + "/a")
+
+        self.assertEqual((changed.content, changed.from_cache), (b"<p>second</p>", False))
+        self.assertEqual((again.content, again.from_cache), (b"<p>second</p>", True))
+
+    def test_last_modified_revalidation(self):
+        self.server.pages["/a"] = (b"<p>dated</p>", None, formatdate(time.time() - 3600, usegmt=True))
+        self.fetcher.fetch(self.server.base + "/a")
+        second = self.fetcher.fetch(self.server.base + "/a")
+
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.content, b"<p>dated</p>")
+
+    def test_page_without_validators_is_not_cached(self):
+        self.server.pages["/a"] = (b"<p>live</p>", None, None)
+        self.fetcher.fetch(self.server.base + "/a")
+        second = self.fetcher.fetch(self.server.base + "/a")
+
+        self.assertFalse(second.from_cache)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_evicts_least_recently_used_pages_over_max_bytes(self):
+        self.fetcher.max_bytes = 2500
+        for path in ("/a", "/b", "/c"):
+            self.server.pages[path] = (path.encode() * 500, f'"{path}"', None)
+        self.fetcher.fetch(self.server.base + "/a")
+        time.sleep(0.01)
+        self.fetcher.fetch(self.server.base + "/b")
+        time.sleep(0.01)
+        self.fetcher.fetch(self.server.base + "/a")  # revalidated: /a is now the most recently used
+        time.sleep(0.01)
+        self.fetcher.fetch(self.server.base + "/c")
+
+        self.assertTrue(self.fetcher.fetch(self.server.base + "/a").from_cache)
+        self.assertTrue(self.fetcher.fetch(self.server.base + "/c").from_cache)
+        self.assertFalse(self.fetcher.fetch(self.server.base + "/b").from_cache)
+
+
+class FetchResultTextTest(unittest.TestCase):
+    def text(self, body, encoding="ISO-8859-1"):
+        # requests reports ISO-8859-1 for a text/html response without a charset
+        return FetchResult("http://example.com/", 200, body, encoding, False).text
+
+    def test_meta_charset(self):
+        body = '<html><head><meta charset="windows-1252"></head><p>caf\xe9 \u201cquoted\u201d</p>'.encode("cp1252")
+        self.assertIn("café “quoted”", self.text(body))
+
+    def test_http_equiv_charset(self):
+        body = '<meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS"><p>日本語</p>'.encode("shift_jis")
+        self.assertIn("日本語", self.text(body))
+
+    def test_header_charset_wins(self):
+        body = '<meta charset="utf-8"><p>caf\xe9</p>'.encode("cp1252")
+        self.assertIn("café", self.text(body, encoding="cp1252"))
+
+    def test_undeclared_falls_back_to_utf8(self):
+        self.assertEqual(self.text("<p>naïve</p>".encode("utf-8")), "<p>naïve</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 from mycrew.tools.custom_tool import FileSaverTool
+from mycrew.output_store import OutputStore
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task, tool
+from crewai.project import CrewBase, after_kickoff, agent, crew, task, tool
 from crewai.agents.agent_builder.base_agent import BaseAgent
+from mycrew.llm_replay import LazyLLM
 from typing import List
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
@@ -14,6 +16,18 @@ class Mycrew():
     agents: List[BaseAgent]
     tasks: List[Task]
 
+    # The MODEL env var's LLM (a replay LLM when LLM_MODE=record/replay), behind the model's rate limiter,
+    # built on first use
+    llm = LazyLLM()
+
+    def __init__(self, run_id=None):
+        # Per-run outputs (outputs/<run id>/): crews running in parallel never share a file
+        self.output_store = OutputStore(run_id=run_id)
+
+    def save_output(self, filename):
+        """Task callback writing the task's final answer to `filename` in this run's directory."""
+        return lambda output: self.output_store.write(filename, output.raw)
+
     # Learn more about YAML configuration files here:
     # Agents: https://docs.crewai.com/concepts/agents#yaml-configuration-recommended
     # Tasks: https://docs.crewai.com/concepts/tasks#yaml-configuration-recommended 
@@ -23,7 +37,7 @@ class Mycrew():
     @tool  # Add the @tool decorator
     def file_saver(self) -> FileSaverTool:
         """Method that defines and returns the FileSaverTool."""
-        return FileSaverTool()
+        return FileSaverTool(output_store=self.output_store)
 
 
 #-------------------------
@@ -35,6 +49,7 @@ class Mycrew():
     def problem_setter(self) -> Agent:
         return Agent(
             config=self.agents_config['problem_setter'], # type: ignore[index]
+            llm=self.llm,
             verbose=True
         )
 
@@ -42,6 +57,7 @@ class Mycrew():
     def coder(self) -> Agent:
         return Agent(
             config=self.agents_config['coder'], # type: ignore[index]
+            llm=self.llm,
             verbose=True
         )
 
@@ -49,6 +65,7 @@ class Mycrew():
     def reviewer(self) -> Agent:
         return Agent(
             config=self.agents_config['reviewer'], # type: ignore[index]
+            llm=self.llm,
             verbose=True
         )
 
@@ -73,17 +90,23 @@ class Mycrew():
     def generate_code(self) -> Task:
         return Task(
             config=self.tasks_config['generate_code'], # type: ignore[index]
-            output_file='outputs/solution.py'
+            callback=self.save_output('solution.py')
         )
 
     @task
     def review_code(self) -> Task:
         return Task(
             config=self.tasks_config['review_code'], # type: ignore[index]
-            output_file='outputs/review.txt'
+            callback=self.save_output('review.txt')
         )
 
 
+    @after_kickoff
+    def close_outputs(self, output):
+        """fsyncs the run's outputs and points outputs/latest at them."""
+        self.output_store.close()
+        return output
+
     @crew
     def crew(self) -> Crew:
         """Creates the Mycrew crew"""
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from crewai import BaseLLM
+from crewai.utilities.llm_utils import create_llm
+
+from mycrew.rate_limiter import RateLimitedLLM
+
+# --- Defaults (overridable through the environment) ---
+# LLM_MODE: "live" calls the model, "record" calls it and appends every
+# completion to the cassette, "replay" answers from the cassette offline.
+# MODEL is the same variable crewAI reads for agents without an explicit llm.
+DEFAULT_MODEL = os.getenv("MODEL")
+DEFAULT_LLM_MODE = os.getenv("LLM_MODE", "live")
+DEFAULT_CASSETTE = os.getenv("LLM_CASSETTE", "llm_cassette.jsonl")
+# Seconds of synthetic latency per replayed call, or "recorded" to sleep for
+# the duration measured at record time (scaled by LLM_LATENCY_SCALE)
+DEFAULT_LATENCY = os.getenv("LLM_LATENCY", "recorded")
+DEFAULT_LATENCY_SCALE = float(os.getenv("LLM_LATENCY_SCALE", "1.0"))
+
+LLM_MODES = ("live", "record", "replay")
+
+
+def _normalize_messages(messages):
+    if isinstance(messages, str):
+        return [{"role": "user", "content": messages}]
+    return [{"role": m.get("role", "user"), "content": str(m.get("content", ""))} for m in messages]
+
+
+def _lane_for(from_agent):
+    """Calls are grouped into lanes by agent role (replay falls back to a lane's entries in order)."""
+    role = getattr(from_agent, "role", None)
+    return " ".join(str(role).split()) if role else "default"
+
+
+class Cassette:
+    """
+    JSONL file of recorded completions, one entry per line:
+        {"lane": ..., "key": ..., "response": ..., "duration": ...}
+
+    Lookups match on `key` (a hash of the lane and the full prompt) first.
+    On a miss the lane's entries are replayed in recorded order, cycling, so
+    a hand-written cassette can hold a single key-less entry per agent role
+    and small prompt drift never breaks a replay.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._by_lane = {}
+        self._cursors = {}
+        self.stats = {"calls": 0, "hits": 0, "fallbacks": 0, "llm_seconds": 0.0}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    def _index(self, entry):
+        if entry.get("key"):
+            self._by_key[entry["key"]] = entry
+        self._by_lane.setdefault(entry.get("lane", "default"), []).append(entry)
+
+    def lookup(self, lane, key):
+        with self._lock:
+            self.stats["calls"] += 1
+            entry = self._by_key.get(key)
+            if entry is not None:
+                self.stats["hits"] += 1
+                return entry
+            entries = self._by_lane.get(lane) or self._by_lane.get("default")
+            if not entries:
+                raise KeyError(f"No recorded completion for lane '{lane}' in {self.path}")
+            cursor = self._cursors.get(lane, 0)
+            self._cursors[lane] = cursor + 1
+            self.stats["fallbacks"] += 1
+            return entries[cursor % len(entries)]
+
+    def record(self, entry):
+        with self._lock:
+            self._index(entry)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def add_llm_time(self, seconds):
+        with self._lock:
+            self.stats["llm_seconds"] += seconds
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"calls": 0, "hits": 0, "fallbacks": 0, "llm_seconds": 0.0}
+            self._cursors.clear()
+
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path=DEFAULT_CASSETTE) -> Cassette:
+    """Returns the process-wide cassette for a path (all LLMs share one file)."""
+    path = os.path.abspath(path)
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+class ReplayLLM(BaseLLM):
+    """
+    Offline stand-in for a crewAI LLM.
+
+    In "replay" mode every call is answered from the cassette after a
+    synthetic delay. In "record" mode calls go to `delegate` and the
+    completions are appended to the cassette. Native function calling is
+    reported as unsupported in both modes, so agents use the text (ReAct)
+    protocol and recorded transcripts replay identically.
+    """
+
+    def __init__(self, model, cassette, mode="replay", delegate=None,
+                 latency=DEFAULT_LATENCY, latency_scale=DEFAULT_LATENCY_SCALE, **kwargs):
+        super().__init__(model=model, **kwargs)
+        if mode == "record" and delegate is None:
+            raise ValueError("ReplayLLM in record mode needs a delegate LLM.")
+        self.cassette = cassette
+        self.mode = mode
+        self.delegate = delegate
+        self.latency = latency
+        self.latency_scale = latency_scale
+
+    def _delay(self, entry):
+        if self.latency == "recorded":
+            return float(entry.get("duration", 0.0)) * self.latency_scale
+        return float(self.latency)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, **kwargs):
+        lane = _lane_for(from_agent)
+        normalized = _normalize_messages(messages)
+        key = hashlib.sha256(json.dumps([lane, normalized], sort_keys=True).encode("utf-8")).hexdigest()
+
+        start = time.perf_counter()
+        if self.mode == "record":
+            self.delegate.stop = self.stop
+            response = str(self.delegate.call(messages, callbacks=callbacks, from_task=from_task, from_agent=from_agent))
+            duration = time.perf_counter() - start
+            self.cassette.record({"lane": lane, "key": key, "response": response, "duration": round(duration, 3)})
+        else:
+            entry = self.cassette.lookup(lane, key)
+            time.sleep(self._delay(entry))
+            response = entry["response"]
+        self.cassette.add_llm_time(time.perf_counter() - start)
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return 1_000_000
+
+
+def make_llm(model=DEFAULT_MODEL):
+    """
+    Creates the LLM for the crew's agents according to LLM_MODE: crewAI's
+    usual MODEL-based LLM when live, or a ReplayLLM that records to /
+    replays from the LLM_CASSETTE file. Every call goes through the model's
+    process-wide rate limiter (see rate_limiter.py).
+    """
+    mode = DEFAULT_LLM_MODE
+    if mode not in LLM_MODES:
+        raise ValueError(f"LLM_MODE must be one of {LLM_MODES}, got '{mode}'.")
+    if mode == "live":
+        return RateLimitedLLM(create_llm(model))
+
+    cassette = get_cassette(DEFAULT_CASSETTE)
+    delegate = create_llm(model) if mode == "record" else None
+    return RateLimitedLLM(ReplayLLM(model=model or "replay", cassette=cassette, mode=mode, delegate=delegate))
+
+
+class LazyLLM:
+    """
+    Crew class attribute that defers make_llm(model) to the first
+    `self.<name>` access, so importing a crew module builds no LLM (and
+    loads no provider SDK). The LLM is then shared like a plain class
+    attribute would be.
+    """
+
+    def __init__(self, model=DEFAULT_MODEL):
+        self.model = model
+        self._llm = None
+        self._lock = threading.Lock()
+
+    def __get__(self, instance, owner=None):
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    self._llm = make_llm(self.model)
+        return self._llm
@@ -1,7 +1,8 @@
 from crewai.tools import BaseTool
-from typing import Type
+from typing import Any, Type
 from pydantic import BaseModel, Field
-import os
+
+from mycrew.output_store import OutputStore
 
 class FileSaverInput(BaseModel):
     """Input schema for filesavertool."""
@@ -15,13 +16,12 @@ class FileSaverTool(BaseTool):
 	"Use this tool whenever you need to store code (solution.py) or feedback (review.txt)."
     )
     args_schema: Type[BaseModel] = FileSaverInput
+    # The crew's per-run output directory (outputs/<run id>/); files are replaced atomically
+    output_store: Any = Field(default_factory=OutputStore, exclude=True)
 
     def _run(self, filename: str, content: str) -> str:
         try:
-            os.makedirs("outputs", exist_ok=True)
-            filepath = os.path.join("outputs", filename)
-            with open(filepath, "w", encoding="utf-8") as f:
-                 f.write(content)
+            filepath = self.output_store.write(filename, content)
             return f"saved to {filepath}"
         except Exception as e:
             return f"failed to save file {filename}: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+Benchmark: end-to-end Mycrew1 throughput on replayed LLM calls.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--cassette benchmarks/cassettes/mycrew1.jsonl]
+        [--latency recorded|SECONDS] [--latency-scale 0.1] [--concurrency 1 2 4 8] [--runs 8]
+
+Every LLM call is answered from the cassette (LLM_MODE=replay), so the
+benchmark runs offline and in CI. Record a cassette from live runs with
+LLM_MODE=record LLM_CASSETTE=<path>; the bundled one holds a single
+completion per agent role. Reports:
+
+- per-stage wall time (tasks) for one run at concurrency 1,
+- overhead outside LLM calls: the same run with zero LLM latency,
+- runs per second at each concurrency level.
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+import threading
+import contextlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+INPUTS = {"preferred_region": "europe", "trip_type": "budget"}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", default=os.path.join(HERE, "cassettes", "mycrew1.jsonl"))
+    parser.add_argument("--latency", default="recorded", help="'recorded' or fixed seconds per LLM call")
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="multiplier for recorded latencies")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--runs", type=int, default=8, help="crew runs per concurrency level")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    """Must run before mycrew1 is imported: the crew builds its LLM at import time."""
+    os.environ.update({
+        "LLM_MODE": "replay",
+        "LLM_CASSETTE": os.path.abspath(args.cassette),
+        "LLM_LATENCY": args.latency,
+        "LLM_LATENCY_SCALE": str(args.latency_scale),
+    })
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    os.environ.setdefault("CREWAI_TESTING", "true")
+
+
+def _task_events():
+    try:
+        from crewai.events import crewai_event_bus, TaskCompletedEvent, TaskStartedEvent
+    except ImportError:  # crewAI < 1.0
+        from crewai.utilities.events import crewai_event_bus, TaskCompletedEvent, TaskStartedEvent
+    return crewai_event_bus, TaskStartedEvent, TaskCompletedEvent
+
+
+class StageTimer:
+    """Collects per-task wall time of every crew run from crewAI task events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self.durations = defaultdict(list)
+
+    def install(self):
+        event_bus, started_event, completed_event = _task_events()
+
+        @event_bus.on(started_event)
+        def _started(source, event):
+            with self._lock:
+                self._started[id(source)] = event.timestamp
+
+        @event_bus.on(completed_event)
+        def _completed(source, event):
+            with self._lock:
+                started = self._started.pop(id(source), None)
+                if started is not None:
+                    self.durations[source.name].append((event.timestamp - started).total_seconds())
+
+    def reset(self):
+        with self._lock:
+            self._started.clear()
+            self.durations.clear()
+
+
+def run_crews(runs, concurrency):
+    """Runs `runs` crews, `concurrency` at a time. Returns wall seconds."""
+    from mycrew1.crew import Mycrew1
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda _: Mycrew1().crew().kickoff(inputs=INPUTS), range(runs)))
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+    os.chdir(tempfile.mkdtemp(prefix="bench-pipeline-"))  # each crew writes to outputs/<run id>/
+
+    from mycrew1.crew import Mycrew1
+
+    llm = Mycrew1.llm.delegate  # the ReplayLLM behind the rate limiter
+    cassette = llm.cassette
+    timer = StageTimer()
+    timer.install()
+
+    # --- 1. Per-stage wall time, with and without LLM latency ---
+    columns = {}
+    for label, latency in (("wall (s)", args.latency), ("no-LLM (s)", 0.0)):
+        llm.latency = latency
+        timer.reset()
+        cassette.reset_stats()
+        total = run_crews(1, 1)
+        time.sleep(0.2)  # event handlers may run on crewAI's executor threads
+        columns[label] = ({stage: sum(d) for stage, d in timer.durations.items()}, total, dict(cassette.stats))
+
+    (stages, total, stats), (overhead_stages, overhead_total, _) = columns["wall (s)"], columns["no-LLM (s)"]
+    print(f"cassette: {cassette.path}  latency: {args.latency} x{args.latency_scale}")
+    print(f"LLM calls per run: {stats['calls']} ({stats['hits']} exact, {stats['fallbacks']} by agent role), "
+          f"LLM time {stats['llm_seconds']:.2f}s")
+    print(f"\n{'stage':<22}{'wall (s)':>10}{'no-LLM (s)':>12}")
+    for stage, seconds in stages.items():
+        print(f"{stage:<22}{seconds:>10.3f}{overhead_stages.get(stage, 0.0):>12.3f}")
+    print(f"{'total':<22}{total:>10.3f}{overhead_total:>12.3f}")
+
+    # --- 2. Throughput at each concurrency level ---
+    llm.latency = args.latency
+    print(f"\n{'concurrency':>11}{'runs':>6}{'wall (s)':>10}{'runs/s':>9}")
+    for concurrency in args.concurrency:
+        wall = run_crews(args.runs, concurrency)
+        print(f"{concurrency:>11}{args.runs:>6}{wall:>10.2f}{args.runs / wall:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
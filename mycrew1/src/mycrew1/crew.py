@@ -1,7 +1,9 @@
 from mycrew1.tools.custom_tool import FileWriterTool
+from mycrew1.output_store import OutputStore
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task, tool
+from crewai.project import CrewBase, after_kickoff, agent, crew, task, tool
 from crewai.agents.agent_builder.base_agent import BaseAgent
+from mycrew1.llm_replay import LazyLLM
 from typing import List
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
@@ -15,6 +17,18 @@ class Mycrew1():
     agents: List[BaseAgent]
     tasks: List[Task]
 
+    # The MODEL env var's LLM (a replay LLM when LLM_MODE=record/replay), behind the model's rate limiter,
+    # built on first use
+    llm = LazyLLM()
+
+    def __init__(self, run_id=None):
+        # Per-run outputs (outputs/<run id>/): crews running in parallel never share a file
+        self.output_store = OutputStore(run_id=run_id)
+
+    def save_output(self, filename):
+        """Task callback writing the task's final answer to `filename` in this run's directory."""
+        return lambda output: self.output_store.write(filename, output.raw)
+
     # Learn more about YAML configuration files here:
     # Agents: https://docs.crewai.com/concepts/agents#yaml-configuration-recommended
     # Tasks: https://docs.crewai.com/concepts/tasks#yaml-configuration-recommended
@@ -29,7 +43,7 @@ class Mycrew1():
     @tool
     def file_writer_tool(self) -> FileWriterTool:
         """Tool for saving the generated trip plan to file """
-        return FileWriterTool()
+        return FileWriterTool(output_store=self.output_store)
     
 
 #--------------------------
@@ -41,6 +55,7 @@ class Mycrew1():
     def destination_expert(self) -> Agent:
         return Agent(
             config=self.agents_config['destination_expert'], # type: ignore[index]
+            llm=self.llm,
             verbose=True
         )
 
@@ -48,6 +63,7 @@ class Mycrew1():
     def itinerary_planner(self) -> Agent:
         return Agent(
             config=self.agents_config['itinerary_planner'], # type: ignore[index]
+            llm=self.llm,
             verbose=True
         )
     
@@ -55,6 +71,7 @@ class Mycrew1():
     def budget_advisor(self) -> Agent:
         return Agent(
             config=self.agents_config['budget_advisor'],
+            llm=self.llm,
             verbose=True
         )
 
@@ -84,10 +101,17 @@ class Mycrew1():
     def estimate_budget(self) -> Task:
         return Task(
             config=self.tasks_config['estimate_budget'],
-            output_file='trip_plan.txt'
+            # The tool writes the formatted trip_plan.txt; this keeps the agent's raw final answer
+            callback=self.save_output('estimate_budget.txt')
         )
 
 
+    @after_kickoff
+    def close_outputs(self, output):
+        """fsyncs the run's outputs and points outputs/latest at them."""
+        self.output_store.close()
+        return output
+
     @crew
     def crew(self) -> Crew:
         """Creates the Mycrew1 crew"""
@@ -0,0 +1,247 @@
+import io
+import os
+import gzip
+import time
+import uuid
+import atexit
+import threading
+
+# --- Defaults (overridable through the environment) ---
+# Every run writes into <OUTPUT_ROOT>/<run id>/
+DEFAULT_OUTPUT_ROOT = os.getenv("OUTPUT_ROOT", "outputs")
+# "gzip" stores text outputs as <name>.gz ("" = uncompressed)
+DEFAULT_OUTPUT_COMPRESS = os.getenv("OUTPUT_COMPRESS", "")
+# Files committed per fsync batch: 1 = fsync every file before it is renamed
+# into place, 0 = never fsync (rename only; atomic, but not crash-durable)
+DEFAULT_OUTPUT_FSYNC_BATCH = int(os.getenv("OUTPUT_FSYNC_BATCH", "16"))
+
+# Formats that are compressed already; OUTPUT_COMPRESS leaves them alone
+_PRECOMPRESSED = (".gz", ".zip", ".docx", ".xlsx", ".pptx", ".png", ".jpg", ".jpeg")
+
+# Temporary files are created with this mode, which the kernel narrows by the
+# process umask, so outputs get the usual permissions (mkstemp would give 0600)
+_FILE_MODE = 0o666
+_TEMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+
+def new_run_id():
+    """A sortable, collision-free run id: '20250101-120000-<pid>-<random>'."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def _create_temp(directory):
+    """Creates a new, empty '.tmp-*' file in `directory` and returns (fd, path)."""
+    while True:
+        path = os.path.join(directory, f".tmp-{uuid.uuid4().hex}")
+        try:
+            return os.open(path, _TEMP_FLAGS, _FILE_MODE), path
+        except FileExistsError:
+            continue
+
+
+def _fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows, where directories cannot be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def fsync_paths(paths):
+    """fsyncs each file in `paths`, then each of their directories (so the renames are durable too)."""
+    directories = set()
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            continue  # replaced or removed since it was written
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        directories.add(os.path.dirname(path) or ".")
+    for directory in directories:
+        _fsync_directory(directory)
+
+
+# --- 1. Atomic file ---
+class AtomicFile:
+    """
+    Context manager writing `path` through a temporary file in the same
+    directory that is renamed over `path` only when the block succeeds.
+    Readers see either the previous file or the complete new one, never a
+    partial write, and a crash or exception leaves no truncated output.
+
+    With `compress`, the data is gzipped and `.gz` is appended to `path`.
+    With `fsync`, the data is flushed to disk before the rename; otherwise
+    `on_commit(path)` is called after it, so a caller can fsync in batches.
+    """
+
+    def __init__(self, path, mode="w", compress=False, fsync=True, on_commit=None):
+        if mode not in ("w", "wb"):
+            raise ValueError(f"AtomicFile mode must be 'w' or 'wb', got '{mode}'.")
+        self.compress = compress and not path.lower().endswith(_PRECOMPRESSED)
+        self.path = path + ".gz" if self.compress else path
+        self.mode = mode
+        self.fsync = fsync
+        self.on_commit = on_commit
+
+    def __enter__(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = _create_temp(directory)
+        self._raw = os.fdopen(fd, "wb")
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb", mtime=0, filename="") if self.compress else None
+        stream = self._gzip or self._raw
+        self._text = io.TextIOWrapper(stream, encoding="utf-8") if self.mode == "w" else None
+        return self._text or stream
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                if self._text:
+                    self._text.flush()
+                    self._text.detach()  # leaves closing the binary stream to us
+                if self._gzip:
+                    self._gzip.close()  # writes the gzip trailer; the raw file stays open
+                self._raw.flush()
+                if self.fsync:
+                    os.fsync(self._raw.fileno())
+            self._raw.close()
+            if exc_type is None:
+                os.replace(self._tmp_path, self.path)
+        except BaseException:
+            self._discard()
+            raise
+        if exc_type is not None:
+            self._discard()
+            return False
+        if self.fsync:
+            _fsync_directory(os.path.dirname(self.path) or ".")
+        if self.on_commit:
+            self.on_commit(self.path)
+        return False
+
+    def _discard(self):
+        if not self._raw.closed:
+            self._raw.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+def atomic_write(path, data, compress=False, fsync=True):
+    """
+    Atomically replaces `path` with `data` (str or bytes).
+
+    Returns:
+        The path written (with '.gz' appended when compressed).
+    """
+    atomic = AtomicFile(path, "wb" if isinstance(data, bytes) else "w", compress=compress, fsync=fsync)
+    with atomic as f:
+        f.write(data)
+    return atomic.path
+
+
+# --- 2. Per-run output namespace ---
+class OutputStore:
+    """
+    A run's output directory, <root>/<run id>/ (created on the first
+    write), written only through AtomicFile, so concurrent runs in the
+    same working directory never share a file and a crashed run never
+    leaves a truncated one.
+
+    fsync is batched: every `fsync_batch` committed files (and on `flush` /
+    `close`) the pending files and their directories are synced together,
+    instead of paying one disk flush per file.
+    """
+
+    def __init__(self, root=DEFAULT_OUTPUT_ROOT, run_id=None, compress=DEFAULT_OUTPUT_COMPRESS,
+                 fsync_batch=DEFAULT_OUTPUT_FSYNC_BATCH):
+        if compress not in ("", None, False, "gzip"):
+            raise ValueError(f"OUTPUT_COMPRESS must be '' or 'gzip', got '{compress}'.")
+        self.root = root
+        self.run_id = run_id or new_run_id()
+        self.run_dir = os.path.join(root, self.run_id)
+        self.compress = bool(compress)
+        self.fsync_batch = fsync_batch
+        self.written = []  # every committed path, in commit order
+        self._pending = []
+        self._lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.close)
+
+    def __deepcopy__(self, memo):
+        return self  # a handle on one run directory; copies (e.g. of a tool) share it
+
+    def path(self, name):
+        """
+        Resolves `name` (e.g. 'trip_plan.txt' or 'drafts/itinerary.txt')
+        inside the run directory.
+
+        Raises:
+            ValueError: if `name` is absolute or escapes the run directory.
+        """
+        normalized = os.path.normpath(name)
+        if os.path.isabs(normalized) or normalized == ".." or normalized.startswith(".." + os.sep):
+            raise ValueError(f"Output name '{name}' must stay inside the run directory.")
+        return os.path.join(self.run_dir, normalized)
+
+    def opener(self, path, mode="w"):
+        """An AtomicFile for `path` (already resolved) that joins this store's fsync batches."""
+        return AtomicFile(path, mode, compress=self.compress, fsync=self.fsync_batch == 1,
+                          on_commit=self._committed)
+
+    def open(self, name, mode="w"):
+        return self.opener(self.path(name), mode)
+
+    def write(self, name, data):
+        """
+        Atomically writes `data` (str or bytes) to `name` in the run directory.
+
+        Returns:
+            The path written.
+        """
+        atomic = self.open(name, "wb" if isinstance(data, bytes) else "w")
+        with atomic as f:
+            f.write(data)
+        return atomic.path
+
+    def _committed(self, path):
+        with self._lock:
+            self.written.append(path)
+            if self.fsync_batch <= 1:
+                return
+            self._pending.append(path)
+            if len(self._pending) < self.fsync_batch:
+                return
+            pending, self._pending = self._pending, []
+        fsync_paths(pending)
+
+    def flush(self):
+        """fsyncs every file committed since the last batch."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            fsync_paths(pending)
+
+    def close(self):
+        """Flushes pending fsyncs and points <root>/latest at this run (where symlinks are supported)."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self.flush()
+        if self.written:
+            link = os.path.join(self.root, "latest")
+            tmp_link = os.path.join(self.root, f".tmp-latest-{uuid.uuid4().hex[:8]}")
+            try:
+                os.symlink(self.run_id, tmp_link, target_is_directory=True)
+                os.replace(tmp_link, link)
+            except (OSError, NotImplementedError):
+                if os.path.lexists(tmp_link):
+                    os.remove(tmp_link)
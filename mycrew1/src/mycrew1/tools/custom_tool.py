@@ -1,7 +1,8 @@
 from crewai.tools import BaseTool
-from typing import Type
+from typing import Any, Type
 from pydantic import BaseModel, Field
-import os
+
+from mycrew1.output_store import OutputStore
 
 class FileWriterInput(BaseModel):
     """Input schema for FileWriterTool"""
@@ -11,16 +12,14 @@ class FileWriterTool(BaseTool):
     name: str = "file_writer_tool"
     description: str = "Writes the final combined travel plan (itinerary + budget) into trip_plan.txt"
     args_schema: Type[BaseModel] = FileWriterInput
+    # The crew's per-run output directory (outputs/<run id>/); files are replaced atomically
+    output_store: Any = Field(default_factory=OutputStore, exclude=True)
 
     def _run(self, content: str) -> str:
         try:
-            os.makedirs("outputs", exist_ok=True)
-            file_path =  os.path.join("outputs", "trip_plan.txt")
-            
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write("++++++++++ Final Travel Plan +++++++++++ \n\n")
-                f.write(content.strip() + "\n")
-            
+            file_path = self.output_store.write(
+                "trip_plan.txt", "++++++++++ Final Travel Plan +++++++++++ \n\n" + content.strip() + "\n"
+            )
             return f"saved to {file_path}"
 
         except Exception as e:
@@ -0,0 +1,115 @@
+"""
+Benchmark: concurrent MCQ/T/F crews vs. running both generation tasks in
+one crew, against a stubbed LLM with a fixed per-call latency.
+
+Usage:
+    python benchmarks/bench_parallel_generation.py [--mcq-latency 2.0] [--tf-latency 1.5] [--runs 3]
+
+The stub answers every call after sleeping, so wall time is dominated by
+"LLM" latency exactly as it is against a real endpoint. The sequential
+row is a lower bound for the old Process.hierarchical crew, which ran the
+same two tasks one after the other plus manager LLM round-trips.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from crewai.llms.base_llm import BaseLLM  # noqa: E402
+
+from quiz_generator.crews.quiz_generation.quiz_generation import QuizGenerationCrew  # noqa: E402
+
+MCQ_ANSWER = [{"question": "What is X?", "options": ["A", "B", "C", "D"], "correct_answer": "B"}]
+TF_ANSWER = [{"question": "X is a fact.", "answer": True}]
+
+BRIEF = """
+## Key Concepts & Definitions
+- X: a concept worth quizzing about.
+## Key Facts & Verifiable Data
+- X was introduced in 2020.
+"""
+
+
+class StubLLM(BaseLLM):
+    """Answers after a fixed delay; MCQ prompts and T/F prompts get their own latency."""
+
+    def __init__(self, mcq_latency, tf_latency):
+        super().__init__(model="stub/quiz-generator")
+        self.mcq_latency = mcq_latency
+        self.tf_latency = tf_latency
+        self.calls = 0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        self.calls += 1
+        prompt = messages if isinstance(messages, str) else "\n".join(str(m.get("content", "")) for m in messages)
+        if "multiple-choice" in prompt:
+            time.sleep(self.mcq_latency)
+            answer = MCQ_ANSWER
+        else:
+            time.sleep(self.tf_latency)
+            answer = TF_ANSWER
+        return f"Thought: I now know the final answer\nFinal Answer: {json.dumps(answer)}"
+
+    def supports_function_calling(self):
+        return False
+
+    def get_context_window_size(self):
+        return 32_000
+
+
+def run_sequential(inputs):
+    """Both tasks in one crew, one after the other."""
+    return QuizGenerationCrew().crew().kickoff(inputs=inputs).tasks_output
+
+
+async def run_parallel(inputs):
+    """The flow's path: MCQ and T/F crews kicked off concurrently."""
+    results = await asyncio.gather(
+        asyncio.to_thread(lambda: QuizGenerationCrew().mcq_crew().kickoff(inputs=inputs)),
+        asyncio.to_thread(lambda: QuizGenerationCrew().tf_crew().kickoff(inputs=inputs)),
+    )
+    return [item for result in results for item in result.tasks_output]
+
+
+def timed(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        outputs = fn()
+        timings.append(time.perf_counter() - start)
+        assert len(outputs) == 2, f"expected 2 task outputs, got {len(outputs)}"
+    return min(timings), sum(timings) / len(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mcq-latency", type=float, default=2.0)
+    parser.add_argument("--tf-latency", type=float, default=1.5)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    llm = StubLLM(args.mcq_latency, args.tf_latency)
+    QuizGenerationCrew.question_llm = llm
+    inputs = {"content_brief": BRIEF, "mcq_count": 7, "tf_count": 7}
+
+    rows = [
+        ("sequential (one crew)", lambda: run_sequential(inputs)),
+        ("parallel (two crews)", lambda: asyncio.run(run_parallel(inputs))),
+    ]
+    print(f"stub latency: mcq={args.mcq_latency:.2f}s tf={args.tf_latency:.2f}s "
+          f"(sum {args.mcq_latency + args.tf_latency:.2f}s, max {max(args.mcq_latency, args.tf_latency):.2f}s)")
+    print(f"{'path':<24}{'best (s)':>10}{'mean (s)':>10}")
+    for name, fn in rows:
+        best, mean = timed(fn, args.runs)
+        print(f"{name:<24}{best:>10.2f}{mean:>10.2f}")
+    print(f"stub LLM calls: {llm.calls}")
+
+
+if __name__ == "__main__":
+    main()
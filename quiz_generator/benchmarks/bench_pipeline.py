@@ -0,0 +1,166 @@
+"""
+Benchmark: end-to-end QuizGeneratorFlow throughput on replayed LLM calls.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--cassette benchmarks/cassettes/quiz_generator_flow.jsonl]
+        [--latency recorded|SECONDS] [--latency-scale 0.1] [--concurrency 1 2 4 8] [--runs 8]
+
+Every LLM call is answered from the cassette (LLM_MODE=replay), so the
+benchmark runs offline and in CI. Record a cassette from live runs with
+LLM_MODE=record LLM_CASSETTE=<path>; the bundled one holds a single
+completion per agent role. Reports:
+
+- per-stage wall time (flow methods) for one run at concurrency 1,
+- overhead outside LLM calls: the same run with zero LLM latency,
+- runs per second at each concurrency level.
+
+Brief cache and crew memo are disabled so every run does the full work.
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+import threading
+import contextlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", default=os.path.join(HERE, "cassettes", "quiz_generator_flow.jsonl"))
+    parser.add_argument("--latency", default="recorded", help="'recorded' or fixed seconds per LLM call")
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="multiplier for recorded latencies")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--runs", type=int, default=8, help="flow runs per concurrency level")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args, work_dir):
+    """Must run before quiz_generator is imported: crews build their LLMs at import time."""
+    os.environ.update({
+        "LLM_MODE": "replay",
+        "LLM_CASSETTE": os.path.abspath(args.cassette),
+        "LLM_LATENCY": args.latency,
+        "LLM_LATENCY_SCALE": str(args.latency_scale),
+        "BRIEF_CACHE_DIR": os.path.join(work_dir, ".brief_cache"),
+        "CREW_MEMO_DIR": os.path.join(work_dir, ".crew_memo"),
+        "CREW_MEMO_MAX_BYTES": "0",
+        # Every run replays the same questions for a new URL: with the index on,
+        # all runs after the first would drop every question and fail
+        "QUESTION_INDEX_DB": "",
+        # The bench URLs are not served: skip the bank's scrape of each page
+        "QUESTION_BANK_DIR": "",
+    })
+    os.environ.setdefault("GEMINI_API_KEY", "offline")
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    os.environ.setdefault("CREWAI_TESTING", "true")
+
+
+class StageTimer:
+    """Collects per-method wall time of every flow run from crewAI flow events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self.durations = defaultdict(list)
+
+    def install(self):
+        from crewai.events import crewai_event_bus, MethodExecutionFinishedEvent, MethodExecutionStartedEvent
+
+        @crewai_event_bus.on(MethodExecutionStartedEvent)
+        def _started(source, event):
+            with self._lock:
+                self._started[(id(source), event.method_name)] = event.timestamp
+
+        @crewai_event_bus.on(MethodExecutionFinishedEvent)
+        def _finished(source, event):
+            with self._lock:
+                started = self._started.pop((id(source), event.method_name), None)
+                if started is not None:
+                    self.durations[event.method_name].append((event.timestamp - started).total_seconds())
+
+    def reset(self):
+        with self._lock:
+            self._started.clear()
+            self.durations.clear()
+
+
+def replay_llms():
+    from quiz_generator.crews.content_acquistion.content_acquistion import ContentAcquistionCrew
+    from quiz_generator.crews.quiz_generation.quiz_generation import QuizGenerationCrew
+    from quiz_generator.crews.review_and_format.review_and_format import ReviewAndFormatCrew
+    from quiz_generator.llm_replay import ReplayLLM
+
+    return [
+        value
+        for crew_cls in (ContentAcquistionCrew, QuizGenerationCrew, ReviewAndFormatCrew)
+        for value in vars(crew_cls).values()
+        if isinstance(value, ReplayLLM)
+    ]
+
+
+def run_flows(runs, concurrency):
+    """Runs `runs` flows, `concurrency` at a time. Returns wall seconds."""
+    from quiz_generator.main import QuizGeneratorFlow
+
+    def run_one(i):
+        payload = {"url": f"https://example.com/bench/{time.time_ns()}/{i}"}
+        QuizGeneratorFlow().kickoff(inputs={"crewai_trigger_payload": payload})
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(run_one, range(runs)))
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix="bench-pipeline-")
+    configure_environment(args, work_dir)
+    os.chdir(work_dir)  # the flow writes its outputs under quiz_outputs/ in the working directory
+
+    from quiz_generator.llm_replay import get_cassette
+
+    cassette = get_cassette(os.environ["LLM_CASSETTE"])
+    timer = StageTimer()
+    timer.install()
+    llms = replay_llms()
+
+    # --- 1. Per-stage wall time, with and without LLM latency ---
+    columns = {}
+    for label, latency in (("wall (s)", args.latency), ("no-LLM (s)", 0.0)):
+        for llm in llms:
+            llm.latency = latency
+        timer.reset()
+        cassette.reset_stats()
+        total = run_flows(1, 1)
+        time.sleep(0.2)  # event handlers run on crewAI's executor threads
+        columns[label] = ({stage: sum(d) for stage, d in timer.durations.items()}, total, dict(cassette.stats))
+
+    (stages, total, stats), (overhead_stages, overhead_total, _) = columns["wall (s)"], columns["no-LLM (s)"]
+    print(f"cassette: {cassette.path}  latency: {args.latency} x{args.latency_scale}")
+    print(f"LLM calls per run: {stats['calls']} ({stats['hits']} exact, {stats['fallbacks']} by agent role), "
+          f"LLM time {stats['llm_seconds']:.2f}s")
+    print(f"\n{'stage':<22}{'wall (s)':>10}{'no-LLM (s)':>12}")
+    for stage, seconds in stages.items():
+        print(f"{stage:<22}{seconds:>10.3f}{overhead_stages.get(stage, 0.0):>12.3f}")
+    print(f"{'total':<22}{total:>10.3f}{overhead_total:>12.3f}")
+
+    # --- 2. Throughput at each concurrency level ---
+    for llm in llms:
+        llm.latency = args.latency
+    print(f"\n{'concurrency':>11}{'runs':>6}{'wall (s)':>10}{'runs/s':>9}")
+    for concurrency in args.concurrency:
+        wall = run_flows(args.runs, concurrency)
+        print(f"{concurrency:>11}{args.runs:>6}{wall:>10.2f}{args.runs / wall:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
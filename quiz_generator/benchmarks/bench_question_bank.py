@@ -0,0 +1,144 @@
+"""
+Benchmark: regenerating the quiz of a changed page from scratch vs. the
+question bank's incremental run over the changed blocks only.
+
+Usage:
+    python benchmarks/bench_question_bank.py [--sections 200] [--changed 0.05]
+        [--latency recorded|SECONDS] [--latency-scale 0.1]
+
+Serves a synthetic documentation page (--sections paragraphs, four of them
+backing the cassette's questions) and runs QuizGeneratorFlow on replayed
+LLM calls (see bench_pipeline.py) four times: the first run on the page,
+a run after editing --changed of its other paragraphs, a run on the
+unchanged page, and, as the baseline, a run on the edited page under a URL
+the bank has never seen. Reports each run's bank mode, LLM calls, wall
+time and the (estimated) tokens of page content the crews had to read:
+the whole page for a full run, the changed blocks for an incremental one.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from bench_pipeline import configure_environment, replay_llms  # noqa: E402
+
+# Paragraphs the cassette's MCQ and T/F questions are attributed to
+ANCHORS = [
+    "Prompt injection is input that alters an LLM's behaviour or output in unintended ways.",
+    "Indirect injection hides instructions in external content such as web pages or files the model reads.",
+    "Prompt injection is ranked LLM01 in the OWASP Top 10 for LLM Applications.",
+    "Fine-tuning and retrieval augmented generation do not fully prevent prompt injection.",
+]
+WORDS = (
+    "deployment cluster replica config rollout metric alert dashboard quota region backup snapshot "
+    "restore secret rotation ingress certificate latency budget capacity shard migration schema"
+).split()
+
+
+def paragraph(i, revision=0):
+    words = " ".join(random.Random(i * 7919 + revision).sample(WORDS, 12))
+    return f"Section {i} of the operations guide covers {words} for revision {revision}."
+
+
+def page(sections, revisions):
+    parts = ["<html><body><main><h1>Operations guide</h1>"]
+    for i in range(sections):
+        text = ANCHORS[i // (sections // len(ANCHORS))] if i % (sections // len(ANCHORS)) == 0 else \
+            paragraph(i, revisions.get(i, 0))
+        parts.append(f"<h2>Section {i}</h2><p>{text}</p>")
+    parts.append("</main></body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+def serve(pages):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = pages.get(self.path)
+            self.send_response(200 if body else 404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_flow(url, cassette):
+    from quiz_generator.main import QuizGeneratorFlow
+    from quiz_generator.question_bank import scrape_blocks
+    from quiz_generator.tools.chunking import estimate_tokens
+
+    cassette.reset_stats()
+    flow = QuizGeneratorFlow()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        flow.kickoff(inputs={"crewai_trigger_payload": {"url": url}})
+    elapsed = time.perf_counter() - start
+    if flow.state.bank_mode in ("incremental", "unchanged"):
+        content = flow.state.content_brief
+    else:
+        content = " ".join(scrape_blocks(url))
+    questions = sum(len(flow.state.final_quiz.get(s, [])) for s in ("multiple_choice", "true_false"))
+    return flow.state.bank_mode, cassette.stats["calls"], elapsed, estimate_tokens(content), questions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", default=os.path.join(HERE, "cassettes", "quiz_generator_flow.jsonl"))
+    parser.add_argument("--sections", type=int, default=200)
+    parser.add_argument("--changed", type=float, default=0.05, help="Share of the paragraphs edited between runs.")
+    parser.add_argument("--latency", default="recorded", help="'recorded' or fixed seconds per LLM call")
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="multiplier for recorded latencies")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="bench-question-bank-")
+    configure_environment(args, work_dir)
+    os.environ.update({
+        "QUESTION_BANK_DIR": os.path.join(work_dir, ".question_bank"),
+        "HTTP_CACHE_DIR": os.path.join(work_dir, ".http_cache"),
+    })
+    os.chdir(work_dir)
+
+    from quiz_generator.llm_replay import get_cassette
+
+    cassette = get_cassette(os.environ["LLM_CASSETTE"])
+    for llm in replay_llms():
+        llm.latency = args.latency
+
+    revisions = {}
+    pages = {"/guide": page(args.sections, revisions)}
+    server, base = serve(pages)
+    try:
+        rows = [("first run", run_flow(f"{base}/guide", cassette))]
+        anchor_every = args.sections // len(ANCHORS)
+        editable = [i for i in range(args.sections) if i % anchor_every]
+        for i in random.Random(1).sample(editable, max(1, int(args.changed * args.sections))):
+            revisions[i] = 1
+        pages["/guide"] = pages["/guide-baseline"] = page(args.sections, revisions)
+        rows.append(("after edit", run_flow(f"{base}/guide", cassette)))
+        rows.append(("no change", run_flow(f"{base}/guide", cassette)))
+        rows.append(("baseline", run_flow(f"{base}/guide-baseline", cassette)))
+    finally:
+        server.shutdown()
+
+    print(f"{args.sections} sections, {len(revisions)} edited; latency {args.latency} x{args.latency_scale}")
+    print(f"{'run':<12}{'mode':<13}{'LLM calls':>10}{'wall (s)':>10}{'content tokens':>16}{'questions':>11}")
+    for name, (mode, calls, elapsed, tokens, questions) in rows:
+        print(f"{name:<12}{mode:<13}{calls:>10}{elapsed:>10.2f}{tokens:>16}{questions:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: linear-time text extraction vs. the previous BeautifulSoup walk
+used by WebsiteScrapingTool.
+
+Usage:
+    python benchmarks/bench_text_extraction.py [--sizes 10000 100000 1000000] [--legacy-max-nodes 100000]
+
+Synthetic pages are built from deeply nested <div> chains with a paragraph
+at every level, which is the shape that made the old per-div find_all()
+and nested get_text() calls quadratic. The legacy path is skipped above
+--legacy-max-nodes because it takes hours at 1M nodes.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from quiz_generator.tools.text_extraction import extract_text  # noqa: E402
+
+
+def legacy_extract_text(html):
+    """The BeautifulSoup implementation WebsiteScrapingTool used before text_extraction."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        element.decompose()
+
+    text_parts = []
+    for tag in soup.find_all(['h1', 'h2', 'h3', 'p', 'article', 'main', 'div']):
+        if tag.name == 'div' and len(tag.find_all()) > 5:
+            continue
+        text = tag.get_text(separator=' ', strip=True)
+        if text:
+            text_parts.append(text)
+    return ' '.join(' '.join(text_parts).split())
+
+
+# --- Fixtures ---
+def nested_page(node_count, depth=200):
+    """
+    Builds a page with roughly `node_count` element nodes made of <div>
+    chains `depth` levels deep, each level holding a paragraph.
+    """
+    chain = []
+    for level in range(depth):
+        chain.append(f"<div class='level-{level}'><p>Level {level} explains a fact worth quizzing about.</p>")
+    chain.append("</div>" * depth)
+    chain_html = "".join(chain)
+
+    nodes_per_chain = depth * 2
+    chains = max(1, node_count // nodes_per_chain)
+    return (
+        "<html><head><script>var x = 1;</script></head><body>"
+        "<nav><a href='/'>Home</a></nav><main>"
+        + chain_html * chains
+        + "</main><footer>Footer</footer></body></html>"
+    )
+
+
+def timed(fn, html):
+    start = time.perf_counter()
+    text = fn(html)
+    return time.perf_counter() - start, len(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max-nodes", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    print(f"{'nodes':>10}{'size':>10}{'legacy (s)':>13}{'legacy chars':>14}{'linear (s)':>13}{'linear chars':>14}")
+    for size in args.sizes:
+        html = nested_page(size)
+        linear_time, linear_chars = timed(extract_text, html)
+        if size <= args.legacy_max_nodes:
+            legacy_time, legacy_chars = timed(legacy_extract_text, html)
+            legacy_cols = f"{legacy_time:>13.3f}{legacy_chars:>14}"
+        else:
+            legacy_cols = f"{'skipped':>13}{'-':>14}"
+        print(f"{size:>10}{len(html) / 1e6:>8.1f}MB{legacy_cols}{linear_time:>13.3f}{linear_chars:>14}")
+
+
+if __name__ == "__main__":
+    main()
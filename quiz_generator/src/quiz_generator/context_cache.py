@@ -0,0 +1,283 @@
+import os
+import time
+import hashlib
+import threading
+import contextvars
+
+from crewai import LLM, BaseLLM
+
+from quiz_generator.tools.chunking import estimate_tokens
+
+try:
+    from google.genai import types
+    from crewai.llms.providers.gemini.completion import GeminiCompletion
+except ImportError:  # crewai installed without the google-genai extra
+    GeminiCompletion = None
+
+# --- Defaults (overridable through the environment) ---
+# "explicit" registers the shared prefix as a Gemini cached content that
+# later calls reference by name, "implicit" only moves it to the front of
+# every call (Gemini's automatic prefix caching), "off" sends the prompts
+# as the tasks wrote them. Explicit caches hold each agent's system prompt
+# too, so they only pay off when the same agent sees the same brief again
+# within the TTL; "implicit" is the default.
+DEFAULT_CONTEXT_CACHE = os.getenv("CONTEXT_CACHE", "implicit")
+DEFAULT_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "600"))
+# Gemini refuses to create caches below a minimum size (1024 tokens for
+# Flash); smaller prefixes fall back to "implicit"
+DEFAULT_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+CONTEXT_CACHE_MODES = ("explicit", "implicit", "off")
+
+# Task descriptions wrap {content_brief} in these markers (see the tasks.yaml files)
+BRIEF_START = "--- CONTENT BRIEF ---"
+BRIEF_END = "--- END OF BRIEF ---"
+BRIEF_REFERENCE = "(The content brief is at the start of this conversation.)"
+
+# Leads the brief, which follows each agent's own system prompt as its first message
+CONTENT_BRIEF_PREAMBLE = """
+You are one agent in a crew that writes a fact-checked quiz from a web page.
+The content brief below, produced by the content acquisition crew, is the
+source of truth for every question. Your task follows it.
+"""
+
+# Caches expiring sooner than this are recreated instead of referenced
+_EXPIRY_MARGIN_SECONDS = 30
+
+# Cached content the current call references; read by CachedGeminiCompletion
+_cached_content = contextvars.ContextVar("cached_content", default=None)
+
+
+def split_brief(messages):
+    """
+    Finds the first content brief embedded in `messages` between BRIEF_START
+    and BRIEF_END.
+
+    Returns:
+        (brief, messages): the brief (None if there is none) and the
+        messages with the brief replaced by BRIEF_REFERENCE.
+    """
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    for i, message in enumerate(messages):
+        content = message.get("content")
+        start = content.find(BRIEF_START) if isinstance(content, str) else -1
+        end = content.find(BRIEF_END, start) if start >= 0 else -1
+        if end >= 0:
+            brief = content[start + len(BRIEF_START):end].strip()
+            rest = dict(message, content=content[:start] + BRIEF_REFERENCE + content[end + len(BRIEF_END):])
+            return brief, [*messages[:i], rest, *messages[i + 1:]]
+    return None, list(messages)
+
+
+# Private GeminiCompletion methods CachedGeminiCompletion overrides (checked
+# against crewai 1.2.0, the version pyproject.toml pins). If another crewAI
+# version lacks them, Gemini LLMs stay plain and explicit mode falls back to
+# implicit caching.
+_GEMINI_HOOKS = ("_prepare_generation_config", "_extract_token_usage")
+
+if GeminiCompletion is not None and all(callable(getattr(GeminiCompletion, hook, None)) for hook in _GEMINI_HOOKS):
+    class CachedGeminiCompletion(GeminiCompletion):
+        """crewAI's Gemini LLM, pointed at the cached content a ContextCachedLLM call selected."""
+
+        def _prepare_generation_config(self, system_instruction=None, tools=None):
+            config = super()._prepare_generation_config(system_instruction, tools)
+            config.cached_content = _cached_content.get()
+            return config
+
+        def _extract_token_usage(self, response):
+            usage = super()._extract_token_usage(response)
+            metadata = getattr(response, "usage_metadata", None)
+            usage["cached_tokens"] = getattr(metadata, "cached_content_token_count", 0) or 0
+            return usage
+else:
+    CachedGeminiCompletion = None
+
+
+def make_provider_llm(model, **params):
+    """
+    crewAI's LLM for `model`; Gemini models get CachedGeminiCompletion so
+    they can reference an explicit context cache.
+    """
+    provider, _, name = model.partition("/")
+    if CachedGeminiCompletion is not None and provider in ("gemini", "google"):
+        return CachedGeminiCompletion(model=name, provider=provider, **params)
+    return LLM(model=model, **params)
+
+
+class ContextCache:
+    """
+    The shared prefixes of one process and the local account of what they
+    save: "tokens_saved" is the estimated prefix tokens not re-sent
+    (explicit) or eligible for the cached rate (implicit) by calls reusing a
+    prefix seen before, "tokens_uploaded" what creating the explicit caches
+    cost. The tokens
+    Gemini reports as cached show up in crewAI's usage metrics as
+    cached_prompt_tokens. Prefixes not used for `ttl_seconds` are
+    forgotten, as their caches have expired by then.
+    """
+
+    def __init__(self, mode=DEFAULT_CONTEXT_CACHE, ttl_seconds=DEFAULT_CONTEXT_CACHE_TTL_SECONDS,
+                 min_tokens=DEFAULT_CONTEXT_CACHE_MIN_TOKENS):
+        if mode not in CONTEXT_CACHE_MODES:
+            raise ValueError(f"CONTEXT_CACHE must be one of {CONTEXT_CACHE_MODES}, got '{mode}'.")
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self._caches = {}     # prefix key -> (cache name, expire time)
+        self._last_used = {}  # prefix key -> time it was last sent
+        self._locks = {}      # prefix key -> lock serializing its cache creation
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"requests": 0, "caches_created": 0, "tokens_uploaded": 0, "tokens_saved": 0}
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self.stats[name] += amount
+
+    def summary(self):
+        s = self.stats
+        return (f"context cache ({self.mode}): {s['requests']} calls on a shared prefix, "
+                f"{s['caches_created']} caches created ({s['tokens_uploaded']} tokens uploaded), "
+                f"~{s['tokens_saved'] - s['tokens_uploaded']} input tokens saved net")
+
+    def touch(self, key):
+        """Records a use of prefix `key`; True if it was used before within the TTL."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            reused = key in self._last_used
+            self._last_used[key] = now
+        return reused
+
+    def _expire(self, now):
+        """Forgets the prefixes not used for `ttl_seconds`, unless a cache is being created for them."""
+        for key, last_used in list(self._last_used.items()):
+            lock = self._locks.get(key)
+            if now - last_used > self.ttl_seconds and not (lock and lock.locked()):
+                del self._last_used[key]
+                self._caches.pop(key, None)
+                self._locks.pop(key, None)
+
+    def cached_content(self, gemini, key, instruction, brief_turn, prefix_tokens):
+        """
+        Returns (name, reused): the cached content holding the system
+        `instruction` and the `brief_turn` message, and whether it already
+        existed. It is created on first use ((None, False) on failure).
+        """
+        self.touch(key)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            name, expire_time = self._caches.get(key, (None, 0.0))
+            if name and expire_time - time.time() > _EXPIRY_MARGIN_SECONDS:
+                return name, True
+            try:
+                cached = gemini.client.caches.create(
+                    model=gemini.model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=instruction or None,
+                        contents=[types.Content(role="user", parts=[types.Part(text=brief_turn)])],
+                        ttl=f"{self.ttl_seconds}s",
+                        display_name=f"quiz-brief-{key[:12]}",
+                    ),
+                )
+            except Exception as e:
+                print(f"Warning: Could not create context cache, sending the brief inline: {e}")
+                return None, False
+            with self._lock:
+                self._caches[key] = (cached.name, time.time() + self.ttl_seconds)
+            usage = cached.usage_metadata
+            uploaded = (usage.total_token_count if usage else None) or prefix_tokens
+            self._count(caches_created=1, tokens_uploaded=uploaded)
+            print(f"Context cache {cached.name} created ({uploaded} tokens, ttl {self.ttl_seconds}s)")
+            return cached.name, False
+
+
+_context_cache = None
+_context_cache_lock = threading.Lock()
+
+
+def get_context_cache() -> ContextCache:
+    """Returns the process-wide context cache (mode from CONTEXT_CACHE)."""
+    global _context_cache
+    with _context_cache_lock:
+        if _context_cache is None:
+            _context_cache = ContextCache()
+        return _context_cache
+
+
+class ContextCachedLLM(BaseLLM):
+    """
+    Wraps a crew's LLM so the content brief is sent once per run instead of
+    once per task. The brief is cut out of each call's prompt and, led by
+    CONTENT_BRIEF_PREAMBLE, becomes the first message after the agent's own
+    system prompt. In "explicit" mode that prefix is registered once as a
+    Gemini cached content (which has to hold the system prompt too, since
+    Gemini refuses one next to a cached content), otherwise it is left for
+    Gemini's implicit prefix caching. Calls without a brief pass through
+    unchanged.
+    """
+
+    def __init__(self, delegate, cache=None, **kwargs):
+        super().__init__(model=delegate.model, temperature=delegate.temperature, **kwargs)
+        self.delegate = delegate
+        self.cache = cache or get_context_cache()
+
+    def _gemini(self):
+        """The CachedGeminiCompletion behind this LLM (through a recording ReplayLLM), or None in replay."""
+        llm = self.delegate
+        while llm is not None and not (CachedGeminiCompletion and isinstance(llm, CachedGeminiCompletion)):
+            llm = getattr(llm, "delegate", None)
+        return llm
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, **kwargs):
+        self.delegate.stop = self.stop
+        brief, rest = split_brief(messages) if self.cache.mode != "off" else (None, messages)
+        if not brief:
+            return self.delegate.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                                      from_task=from_task, from_agent=from_agent)
+
+        system = [m for m in rest if m.get("role") == "system"]
+        rest = [m for m in rest if m.get("role") != "system"]
+        instruction = "\n\n".join(str(m.get("content") or "") for m in system)
+        brief_turn = f"{CONTENT_BRIEF_PREAMBLE.strip()}\n\n{BRIEF_START}\n{brief}\n{BRIEF_END}"
+        prefix_tokens = estimate_tokens(instruction) + estimate_tokens(brief_turn)
+        key = hashlib.sha256(f"{self.model}\n{instruction}\n{brief_turn}".encode("utf-8")).hexdigest()
+
+        gemini = self._gemini()
+        if self.cache.mode == "explicit" and gemini is not None and not tools and prefix_tokens >= self.cache.min_tokens:
+            name, reused = self.cache.cached_content(gemini, key, instruction, brief_turn, prefix_tokens)
+            if name:
+                # The system prompt is in the cached content; the request carries the rest.
+                # The call that created the cache uploaded the prefix; only reuses save it
+                self.cache._count(requests=1, tokens_saved=prefix_tokens if reused else 0)
+                token = _cached_content.set(name)
+                try:
+                    return self.delegate.call(rest, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                                              from_task=from_task, from_agent=from_agent)
+                finally:
+                    _cached_content.reset(token)
+
+        # Implicit caching: the same prefix first, so Gemini can reuse it between runs
+        self.cache._count(requests=1, tokens_saved=prefix_tokens if self.cache.touch(key) else 0)
+        return self.delegate.call([*system, {"role": "user", "content": brief_turn}, *rest], tools=tools,
+                                  callbacks=callbacks, available_functions=available_functions,
+                                  from_task=from_task, from_agent=from_agent)
+
+    def supports_function_calling(self) -> bool:
+        return self.delegate.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.delegate.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.delegate.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        return self.delegate.get_token_usage_summary()
@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import glob
+import hashlib
+import inspect
+import threading
+
+from quiz_generator.llm_replay import LazyLLM
+from quiz_generator.output_store import atomic_write
+
+# --- Defaults (overridable through the environment) ---
+DEFAULT_MEMO_DIR = os.getenv("CREW_MEMO_DIR", ".crew_memo")
+DEFAULT_MAX_BYTES = int(os.getenv("CREW_MEMO_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# LLM attributes that change what a crew produces
+_LLM_PARAMS = ("model", "temperature", "top_p", "max_tokens", "seed", "response_format", "mode")
+
+
+class MemoTaskOutput:
+    """Stand-in for crewai's TaskOutput on a memo hit (only `.raw` is stored)."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __str__(self):
+        return self.raw
+
+
+class MemoCrewOutput:
+    """Stand-in for crewai's CrewOutput on a memo hit."""
+
+    def __init__(self, raw, tasks_output):
+        self.raw = raw
+        self.tasks_output = [MemoTaskOutput(t) for t in tasks_output]
+
+    def __str__(self):
+        return self.raw
+
+
+def _file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _crew_fingerprint(crew_cls):
+    """
+    Everything besides the inputs that decides a crew's output: its
+    agent/task YAML, the LLM parameters declared on the class, and the source
+    of the crew module plus any quiz_generator modules it uses (tools).
+    """
+    crew_file = inspect.getfile(crew_cls)
+    config_files = sorted(glob.glob(os.path.join(os.path.dirname(crew_file), "config", "*.yaml")))
+
+    llms = {}
+    for name, value in sorted(vars(crew_cls).items()):
+        if isinstance(value, LazyLLM):
+            # Declared parameters: fingerprinting must not build the LLM
+            declared = {"model": value.model, **value.params}
+            llms[name] = {p: repr(declared.get(p)) for p in _LLM_PARAMS}
+        elif hasattr(value, "model") and hasattr(value, "call"):
+            llms[name] = {p: repr(getattr(value, p, None)) for p in _LLM_PARAMS}
+
+    source_files = {crew_file}
+    crew_module = sys.modules.get(crew_cls.__module__)
+    for value in vars(crew_module).values() if crew_module else ():
+        module_name = getattr(value, "__module__", None) or getattr(value, "__name__", "")
+        module = sys.modules.get(module_name)
+        if module_name.startswith("quiz_generator.") and getattr(module, "__file__", None):
+            source_files.add(module.__file__)
+
+    return {
+        "crew": f"{crew_cls.__module__}.{crew_cls.__qualname__}",
+        "config": {os.path.basename(p): _file_digest(p) for p in config_files},
+        "llms": llms,
+        "sources": {os.path.basename(p): _file_digest(p) for p in sorted(source_files)},
+    }
+
+
+class CrewMemo:
+    """
+    On-disk memo of crew kickoff results keyed on a hash of the crew inputs,
+    YAML config, LLM parameters and crew/tool source. The store is capped at
+    `max_bytes`; least recently used results are evicted first.
+    """
+
+    def __init__(self, memo_dir=DEFAULT_MEMO_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.memo_dir = memo_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(memo_dir, exist_ok=True)
+
+    def key(self, crew_cls, inputs, crew_method="crew") -> str:
+        payload = {"fingerprint": _crew_fingerprint(crew_cls), "method": crew_method, "inputs": inputs}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.memo_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # mtime doubles as the LRU access time
+        except (OSError, ValueError):
+            return None
+        return MemoCrewOutput(entry["raw"], entry["tasks_output"])
+
+    def put(self, key, result):
+        entry = {
+            "raw": str(result.raw),
+            "tasks_output": [str(t.raw) for t in (getattr(result, "tasks_output", None) or [])],
+        }
+        atomic_write(self._path(key), json.dumps(entry), fsync=False)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for item in os.scandir(self.memo_dir):
+                if item.name.endswith(".json"):
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+                    total += stat.st_size
+            entries.sort()
+            while entries and total > self.max_bytes:
+                _, size, path = entries.pop(0)
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+
+_default_memo = None
+
+
+def get_crew_memo() -> CrewMemo:
+    global _default_memo
+    if _default_memo is None:
+        _default_memo = CrewMemo()
+    return _default_memo
+
+
+def memoized_kickoff(crew_cls, inputs, required_files=(), memo=None, crew_method="crew"):
+    """
+    Runs `crew_cls().<crew_method>().kickoff(inputs=inputs)` unless an
+    identical run was memoized. `required_files` are side-effect outputs of
+    the crew (e.g. a .docx written by a tool); if any is missing the crew
+    runs again. `crew_method` picks which crew factory of the class to run.
+    """
+    memo = memo or get_crew_memo()
+    key = memo.key(crew_cls, inputs, crew_method)
+
+    if all(os.path.exists(path) for path in required_files):
+        cached = memo.get(key)
+        if cached is not None:
+            print(f"--- Memo hit for {crew_cls.__name__}.{crew_method} ({key[:12]}). Skipping kickoff. ---")
+            return cached
+
+    result = getattr(crew_cls(), crew_method)().kickoff(inputs=inputs)
+    memo.put(key, result)
+    return result
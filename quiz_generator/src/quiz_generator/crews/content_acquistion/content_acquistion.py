@@ -3,10 +3,10 @@ from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
 
-from crewai import LLM
+from quiz_generator.llm_replay import LazyLLM
 
 # Import the custom tool
-from quiz_generator.tools.custom_tool import WebsiteScrapingTool
+from quiz_generator.tools.custom_tool import TopicScrapingTool, WebsiteScrapingTool
 
 @CrewBase
 class ContentAcquistionCrew():
@@ -15,11 +15,11 @@ class ContentAcquistionCrew():
     agents: List[BaseAgent]
     tasks: List[Task]
 
-    scraper_llm = LLM(
+    scraper_llm = LazyLLM(
         model="gemini/gemini-2.5-flash"
     )
 
-    analyst_llm = LLM(
+    analyst_llm = LazyLLM(
         model="gemini/gemini-2.5-flash"
     )
 
@@ -29,7 +29,7 @@ class ContentAcquistionCrew():
     def content_scraper(self) -> Agent:
         return Agent(
             config=self.agents_config['content_scraper'], # type: ignore[index]
-            tools=[WebsiteScrapingTool()],  # Assign the tool to the agent
+            tools=[WebsiteScrapingTool(), TopicScrapingTool()],  # Assign the tool to the agent
             llm=self.scraper_llm,
             verbose=True
         )
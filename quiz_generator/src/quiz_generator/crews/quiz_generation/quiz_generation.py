@@ -3,8 +3,8 @@ from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
 
-# --- Import the crewAI LLM class ---
-from crewai.llm import LLM
+# --- LLM factory (live, or record/replay via LLM_MODE) ---
+from quiz_generator.llm_replay import LazyLLM
 
 
 @CrewBase
@@ -16,17 +16,11 @@ class QuizGenerationCrew():
 
     # --- Define the LLM for this crew ---
     # We use a creative temperature for question generation
-    question_llm = LLM(
+    question_llm = LazyLLM(
         model="gemini/gemini-2.5-flash", # Use a powerful model
         temperature=0.7
     )
 
-    
-    manager_llm = LLM(
-        model = "gemini/gemini-2.5-flash",
-        temperature=0.2
-    )
-
     # --- Define the agents for this crew ---
     @agent
     def mcq_generator(self) -> Agent:
@@ -44,14 +38,6 @@ class QuizGenerationCrew():
             verbose=True
         )
     
-    '''    @agent
-    def quiz_manager(self) -> Agent:
-        return Agent(
-            config=self.agents_config['quiz_manager'],
-            llm=self.manager_llm,
-            verbose=True
-        )'''
-        
     # --- Define the tasks for this crew ---
     @task
     def mcq_task(self) -> Task:
@@ -67,16 +53,32 @@ class QuizGenerationCrew():
 
     @crew
     def crew(self) -> Crew:
-        """Creates the QuizGeneration crew"""
+        """Creates the QuizGeneration crew (both tasks, one after the other)"""
         return Crew(
             agents=self.agents, # Automatically created by the @agent decorator
             tasks=self.tasks, # Automatically created by the @task decorator
-            
-            process=Process.hierarchical, # <-- Set to parallel as required
-            manager_llm=self.manager_llm,
-            
-            #manager_agent=self.quiz_manager(),
-            
+            process=Process.sequential,
+            verbose=True
+        )
+
+    # --- Single-task crews ---
+    # crewAI will not end a crew on two async tasks, so the flow runs MCQ and
+    # T/F generation as two crews kicked off concurrently. Latency is that of
+    # the slower task, with no manager LLM round-trips in between.
+    def mcq_crew(self) -> Crew:
+        """Creates a crew that only runs the MCQ task"""
+        return Crew(
+            agents=[self.mcq_generator()],
+            tasks=[self.mcq_task()],
+            process=Process.sequential,
             verbose=True
         )
 
+    def tf_crew(self) -> Crew:
+        """Creates a crew that only runs the True/False task"""
+        return Crew(
+            agents=[self.true_false_generator()],
+            tasks=[self.tf_task()],
+            process=Process.sequential,
+            verbose=True
+        )
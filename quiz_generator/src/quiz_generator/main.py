@@ -1,15 +1,23 @@
 import sys
 import json
-import os # Import the os module for file checking
+import time
+import asyncio
 from dotenv import load_dotenv
+from typing import Optional
 from pydantic import BaseModel
 
 from crewai.flow import Flow, listen, start
 
-# --- Import All Three Crews ---
-from quiz_generator.crews.content_acquistion.content_acquistion import ContentAcquistionCrew
-from quiz_generator.crews.quiz_generation.quiz_generation import QuizGenerationCrew
-from quiz_generator.crews.review_and_format.review_and_format import ReviewAndFormatCrew
+# The three crews (and their tools and LLMs) are imported by the step that
+# runs them, so `plot` and other commands that never kick off a crew skip them
+from quiz_generator.tools.brief_cache import get_brief_cache, lookup_brief, store_brief
+from quiz_generator.postprocess import QuestionStreamParser, postprocess_quiz
+from quiz_generator.quiz_model import Quiz
+from quiz_generator.exporters import export_paths, export_quiz, write_json
+from quiz_generator.output_store import OutputStore
+from quiz_generator.crew_memo import memoized_kickoff
+from quiz_generator.question_index import get_question_index
+from quiz_generator.question_bank import QUESTIONS_PER_SECTION, delta_brief, get_question_bank, scrape_blocks
 
 # Load environment variables (e.g., GEMINI_API_KEY)
 load_dotenv()
@@ -18,9 +26,25 @@ load_dotenv()
 # --- Define the state of our flow ---
 class QuizState(BaseModel):
     """Holds the state of the quiz generation flow."""
+    # One URL, or several separated by spaces for one topic quiz from a merged brief
     url: str = ""
+    # Name of this run's output directory, <OUTPUT_ROOT>/<run_id>/ (default: a new, unique id)
+    run_id: str = ""
     content_brief: str = ""
+    # True when content_brief came from the brief cache rather than Crew 1
+    brief_from_cache: bool = False
+    # Question bank plan for this source: "new", "full", "incremental" (only
+    # changed blocks go through Crews 2 and 3) or "unchanged" (no crew runs)
+    bank_mode: str = "new"
+    # Questions per section Crew 2 generates
+    question_counts: dict = {"multiple_choice": QUESTIONS_PER_SECTION, "true_false": QUESTIONS_PER_SECTION}
     generated_quiz: dict = {"multiple_choice": [], "true_false": []}
+    # Seconds from the start of Crew 2 until its first question was parsed
+    first_question_seconds: Optional[float] = None
+    # Generated questions the question index dropped as near-duplicates
+    duplicates_dropped: int = 0
+    # Crew 3's approved questions, normalized by postprocess_quiz
+    final_quiz: dict = {}
     # Optional: Store the final confirmation message from Crew 3
     final_output_message: str = ""
 
@@ -32,38 +56,48 @@ class QuizGeneratorFlow(Flow[QuizState]):
         """Starts the flow by getting the URL."""
         print("--- Flow Started: Getting URL ---")
         if crewai_trigger_payload:
-            self.state.url = crewai_trigger_payload.get('url')
+            # 'urls' (a list) makes one topic quiz from all of the pages
+            urls = crewai_trigger_payload.get('urls') or []
+            self.state.url = " ".join(urls) if urls else crewai_trigger_payload.get('url')
             if not self.state.url:
-                print("Error: No 'url' found in trigger payload.")
+                print("Error: No 'url' or 'urls' found in trigger payload.")
                 sys.exit(1)
         else:
             # Default URL for 'crewai run kickoff'
             self.state.url = "https://genai.owasp.org/llmrisk/llm01-prompt-injection/"
         print(f"Processing URL: {self.state.url}")
+        # Per-run outputs: concurrent flows in one working directory never share a file
+        self.output_store = OutputStore(run_id=self.state.run_id or None)
+        self.state.run_id = self.output_store.run_id
+        print(f"Writing outputs to '{self.output_store.run_dir}'")
 
     @listen(get_url)
     def run_crew_1(self):
         """
         Runs Crew 1 (Content Acquisition) to get the content brief,
-        or loads it if content_brief.md already exists.
+        or loads it from the brief cache if this URL was processed recently.
+        If the question bank holds a quiz for this URL and only part of the
+        page changed, the brief is just the changed blocks and Crew 1 is skipped.
         """
-        brief_file = "content_brief.md"
+        self.plan_from_bank()
+        if self.state.bank_mode in ("incremental", "unchanged"):
+            return
 
-        if os.path.exists(brief_file):
-            print(f"--- Found existing '{brief_file}'. Loading content and skipping Crew 1. ---")
-            try:
-                with open(brief_file, "r", encoding="utf-8") as f:
-                    self.state.content_brief = f.read()
-                if not self.state.content_brief:
-                    print(f"Warning: '{brief_file}' exists but is empty. Crew 1 will run.")
-                else:
-                    print("--- Content loaded from file. ---")
-                    return
-            except Exception as e:
-                print(f"Error reading existing '{brief_file}': {e}\nRaw Exception: {repr(e)}")
-                print("Proceeding to run Crew 1.")
+        try:
+            # A page the bank saw change has a stale cached brief
+            cached_brief = lookup_brief(self.state.url) if self.state.bank_mode != "full" else None
+        except Exception as e:
+            print(f"Error reading brief cache: {e}\nRaw Exception: {repr(e)}")
+            cached_brief = None
+
+        if cached_brief:
+            print(f"--- Found cached brief for '{self.state.url}'. Skipping Crew 1. ---")
+            self.state.content_brief = cached_brief
+            self.state.brief_from_cache = True
+            return
 
         print("--- Running Content Acquisition Crew (Crew 1) ---")
+        from quiz_generator.crews.content_acquistion.content_acquistion import ContentAcquistionCrew
         try:
             crew_1_inputs = {'url': self.state.url}
             result = ContentAcquistionCrew().crew().kickoff(inputs=crew_1_inputs)
@@ -73,15 +107,60 @@ class QuizGeneratorFlow(Flow[QuizState]):
             print(f"Error running Crew 1: {e}\nRaw Exception: {repr(e)}")
             sys.exit(1)
 
+    def plan_from_bank(self):
+        """
+        Scrapes the page's text blocks and diffs them against the question
+        bank, setting `bank_mode`, the question counts and, for an
+        incremental run, the brief of changed blocks.
+        """
+        self.page_blocks, self.bank_plan = None, None
+        bank = get_question_bank()
+        if not bank:
+            return
+        try:
+            self.page_blocks = scrape_blocks(self.state.url)
+            self.bank_plan = bank.plan(self.state.url, self.page_blocks)
+        except Exception as e:
+            print(f"Error checking the question bank: {e}\nRaw Exception: {repr(e)}")
+            self.page_blocks = None
+            return
+
+        plan = self.bank_plan
+        self.state.bank_mode = plan.mode
+        self.state.question_counts = plan.counts
+        if plan.mode == "new":
+            return
+        print(f"--- Question bank: {len(plan.new_blocks)} new or changed and {plan.removed} removed blocks "
+              f"of {len(self.page_blocks)}; {plan.kept_count} questions still valid, {plan.dropped} dropped ---")
+        if plan.mode == "full":
+            print("--- Too much of the page changed. Regenerating the whole quiz. ---")
+        elif plan.mode == "unchanged":
+            print("--- No new content. Skipping Crews 1-3 and reusing the banked questions. ---")
+        else:
+            target = "the changed blocks only" if plan.new_blocks else "the remaining blocks, replacing the dropped ones"
+            print(f"--- Generating {plan.counts['multiple_choice']} MCQ and {plan.counts['true_false']} T/F "
+                  f"questions for {target}. Skipping Crew 1. ---")
+            self.state.content_brief = delta_brief(plan.blocks, replacing=not plan.new_blocks)
+
     @listen(run_crew_1)
     def save_content_brief(self):
-        """Saves the content brief (either newly generated or loaded) to a file."""
+        """
+        Saves a newly generated content brief to the brief cache. A brief
+        loaded from the cache is not stored again, so it still expires
+        BRIEF_CACHE_TTL_SECONDS after it was generated.
+        """
+        if self.state.bank_mode in ("incremental", "unchanged"):
+            # The changed-blocks brief is not a full one, and a changed page's cached brief is stale
+            if self.bank_plan.new_blocks or self.bank_plan.removed:
+                get_brief_cache().invalidate(self.state.url)
+            return
+        if self.state.brief_from_cache:
+            return
         if self.state.content_brief:
-            print("--- Saving/Updating Content Brief File ---")
+            print("--- Saving/Updating Cached Content Brief ---")
             try:
-                with open("content_brief.md", "w", encoding="utf-8") as f:
-                    f.write(self.state.content_brief)
-                print("Successfully saved content brief to 'content_brief.md'")
+                content_hash = store_brief(self.state.url, self.state.content_brief)
+                print(f"Successfully cached content brief for '{self.state.url}' ({content_hash[:12]})")
                 print("\n--- Content Brief (Preview) ---")
                 print(self.state.content_brief[:500] + "...")
                 print("---------------------")
@@ -93,67 +172,78 @@ class QuizGeneratorFlow(Flow[QuizState]):
             sys.exit(1)
 
     @listen(save_content_brief)
-    def run_crew_2(self):
-        """Runs Crew 2 (Quiz Generation) using the brief."""
+    async def run_crew_2(self):
+        """
+        Runs Crew 2 (Quiz Generation) using the brief. The MCQ and T/F crews
+        are kicked off concurrently, and each crew's questions are parsed and
+        handed to `on_question` as soon as that crew finishes. crewAI returns
+        a task's output only when its crew completes, so questions arrive in
+        one batch per crew, not one by one as the LLM streams them (unlike
+        the ADK generator's --stream-questions). Questions the
+        question index finds near-duplicates of (from this run, or reviewed
+        questions of other pages) are dropped before Crew 3 reviews them.
+        """
+        quiz = {"multiple_choice": [], "true_false": []}
+        if self.state.bank_mode == "unchanged":
+            self.state.generated_quiz = quiz
+            return
+
         print("--- Running Quiz Generation Crew (Crew 2) ---")
-        mcq_questions = []
-        tf_questions = []
+        from quiz_generator.crews.quiz_generation.quiz_generation import QuizGenerationCrew
+        question_index = get_question_index()
         try:
-            crew_2_inputs = {'content_brief': self.state.content_brief}
-            result = QuizGenerationCrew().crew().kickoff(inputs=crew_2_inputs)
-
-            if hasattr(result, 'tasks_output') and result.tasks_output:
-                print(f"--- Found {len(result.tasks_output)} task outputs ---")
-                for output_item in result.tasks_output:
+            crew_2_inputs = {
+                'content_brief': self.state.content_brief,
+                'mcq_count': self.state.question_counts["multiple_choice"],
+                'tf_count': self.state.question_counts["true_false"],
+            }
+            started = time.perf_counter()
+            # Memoized on inputs + YAML config + LLM params: identical briefs cost no LLM calls
+            # An incremental run may need questions for one section only
+            pending = [
+                asyncio.to_thread(memoized_kickoff, QuizGenerationCrew, crew_2_inputs, crew_method=crew_method)
+                for crew_method, section in (("mcq_crew", "multiple_choice"), ("tf_crew", "true_false"))
+                if self.state.question_counts[section] > 0
+            ]
+            for finished in asyncio.as_completed(pending):
+                result = await finished
+                for output_item in getattr(result, 'tasks_output', None) or []:
                     current_output_str = str(output_item.raw)
                     print(f"Processing output item: '{current_output_str[:100]}...'")
-
-                    # --- FIX: Clean JSON markers ---
-                    cleaned_str = current_output_str.strip().strip('```json').strip('```').strip()
-                    parsed_data = None
-                    try:
-                        if cleaned_str:
-                            # --- FIX: Use json.loads instead of yaml.safe_load ---
-                            parsed_data = json.loads(cleaned_str)
-                    # --- FIX: Catch json.JSONDecodeError ---
-                    except json.JSONDecodeError as e:
-                        print(f"Warning: Could not parse potential JSON: {e}\nRaw item:\n{current_output_str}")
-                        continue
-
-                    if isinstance(parsed_data, list) and parsed_data:
-                        first_item = parsed_data[0]
-                        if isinstance(first_item, dict):
-                            if 'options' in first_item and 'correct_answer' in first_item:
-                                if not mcq_questions:
-                                    print("-> Identified as MCQ output.")
-                                    mcq_questions = parsed_data
-                                else:
-                                    print("Warning: Found another potential MCQ output, skipping.")
-                            elif 'answer' in first_item and 'options' not in first_item:
-                                if not tf_questions:
-                                    print("-> Identified as T/F output.")
-                                    tf_questions = parsed_data
-                                else:
-                                    print("Warning: Found another potential T/F output, skipping.")
-                            else:
-                                print("-> Parsed JSON list, but structure didn't match MCQ or T/F.")
-                        else:
-                            print("-> Parsed JSON list, but first item is not a dictionary.")
-                    elif parsed_data:
-                        print(f"-> Parsed JSON, but it's not a list (Type: {type(parsed_data)}).")
-                    else:
-                        print("-> Output item was empty after cleaning.")
-            else:
-                print("--- No task outputs found in result.tasks_output or result.tasks_output is empty---")
+                    # The whole task output is parsed at once; the parser still drops malformed questions
+                    parser = QuestionStreamParser()
+                    questions = parser.feed(current_output_str)
+                    if question_index:
+                        questions, duplicates = await asyncio.to_thread(
+                            question_index.filter_questions, questions, self.state.url, self.state.run_id
+                        )
+                        self.state.duplicates_dropped += len(duplicates)
+                        for duplicate in duplicates:
+                            print(f"Dropped near-duplicate question ({duplicate.similarity:.2f} similar to "
+                                  f"'{duplicate.match[:60]}'): {duplicate.question['question'][:60]}")
+                    for section, question in questions:
+                        quiz[section].append(question)
+                        self.on_question(section, question, time.perf_counter() - started)
+                    for issue in parser.issues:
+                        print(f"Warning: Dropped question: {issue}")
+            print(f"--- MCQ and T/F generation took {time.perf_counter() - started:.1f}s ---")
             print("--- Crew 2 Finished ---")
         except Exception as e:
             print(f"Error running Crew 2: {e}\nRaw Exception: {repr(e)}")
             sys.exit(1)
 
-        self.state.generated_quiz = {
-            "multiple_choice": mcq_questions if isinstance(mcq_questions, list) else [],
-            "true_false": tf_questions if isinstance(tf_questions, list) else []
-        }
+        self.state.generated_quiz = quiz
+
+    def on_question(self, section, question, elapsed):
+        """
+        Called for every generated question as soon as its crew's output is
+        parsed, before the other crew finishes. Override to stream questions
+        elsewhere.
+        """
+        if self.state.first_question_seconds is None:
+            self.state.first_question_seconds = elapsed
+            print(f"--- First question ready after {elapsed:.1f}s ---")
+        print(f"-> New {section} question: {question['question'][:80]}")
 
     @listen(run_crew_2)
     def save_quiz_file(self):
@@ -163,13 +253,17 @@ class QuizGeneratorFlow(Flow[QuizState]):
             if not isinstance(self.state.generated_quiz, dict) or \
                not self.state.generated_quiz.get("multiple_choice") and \
                not self.state.generated_quiz.get("true_false"):
-                print("Error: Crew 2 did not produce valid quiz data. Cannot save JSON.")
+                if self.bank_plan and self.bank_plan.mode in ("incremental", "unchanged"):
+                    print("No new questions generated; the banked questions make up the quiz.")
+                    return
+                dropped = f" ({self.state.duplicates_dropped} near-duplicates dropped)" if self.state.duplicates_dropped else ""
+                print(f"Error: Crew 2 did not produce valid quiz data{dropped}. Cannot save JSON.")
                 sys.exit(1)
 
-            file_name = "generated_quiz.json"
-            with open(file_name, "w", encoding="utf-8") as f:
-                json.dump(self.state.generated_quiz, f, indent=4)
-            print(f"Successfully saved combined quiz to '{file_name}'")
+            atomic = self.output_store.open("generated_quiz.json")
+            with atomic as f:
+                write_json(Quiz.from_dict(self.state.generated_quiz, source_url=self.state.url), f)
+            print(f"Successfully saved combined quiz to '{atomic.path}'")
             print("\n--- Generated Quiz (JSON Preview) ---")
             print(json.dumps(self.state.generated_quiz, indent=4)[:500] + "...")
             print("----------------------")
@@ -179,26 +273,94 @@ class QuizGeneratorFlow(Flow[QuizState]):
 
     @listen(save_quiz_file)
     def run_crew_3(self):
-        """Runs Crew 3 (Review and Format) using the brief and generated quiz."""
-        print("--- Running Review and Format Crew (Crew 3) ---")
+        """
+        Runs Crew 3 (Review) using the brief and generated quiz, then
+        normalizes the approved questions and writes them as 'final_quiz.docx'
+        (and any other EXPORT_FORMATS) in-process, with no LLM round-trip for
+        formatting. On an incremental run only the new questions are reviewed
+        and the still-valid banked ones are added to them; the result is
+        banked for the next run. The approved new questions are stored in
+        the question index.
+        """
+        from quiz_generator.crews.review_and_format.review_and_format import ReviewAndFormatCrew
         try:
-            crew_3_inputs = {
-                'content_brief': self.state.content_brief,
-                'generated_quiz': json.dumps(self.state.generated_quiz, indent=4)
-            }
-            result = ReviewAndFormatCrew().crew().kickoff(inputs=crew_3_inputs)
-            self.state.final_output_message = result.raw
-            print("--- Crew 3 Finished ---")
+            if any(self.state.generated_quiz.get(section) for section in ("multiple_choice", "true_false")):
+                print("--- Running Review and Format Crew (Crew 3) ---")
+                crew_3_inputs = {
+                    'content_brief': self.state.content_brief,
+                    'generated_quiz': json.dumps(self.state.generated_quiz, indent=4)
+                }
+                result = memoized_kickoff(ReviewAndFormatCrew, crew_3_inputs)
+                print("--- Crew 3 Finished ---")
+
+                self.state.final_quiz, issues = postprocess_quiz(result.raw)
+                for issue in issues:
+                    print(f"Warning: Dropped question: {issue}")
+                if self.state.bank_mode == "incremental":
+                    # The new questions may repeat banked ones about the blocks that did not change
+                    self.state.final_quiz, repeats = self.bank_plan.without_repeats(self.state.final_quiz)
+                    for repeat in repeats:
+                        print(f"Dropped question repeating a banked one ({repeat.similarity:.2f} similar to "
+                              f"'{repeat.match[:60]}'): {repeat.question['question'][:60]}")
+                question_index = get_question_index()
+                if question_index:
+                    # Only approved questions are stored, so rejected drafts never block later runs
+                    question_index.add_questions(
+                        [(section, question) for section in ("multiple_choice", "true_false")
+                         for question in self.state.final_quiz[section]],
+                        self.state.url, self.state.run_id,
+                    )
+            else:
+                print("--- No new questions to review. Skipping Crew 3. ---")
+                self.state.final_quiz = {"multiple_choice": [], "true_false": []}
+            self.update_question_bank()
+
+            quiz = Quiz.from_dict(self.state.final_quiz, source_url=self.state.url)
+            written, errors = export_quiz(
+                quiz, export_paths(self.output_store.path("final_quiz")), opener=self.output_store.opener
+            )
+            for error in errors.values():
+                print(error)
+            self.state.final_output_message = (
+                f"Successfully saved the final quiz ({quiz.question_count} questions) to "
+                f"{', '.join(repr(path) for path in written.values())}" if written else ""
+            )
             print(f"Crew 3 Result: {self.state.final_output_message}")
         except Exception as e:
             print(f"Error running Crew 3: {e}\nRaw Exception: {repr(e)}")
             sys.exit(1)
 
+    def update_question_bank(self):
+        """
+        Banks the reviewed questions with the blocks they were derived from,
+        and adds the still-valid banked questions to the final quiz.
+        """
+        bank, plan = get_question_bank(), self.bank_plan
+        if not bank or not self.page_blocks:
+            return
+        incremental = plan.mode in ("incremental", "unchanged")
+        kept = plan.kept if incremental else None
+        bank.record(self.state.url, self.page_blocks, self.state.final_quiz, kept=kept,
+                    candidates=plan.blocks if incremental else None)
+        if incremental:
+            new_count = sum(len(self.state.final_quiz.get(section, [])) for section in plan.kept)
+            for section, questions in plan.kept_quiz().items():
+                self.state.final_quiz[section] = questions + self.state.final_quiz.get(section, [])
+            print(f"--- Kept {plan.kept_count} banked questions alongside {new_count} new ones ---")
+
     @listen(run_crew_3)
     def flow_complete(self):
         """Prints the final confirmation message."""
         print("----------------------")
         print("--- Flow Complete ---")
+        self.output_store.close()
+        from quiz_generator.context_cache import get_context_cache
+        print(get_context_cache().summary())
+        if get_question_index():
+            print(get_question_index().summary())
+        from quiz_generator.rate_limiter import rate_limiters
+        for limiter in rate_limiters():
+            print(limiter.summary())
         if self.state.final_output_message:
             print(self.state.final_output_message)
         else:
@@ -216,11 +378,11 @@ def plot():
 def run_with_trigger():
     print("--- Starting Quiz Generator Flow ---")
     try:
-        url = input("Please enter the URL you want to process: ")
-        if not url.startswith(("http://", "https://")):
+        urls = input("Please enter the URL(s) you want to process: ").split()
+        if not urls or not all(url.startswith(("http://", "https://")) for url in urls):
             print("Invalid URL. Please include 'http://' or 'https://'.")
             sys.exit(1)
-        trigger_payload = {"url": url}
+        trigger_payload = {"urls": urls}
         QuizGeneratorFlow().kickoff(inputs={"crewai_trigger_payload": trigger_payload})
     except Exception as e:
         print(f"An error occurred: {e}\nRaw Exception: {repr(e)}")
@@ -228,14 +390,15 @@ def run_with_trigger():
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
-        url_arg = sys.argv[1]
-        print(f"Running with provided URL: {url_arg}")
-        if not url_arg.startswith(("http://", "https://")):
+        # Several URLs make one topic quiz
+        url_args = sys.argv[1:]
+        print(f"Running with provided URL(s): {' '.join(url_args)}")
+        if not all(url_arg.startswith(("http://", "https://")) for url_arg in url_args):
              print("Invalid URL. Please include 'http://' or 'https://'.")
              sys.exit(1)
-        trigger = {"url": url_arg}
+        trigger = {"urls": url_args}
         QuizGeneratorFlow().kickoff(inputs={"crewai_trigger_payload": trigger})
     else:
-        print("Running in main (checking for existing brief)...")
+        print("Running in main (checking the brief cache)...")
         QuizGeneratorFlow().kickoff()
 
@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import NamedTuple
+
+import requests
+
+from quiz_generator.output_store import atomic_write
+from quiz_generator.question_index import content_words, drop_near_duplicates
+from quiz_generator.tools.brief_cache import BriefCache, normalize_source
+from quiz_generator.tools.dedupe import BlockDeduper
+from quiz_generator.tools.http_fetch import fetch_urls
+from quiz_generator.tools.text_extraction import extract_text_blocks
+
+# --- Defaults (overridable through the environment) ---
+# One JSON file per source; "" turns the bank off
+DEFAULT_QUESTION_BANK_DIR = os.getenv("QUESTION_BANK_DIR", ".question_bank")
+# Above this share of new or changed blocks the whole quiz is regenerated from a fresh brief
+DEFAULT_MAX_CHANGED_SHARE = float(os.getenv("QUESTION_BANK_MAX_CHANGED", "0.5"))
+
+# Questions per section in a full quiz (mcq_task / tf_task)
+QUESTIONS_PER_SECTION = 7
+SECTIONS = ("multiple_choice", "true_false")
+
+# A question is derived from the blocks sharing at least this share of its
+# content words, and from any block scoring within ATTRIBUTION_MARGIN of the best one
+MIN_ATTRIBUTION_OVERLAP = 0.3
+ATTRIBUTION_MARGIN = 0.8
+MAX_ATTRIBUTED_BLOCKS = 3
+
+DELTA_BRIEF_TEMPLATE = """# Content Brief (changed passages only)
+
+The page has changed since its quiz was generated. Only its new or changed
+passages are listed below; questions about the rest of the page already exist.
+Treat every passage as both 'Key Facts & Verifiable Data' and
+'Key Concepts & Definitions'.
+
+{passages}
+"""
+
+REPLACEMENT_BRIEF_TEMPLATE = """# Content Brief (replacement questions)
+
+Passages were removed from the page since its quiz was generated, and with
+them the questions about them. Passages still on the page are listed below;
+new questions about them replace the removed ones. Treat every passage as both
+'Key Facts & Verifiable Data' and 'Key Concepts & Definitions'.
+
+{passages}
+"""
+
+
+def block_hash(block: str) -> str:
+    """Hash of a block's whitespace-normalized text."""
+    return hashlib.sha256(" ".join(block.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def scrape_blocks(source: str, timeout: float = 30) -> list:
+    """
+    Fetches the page(s) of `source` (one URL, or several separated by
+    spaces) and returns their innermost text blocks, so an edited paragraph
+    changes one block rather than the whole <main> or <article> holding it.
+    Raises the RequestException of the first page that failed.
+    """
+    urls = list(dict.fromkeys(source.split()))
+    # Topic pages share one deduper, as in TopicScrapingTool
+    seen = BlockDeduper() if len(urls) > 1 else None
+    blocks = []
+    for result in fetch_urls(urls, timeout=timeout):
+        if isinstance(result, requests.RequestException):
+            raise result
+        blocks.extend(extract_text_blocks(result.text, seen=seen, innermost=True))
+    return blocks
+
+
+def delta_brief(blocks, replacing=False) -> str:
+    """
+    The content brief handed to Crew 2 and Crew 3 for an incremental run:
+    the changed `blocks`, or with `replacing`, the remaining blocks that
+    replacements for the questions on removed blocks are drawn from.
+    """
+    template = REPLACEMENT_BRIEF_TEMPLATE if replacing else DELTA_BRIEF_TEMPLATE
+    return template.format(passages="\n".join(f"- {block}" for block in blocks))
+
+
+def attribute(section: str, question: dict, blocks) -> list:
+    """
+    Returns the hashes of the blocks `question` was most likely derived
+    from: those sharing the most content words with its question text and
+    correct answer. An empty list means no block matched well enough.
+    """
+    text = str(question.get("question", ""))
+    if section == "multiple_choice" and isinstance(question.get("options"), dict):
+        text += " " + str(question["options"].get(question.get("answer"), ""))
+    words = set(content_words(text))
+    if not words:
+        return []
+
+    scores = []
+    for block in blocks:
+        overlap = len(words & set(content_words(block))) / len(words)
+        if overlap >= MIN_ATTRIBUTION_OVERLAP:
+            scores.append((overlap, block))
+    if not scores:
+        return []
+    best = max(score for score, _ in scores)
+    scores.sort(key=lambda item: -item[0])
+    return [block_hash(block) for score, block in scores[:MAX_ATTRIBUTED_BLOCKS] if score >= best * ATTRIBUTION_MARGIN]
+
+
+class BankPlan(NamedTuple):
+    """
+    What a run on a banked source has to generate.
+
+    mode is "new" (nothing banked), "full" (too much changed: regenerate
+    the quiz), "incremental" (generate questions from `blocks` only: the
+    new blocks, or when blocks were only removed, the remaining ones, to
+    replace the questions lost with them) or "unchanged" (nothing to
+    generate: reuse the kept questions).
+    """
+    mode: str
+    kept: dict          # {section: [{"question": ..., "blocks": [...]}, ...]} still backed by the page
+    new_blocks: list    # text of the blocks that were not banked, in page order
+    blocks: list        # text of the blocks new questions are generated from
+    removed: int        # banked blocks no longer on the page
+    dropped: int        # banked questions derived from a removed block
+    counts: dict        # {section: questions to generate}
+
+    def kept_quiz(self):
+        return {section: [entry["question"] for entry in self.kept.get(section, [])] for section in SECTIONS}
+
+    @property
+    def kept_count(self):
+        return sum(len(entries) for entries in self.kept.values())
+
+    def without_repeats(self, quiz):
+        """
+        Drops the questions of `quiz` (a canonical quiz dict of new
+        questions) that are near-duplicates of a kept question.
+
+        Returns:
+            (quiz, duplicates): the remaining questions, and a
+            question_index.Duplicate for every dropped one.
+        """
+        kept, duplicates = drop_near_duplicates(
+            [(section, question) for section in SECTIONS for question in quiz.get(section, [])],
+            [(section, question) for section, questions in self.kept_quiz().items() for question in questions],
+        )
+        remaining = dict(quiz, **{section: [] for section in SECTIONS})
+        for section, question in kept:
+            remaining[section].append(question)
+        return remaining, duplicates
+
+
+class QuestionBank:
+    """
+    On-disk bank of each source's final questions and the page blocks they
+    were derived from, so a changed page only needs questions for its
+    changed blocks.
+
+    One JSON file per source (<bank_dir>/<url key>.json) holds the hashes of
+    the page's text blocks and every approved question with the hashes of
+    the blocks it was attributed to. On the next run the scraped blocks are
+    diffed against it: questions whose blocks are all still on the page are
+    kept as they are, questions derived from a removed block are dropped,
+    and only the new blocks go through generation and review. When blocks
+    were only removed, replacements for the dropped questions are generated
+    from the remaining blocks instead. A question no block could be
+    attributed to depends on the whole page and is dropped on any change.
+    """
+
+    def __init__(self, bank_dir=DEFAULT_QUESTION_BANK_DIR, max_changed_share=DEFAULT_MAX_CHANGED_SHARE):
+        self.bank_dir = bank_dir
+        self.max_changed_share = max_changed_share
+        self._lock = threading.Lock()
+        os.makedirs(bank_dir, exist_ok=True)
+
+    def _entry_path(self, source):
+        return os.path.join(self.bank_dir, f"{BriefCache.url_key(source)}.json")
+
+    def get(self, source: str):
+        """Returns the banked entry for `source`, or None."""
+        try:
+            with open(self._entry_path(source), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def plan(self, source: str, blocks) -> BankPlan:
+        """Diffs the freshly scraped `blocks` of `source` against its banked entry."""
+        full_counts = {section: QUESTIONS_PER_SECTION for section in SECTIONS}
+        entry = self.get(source)
+        if entry is None or not blocks:
+            return BankPlan("new", {}, list(blocks), list(blocks), 0, 0, full_counts)
+
+        current = {block_hash(block) for block in blocks}
+        banked = set(entry.get("blocks", []))
+        new_blocks = [block for block in dict.fromkeys(blocks) if block_hash(block) not in banked]
+        removed = len(banked - current)
+        changed = bool(new_blocks or removed)
+
+        kept, dropped, counts = {}, 0, {}
+        share = round(QUESTIONS_PER_SECTION * len(new_blocks) / len(current))
+        for section in SECTIONS:
+            entries = entry.get("questions", {}).get(section, [])
+            kept[section] = [
+                e for e in entries
+                if set(e["blocks"]) <= current and (e["blocks"] or not changed)
+            ]
+            lost = len(entries) - len(kept[section])
+            dropped += lost
+            # Replace the lost questions, plus a share of a full quiz for the new content
+            counts[section] = min(QUESTIONS_PER_SECTION, lost + (max(1, share) if new_blocks else 0))
+
+        if new_blocks:
+            source_blocks = new_blocks
+        else:
+            # Only removals: replacements come from the remaining blocks, those no kept question covers first
+            remaining = list(dict.fromkeys(blocks))
+            covered = {h for entries in kept.values() for e in entries for h in e["blocks"]}
+            source_blocks = [block for block in remaining if block_hash(block) not in covered] or remaining
+        mode = "incremental" if any(counts.values()) else "unchanged"
+        plan = BankPlan(mode, kept, new_blocks, source_blocks, removed, dropped, counts)
+        if len(new_blocks) > self.max_changed_share * len(current) or not plan.kept_count:
+            return BankPlan("full", {}, list(blocks), list(blocks), removed, dropped + plan.kept_count, full_counts)
+        return plan
+
+    def record(self, source: str, blocks, quiz: dict, kept=None, candidates=None):
+        """
+        Banks the blocks of `source` and its questions: the `kept` entries of
+        the plan as they are, and every question of `quiz` (a canonical quiz
+        dict) attributed to the `candidates` blocks it was generated from
+        (by default, all `blocks`).
+        """
+        kept = kept or {}
+        candidates = blocks if candidates is None else candidates
+        questions = {
+            section: list(kept.get(section, [])) + [
+                {"question": question, "blocks": attribute(section, question, candidates)}
+                for question in quiz.get(section, [])
+            ]
+            for section in SECTIONS
+        }
+        entry = {
+            "source": normalize_source(source),
+            "updated_at": time.time(),
+            "blocks": list(dict.fromkeys(block_hash(block) for block in blocks)),
+            "questions": questions,
+        }
+        with self._lock:
+            atomic_write(self._entry_path(source), json.dumps(entry, indent=1).encode("utf-8"), fsync=False)
+        return entry
+
+
+_question_bank = None
+_question_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """Returns the process-wide question bank at QUESTION_BANK_DIR, or None if it is turned off."""
+    global _question_bank
+    with _question_bank_lock:
+        if _question_bank is None and DEFAULT_QUESTION_BANK_DIR:
+            _question_bank = QuestionBank()
+        return _question_bank
@@ -0,0 +1,267 @@
+import os
+import re
+import time
+import random
+import hashlib
+import sqlite3
+import threading
+from array import array
+from typing import NamedTuple
+
+from quiz_generator.tools.brief_cache import normalize_source
+from quiz_generator.tools.dedupe import shingles
+
+# --- Defaults (overridable through the environment) ---
+# SQLite file shared by every run; "" turns the index off
+DEFAULT_QUESTION_INDEX_DB = os.getenv("QUESTION_INDEX_DB", "quiz_questions.db")
+# Estimated Jaccard similarity of two questions' word pairs at which the later one is dropped
+DEFAULT_QUESTION_DUPLICATE_THRESHOLD = float(os.getenv("QUESTION_DUPLICATE_THRESHOLD", "0.5"))
+
+# MinHash signature length and LSH banding (32 bands of 4 rows): questions
+# at 0.5 similarity share a band with ~87% probability (~99% at 0.6),
+# questions sharing one word pair in ten with ~0.3%
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32
+QUESTION_SHINGLE_WORDS = 2
+# Left out before shingling, so shared stems ("which of the following") do not count
+_STOPWORDS = frozenset(
+    "a an the of to in on for by with and or is are was were be been does do did which what who whom whose "
+    "when where why how that this these those it its following statement statements true false".split()
+)
+_WORD_RE = re.compile(r"\w+")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x51D)  # fixed: stored signatures must stay comparable
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(MINHASH_PERMUTATIONS)
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    section TEXT NOT NULL,
+    question TEXT NOT NULL,
+    source TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    bucket INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, question_id)
+) WITHOUT ROWID;
+"""
+
+
+class Duplicate(NamedTuple):
+    """A dropped question and the stored question it repeats."""
+    section: str
+    question: dict
+    similarity: float
+    match: str
+    match_source: str
+
+
+def content_words(text: str) -> list:
+    """Lowercased words of `text`, stopwords left out."""
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def question_shingles(text: str) -> set:
+    """Hashed word pairs of a question, stopwords left out."""
+    return shingles(" ".join(content_words(text)), QUESTION_SHINGLE_WORDS)
+
+
+def minhash(hashes) -> array:
+    """MinHash signature of a set of 64-bit shingle hashes (32 bits kept per slot)."""
+    return array("I", (
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS
+    ))
+
+
+def _buckets(section, signature):
+    """One LSH bucket per band: a signed 64-bit hash of the section, band number and band rows."""
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    buckets = []
+    for band in range(LSH_BANDS):
+        key = f"{section}:{band}:{signature[band * rows:(band + 1) * rows].tolist()}"
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "big", signed=True))
+    return buckets
+
+
+def _similarity(a, b):
+    """Estimated Jaccard similarity: the share of equal signature slots."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def drop_near_duplicates(questions, existing, threshold=DEFAULT_QUESTION_DUPLICATE_THRESHOLD):
+    """
+    Drops the questions of `questions` whose estimated similarity to a
+    question of `existing` in the same section reaches `threshold`, without
+    reading or writing any index.
+
+    Args:
+        questions: (section, question dict) pairs to filter.
+        existing: (section, question dict) pairs to compare them with.
+
+    Returns:
+        (kept, duplicates), as for QuestionIndex.filter_questions.
+    """
+    signatures = []
+    for section, question in existing:
+        hashes = question_shingles(str(question.get("question", "")))
+        if hashes:
+            signatures.append((section, minhash(hashes), str(question["question"])))
+    kept, duplicates = [], []
+    for section, question in questions:
+        hashes = question_shingles(str(question.get("question", "")))
+        best = None
+        if hashes:
+            signature = minhash(hashes)
+            for other_section, other_signature, other_question in signatures:
+                similarity = _similarity(signature, other_signature) if other_section == section else 0.0
+                if similarity >= threshold and (best is None or similarity > best[0]):
+                    best = (similarity, other_question, "")
+        if best:
+            duplicates.append(Duplicate(section, question, *best))
+        else:
+            kept.append((section, question))
+    return kept, duplicates
+
+
+class QuestionIndex:
+    """
+    Persistent index of every question that passed review, used to drop
+    near-duplicates of them from later runs before review.
+
+    Questions are MinHashed over their word pairs and stored with one LSH
+    bucket per band, so a lookup reads LSH_BANDS index entries and compares
+    only the few questions sharing a bucket, however many are stored. A
+    question is a duplicate when its estimated similarity to one of them,
+    or to an earlier question of the same batch, reaches `threshold`.
+    Questions stored by earlier runs on the same source are ignored, so
+    regenerating a quiz for a page does not drop its own questions.
+    """
+
+    def __init__(self, db_path=DEFAULT_QUESTION_INDEX_DB, threshold=DEFAULT_QUESTION_DUPLICATE_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self.stats = {"checked": 0, "dropped": 0}
+
+    def summary(self):
+        return f"question index: {self.stats['dropped']} of {self.stats['checked']} generated questions dropped as near-duplicates"
+
+    def _find(self, section, signature, source, run_id):
+        """The best (similarity, question, source) match among the stored questions, or None."""
+        buckets = _buckets(section, signature)
+        rows = self._conn.execute(
+            "SELECT q.question, q.source, q.run_id, q.signature FROM questions q WHERE q.id IN "
+            f"(SELECT question_id FROM lsh_buckets WHERE bucket IN ({', '.join('?' * len(buckets))}))",
+            buckets,
+        ).fetchall()
+        best = None
+        for question, match_source, match_run, blob in rows:
+            if match_source == source and match_run != run_id:
+                continue
+            similarity = _similarity(signature, array("I", blob))
+            if similarity >= self.threshold and (best is None or similarity > best[0]):
+                best = (similarity, question, match_source)
+        return best
+
+    def filter_questions(self, questions, source="", run_id=""):
+        """
+        Drops the questions of `questions` that repeat a stored question or
+        an earlier question of the batch. Nothing is stored: only the
+        questions that pass review are, through `add_questions`.
+
+        Args:
+            questions: (section, question dict) pairs, section being
+                "multiple_choice" or "true_false".
+            source: The URL(s) the questions were generated from.
+            run_id: Identifies the run, so its questions are not compared
+                with those of earlier runs on the same source.
+
+        Returns:
+            (kept, duplicates): the kept (section, question) pairs, in input
+            order, and a Duplicate for every dropped question.
+        """
+        source = normalize_source(source) if source else ""
+        kept, duplicates = [], []
+        batch = []  # (section, signature, question text) of the kept questions
+        with self._lock:
+            for section, question in questions:
+                hashes = question_shingles(str(question.get("question", "")))
+                if not hashes:
+                    kept.append((section, question))
+                    continue
+                signature = minhash(hashes)
+                best = self._find(section, signature, source, run_id)
+                for batch_section, batch_signature, batch_question in batch:
+                    similarity = _similarity(signature, batch_signature) if batch_section == section else 0.0
+                    if similarity >= self.threshold and (best is None or similarity > best[0]):
+                        best = (similarity, batch_question, "")
+                if best:
+                    duplicates.append(Duplicate(section, question, *best))
+                    continue
+                batch.append((section, signature, str(question["question"])))
+                kept.append((section, question))
+            self.stats["checked"] += len(kept) + len(duplicates)
+            self.stats["dropped"] += len(duplicates)
+        return kept, duplicates
+
+    def add_questions(self, questions, source="", run_id=""):
+        """
+        Stores reviewed questions, so later runs drop their near-duplicates.
+        Questions that would be dropped as near-duplicates themselves (of
+        this run's or another source's stored questions) are skipped.
+
+        Args:
+            questions: (section, question dict) pairs, as for filter_questions.
+            source: The URL(s) the questions were generated from.
+            run_id: Identifies the run the questions belong to.
+
+        Returns:
+            The number of questions stored.
+        """
+        source = normalize_source(source) if source else ""
+        added = 0
+        with self._lock:
+            for section, question in questions:
+                text = str(question.get("question", ""))
+                hashes = question_shingles(text)
+                if not hashes:
+                    continue
+                signature = minhash(hashes)
+                if self._find(section, signature, source, run_id):
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT INTO questions (section, question, source, run_id, signature, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (section, text, source, run_id, signature.tobytes(), time.time()),
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO lsh_buckets (bucket, question_id) VALUES (?, ?)",
+                    [(bucket, cursor.lastrowid) for bucket in _buckets(section, signature)],
+                )
+                added += 1
+            self._conn.commit()
+        return added
+
+
+_question_index = None
+_question_index_lock = threading.Lock()
+
+
+def get_question_index():
+    """Returns the process-wide question index at QUESTION_INDEX_DB, or None if it is turned off."""
+    global _question_index
+    with _question_index_lock:
+        if _question_index is None and DEFAULT_QUESTION_INDEX_DB:
+            _question_index = QuestionIndex()
+        return _question_index
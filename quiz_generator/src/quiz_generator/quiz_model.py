@@ -0,0 +1,90 @@
+from dataclasses import dataclass, field
+
+# --- Typed quiz model ---
+# One in-memory representation of a finished quiz, built once from the
+# canonical dict produced by postprocess.normalize_quiz and handed to every
+# exporter, so no format has to re-parse another format's output.
+
+MULTIPLE_CHOICE = "multiple_choice"
+TRUE_FALSE = "true_false"
+
+
+@dataclass(slots=True)
+class MultipleChoiceQuestion:
+    question: str
+    options: dict  # {"A": text, "B": text, ...}, in letter order
+    answer: str    # letter of the correct option
+    extras: dict = field(default_factory=dict)  # any other keys, e.g. "explanation"
+
+    section = MULTIPLE_CHOICE
+
+    @property
+    def correct_option(self):
+        return self.options.get(self.answer, "")
+
+    def to_dict(self):
+        return {"question": self.question, "options": dict(self.options), "answer": self.answer, **self.extras}
+
+
+@dataclass(slots=True)
+class TrueFalseQuestion:
+    question: str
+    answer: bool
+    extras: dict = field(default_factory=dict)
+
+    section = TRUE_FALSE
+
+    def to_dict(self):
+        return {"question": self.question, "answer": self.answer, **self.extras}
+
+
+@dataclass(slots=True)
+class Quiz:
+    multiple_choice: list = field(default_factory=list)
+    true_false: list = field(default_factory=list)
+    validation_notes: str = ""
+    fact_checking_sources: list = field(default_factory=list)
+    source_url: str = ""
+
+    @classmethod
+    def from_dict(cls, data, source_url=""):
+        """
+        Builds a Quiz from a canonical quiz dict (the output of
+        `normalize_quiz` / `postprocess_quiz`).
+        """
+        def extras(q, known):
+            return {k: v for k, v in q.items() if k not in known}
+
+        return cls(
+            multiple_choice=[
+                MultipleChoiceQuestion(q["question"], q["options"], q["answer"],
+                                       extras(q, ("question", "options", "answer")))
+                for q in data.get(MULTIPLE_CHOICE, [])
+            ],
+            true_false=[
+                TrueFalseQuestion(q["question"], q["answer"], extras(q, ("question", "answer")))
+                for q in data.get(TRUE_FALSE, [])
+            ],
+            validation_notes=data.get("validation_notes", ""),
+            fact_checking_sources=list(data.get("fact_checking_sources", [])),
+            source_url=source_url,
+        )
+
+    def to_dict(self):
+        """The canonical quiz dict (the layout of 'generated_quiz.json')."""
+        data = {
+            MULTIPLE_CHOICE: [q.to_dict() for q in self.multiple_choice],
+            TRUE_FALSE: [q.to_dict() for q in self.true_false],
+        }
+        if self.validation_notes:
+            data["validation_notes"] = self.validation_notes
+        data["fact_checking_sources"] = list(self.fact_checking_sources)
+        return data
+
+    def questions(self):
+        """All questions, MCQs first, in display order."""
+        return [*self.multiple_choice, *self.true_false]
+
+    @property
+    def question_count(self):
+        return len(self.multiple_choice) + len(self.true_false)
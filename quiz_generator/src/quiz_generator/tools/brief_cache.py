@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from quiz_generator.output_store import atomic_write
+
+# --- Defaults (overridable through the environment) ---
+DEFAULT_CACHE_DIR = os.getenv("BRIEF_CACHE_DIR", ".brief_cache")
+DEFAULT_TTL_SECONDS = int(os.getenv("BRIEF_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("BRIEF_CACHE_MAX_ENTRIES", "1000"))
+
+# Unreferenced blobs younger than this are kept: another process may have
+# written one and not yet written the entry pointing at it
+BLOB_GC_GRACE_SECONDS = 300
+
+# Query parameters that never change the page content
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so trivially different spellings share one cache entry:
+    lowercases scheme/host, drops default ports, fragments and tracking
+    parameters, sorts the query string and strips a trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == "http" and parts.port == 80) and not (scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    ]
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+def normalize_source(source: str) -> str:
+    """
+    Normalizes the source of a brief: one URL, or the whitespace separated
+    URLs of a topic brief, which share one entry in any order.
+    """
+    return " ".join(sorted({normalize_url(url) for url in source.split()}))
+
+
+class BriefCache:
+    """
+    On-disk content brief cache keyed by normalized URL (or set of URLs,
+    for topic briefs).
+
+    Each URL gets its own entry file (entries/<url key>.json) pointing at a
+    content-addressed blob (blobs/<sha256>.md), so concurrent runs for
+    different URLs never clobber each other and identical briefs are stored
+    once. Entries expire after `ttl_seconds`; once there are more than
+    `max_entries`, the least recently used ones are evicted.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries_dir = os.path.join(cache_dir, "entries")
+        self._blobs_dir = os.path.join(cache_dir, "blobs")
+        self._lock = threading.Lock()
+        os.makedirs(self._entries_dir, exist_ok=True)
+        os.makedirs(self._blobs_dir, exist_ok=True)
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        return hashlib.sha256(normalize_source(url).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self._entries_dir, f"{key}.json")
+
+    def _blob_path(self, content_hash):
+        return os.path.join(self._blobs_dir, f"{content_hash}.md")
+
+    def _read_entry(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_expired(self, entry):
+        return self.ttl_seconds > 0 and time.time() - entry.get("created_at", 0) > self.ttl_seconds
+
+    def get(self, url: str):
+        """Returns the cached brief for `url`, or None on a miss or expired entry."""
+        path = self._entry_path(self.url_key(url))
+        entry = self._read_entry(path)
+        if entry is None:
+            return None
+        if self._is_expired(entry):
+            self.invalidate(url)
+            return None
+
+        try:
+            with open(self._blob_path(entry["content_hash"]), "r", encoding="utf-8") as f:
+                content = f.read()
+        except OSError:
+            return None
+        if self.content_hash(content) != entry["content_hash"]:
+            # Corrupt blob: treat as a miss so the caller regenerates it
+            return None
+
+        try:
+            os.utime(path)  # entry mtime doubles as the LRU access time
+        except OSError:
+            pass
+        return content
+
+    def put(self, url: str, content: str) -> str:
+        """Stores `content` as the brief for `url` and returns its content hash."""
+        digest = self.content_hash(content)
+        blob_path = self._blob_path(digest)
+        try:
+            # Refresh a shared blob's mtime, so a concurrent _evict treats it as new
+            os.utime(blob_path)
+        except OSError:
+            atomic_write(blob_path, content.encode("utf-8"), fsync=False)
+
+        entry = {
+            "url": url,
+            "normalized_url": normalize_source(url),
+            "content_hash": digest,
+            "created_at": time.time(),
+        }
+        atomic_write(self._entry_path(self.url_key(url)), json.dumps(entry).encode("utf-8"), fsync=False)
+        self._evict()
+        return digest
+
+    def invalidate(self, url: str):
+        try:
+            os.remove(self._entry_path(self.url_key(url)))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """
+        Drops expired entries, then LRU entries over the cap, then
+        unreferenced blobs older than BLOB_GC_GRACE_SECONDS.
+        """
+        with self._lock:
+            live = []
+            for item in os.scandir(self._entries_dir):
+                if not item.name.endswith(".json"):
+                    continue
+                entry = self._read_entry(item.path)
+                if entry is None or self._is_expired(entry):
+                    self._remove_quietly(item.path)
+                    continue
+                live.append((item.stat().st_mtime, item.path, entry["content_hash"]))
+
+            if self.max_entries > 0 and len(live) > self.max_entries:
+                live.sort()
+                evicted, live = live[:len(live) - self.max_entries], live[len(live) - self.max_entries:]
+                for _, path, _ in evicted:
+                    self._remove_quietly(path)
+
+            referenced = {content_hash for _, _, content_hash in live}
+            cutoff = time.time() - BLOB_GC_GRACE_SECONDS
+            for item in os.scandir(self._blobs_dir):
+                if not item.name.endswith(".md") or item.name[:-3] in referenced:
+                    continue
+                try:
+                    if item.stat().st_mtime < cutoff:
+                        self._remove_quietly(item.path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _remove_quietly(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_default_cache = None
+
+
+def get_brief_cache() -> BriefCache:
+    """Returns the process-wide brief cache rooted at BRIEF_CACHE_DIR."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = BriefCache()
+    return _default_cache
+
+
+def lookup_brief(url: str):
+    """Returns the cached content brief for `url`, or None if there is none."""
+    return get_brief_cache().get(url)
+
+
+def store_brief(url: str, content: str) -> str:
+    """Caches the content brief for `url` and returns its content hash."""
+    return get_brief_cache().put(url, content)
@@ -0,0 +1,100 @@
+import re
+
+# Rough English average for Gemini tokenizers; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Per-request token budget for one chunk of source text
+DEFAULT_CHUNK_TOKENS = 3000
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting (no tokenizer round-trip)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _split_oversized(block: str, max_tokens: int) -> list:
+    """Splits a single block that exceeds the budget on sentence, then word, boundaries."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    current = ""
+    for unit in re.split(r"(?<=[.!?])\s+", block):
+        while len(unit) > max_chars:
+            # Sentence longer than the budget: split on the last space that fits
+            cut = unit.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(unit[:cut].strip())
+            unit = unit[cut:].strip()
+        if not unit:
+            continue
+        candidate = f"{current} {unit}" if current else unit
+        if len(candidate) > max_chars:
+            pieces.append(current)
+            current = unit
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_blocks(blocks, max_tokens: int = DEFAULT_CHUNK_TOKENS, separator: str = "\n") -> list:
+    """
+    Packs text blocks, in order, into chunks of at most `max_tokens`
+    (estimated). Blocks are never split unless a single block is larger
+    than the budget on its own.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    separator_tokens = estimate_tokens(separator)
+
+    for block in blocks:
+        block = block.strip()
+        if not block:
+            continue
+        block_tokens = estimate_tokens(block)
+
+        if block_tokens > max_tokens:
+            if current:
+                chunks.append(separator.join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_oversized(block, max_tokens))
+            continue
+
+        if current and current_tokens + separator_tokens + block_tokens > max_tokens:
+            chunks.append(separator.join(current))
+            current, current_tokens = [], 0
+
+        current.append(block)
+        current_tokens += block_tokens + (separator_tokens if len(current) > 1 else 0)
+
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def truncate_to_budget(texts, max_tokens: int, separator: str = "\n") -> list:
+    """
+    Shortens `texts` so that `separator.join(texts)` fits in `max_tokens`
+    (estimated). The longest texts are cut first, at a word boundary, and
+    texts shorter than an equal share of the budget are kept whole.
+    """
+    texts = [text for text in texts if text]
+    remaining = max_tokens * CHARS_PER_TOKEN - len(separator) * max(0, len(texts) - 1)
+    limits = {}
+    for count, i in enumerate(sorted(range(len(texts)), key=lambda i: len(texts[i]))):
+        share = max(0, remaining // (len(texts) - count))
+        limits[i] = min(len(texts[i]), share)
+        remaining -= limits[i]
+
+    shortened = []
+    for i, text in enumerate(texts):
+        if limits[i] < len(text):
+            cut = text.rfind(" ", 0, limits[i] + 1)
+            text = text[:cut if cut > 0 else limits[i]].rstrip()
+        if text:
+            shortened.append(text)
+    return shortened
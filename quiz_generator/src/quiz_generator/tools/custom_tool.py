@@ -1,9 +1,14 @@
 import requests
-from bs4 import BeautifulSoup
-from typing import Type
+from typing import List, Type
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
 
+from quiz_generator.tools.http_fetch import fetch_url, fetch_urls
+from quiz_generator.tools.chunking import estimate_tokens
+from quiz_generator.tools.dedupe import BlockDeduper
+from quiz_generator.tools.summarizer import map_reduce_summarize
+from quiz_generator.tools.text_extraction import extract_text_blocks
+
 class WebsiteScrapingToolInput(BaseModel):
     """Input schema for WebsiteScrapingTool."""
     url: str = Field(..., description="The URL of the website to scrape.")
@@ -12,45 +17,85 @@ class WebsiteScrapingTool(BaseTool):
     name: str = "Website Scraping Tool"
     description: str = "A tool that scrapes the text content from a given website URL. It strips HTML, ads, and navigation."
     args_schema: Type[BaseModel] = WebsiteScrapingToolInput
+    # Pages above this many (estimated) tokens are condensed with map-reduce
+    # summarization instead of being handed to the LLM in one piece
+    max_tokens: int = 6000
 
     def _run(self, url: str) -> str:
         """
         Scrapes the text content from the given URL.
         """
         try:
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
-            response.raise_for_status()  # Raise an exception for bad status codes
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Remove script, style, nav, footer, and header tags
-            for element in soup(["script", "style", "nav", "footer", "header", "aside"]):
-                element.decompose()
-
-            # Get text from common content tags
-            # This is a basic implementation; more complex sites might need refinement
-            text_parts = []
-            for tag in soup.find_all(['h1', 'h2', 'h3', 'p', 'article', 'main', 'div']):
-                # Avoid capturing text from heavily nested divs that might be UI elements
-                # This is a heuristic: check if the tag is a div and has many children
-                if tag.name == 'div' and len(tag.find_all()) > 5:
-                    continue
-                
-                text = tag.get_text(separator=' ', strip=True)
-                if text:
-                    text_parts.append(text)
-            
-            # Join all text parts and clean up whitespace
-            full_text = ' '.join(text_parts)
-            # Remove excessive whitespace
-            clean_text = ' '.join(full_text.split())
+            # Pooled session + ETag/Last-Modified revalidation; raises on bad status codes
+            response = fetch_url(url, timeout=30)
+
+            # One linear pass: strips script/style/nav/footer/header/aside and
+            # emits each text node of headings, paragraphs, articles and small divs once
+            blocks = extract_text_blocks(response.text)
+            clean_text = ' '.join(blocks)
 
             if not clean_text:
                 return "Error: No meaningful text content could be extracted from the URL."
 
+            if estimate_tokens(clean_text) > self.max_tokens:
+                # Long page: summarize token-bounded chunks in parallel, then merge
+                return map_reduce_summarize(blocks)
+
             return clean_text
         
         except requests.exceptions.RequestException as e:
             return f"Error: Failed to retrieve the URL. {e}"
         except Exception as e:
             return f"Error: An unexpected error occurred during scraping. {e}"
+
+
+class TopicScrapingToolInput(BaseModel):
+    """Input schema for TopicScrapingTool."""
+    urls: List[str] = Field(..., description="The URLs of all the pages covering the topic.")
+
+class TopicScrapingTool(BaseTool):
+    name: str = "Topic Scraping Tool"
+    description: str = (
+        "A tool that scrapes several web pages on one topic at once and returns their combined text, "
+        "with content repeated across the pages removed. Use it instead of the Website Scraping Tool "
+        "when you are given more than one URL."
+    )
+    args_schema: Type[BaseModel] = TopicScrapingToolInput
+    # Merged text above this many (estimated) tokens is condensed with one
+    # map-reduce summarization over all pages
+    max_tokens: int = 6000
+
+    def _run(self, urls: List[str]) -> str:
+        """
+        Fetches the URLs in parallel and merges their text into one brief.
+        """
+        try:
+            urls = list(dict.fromkeys(urls))
+            # Shared across pages: navigation, footers and quoted paragraphs are kept once
+            seen = BlockDeduper()
+            blocks = []
+            failed = []
+            for url, result in zip(urls, fetch_urls(urls, timeout=30)):
+                if isinstance(result, requests.exceptions.RequestException):
+                    failed.append(f"{url} ({result})")
+                    continue
+                page_blocks = extract_text_blocks(result.text, seen=seen)
+                if page_blocks:
+                    blocks.append(f"SOURCE: {url}")
+                    blocks.extend(page_blocks)
+
+            if not blocks:
+                if failed:
+                    return f"Error: Failed to retrieve any of the URLs: {', '.join(failed)}"
+                return "Error: No meaningful text content could be extracted from the URLs."
+
+            if estimate_tokens(' '.join(blocks)) > self.max_tokens:
+                text = map_reduce_summarize(blocks)
+            else:
+                text = '\n'.join(blocks)
+            if failed:
+                text += f"\n\n(Could not retrieve: {', '.join(failed)})"
+            return text
+
+        except Exception as e:
+            return f"Error: An unexpected error occurred during scraping. {e}"
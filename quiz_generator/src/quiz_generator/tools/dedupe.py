@@ -0,0 +1,61 @@
+import os
+import re
+import hashlib
+
+# --- Defaults (overridable through the environment) ---
+# Words per shingle; 0 only drops exact repeats
+DEFAULT_SHINGLE_WORDS = int(os.getenv("DEDUPE_SHINGLE_WORDS", "5"))
+# A block is a near-duplicate when this share of its shingles was already seen
+DEFAULT_DUPLICATE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.8"))
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(text: str, size: int) -> set:
+    """
+    Hashes of every run of `size` consecutive words in `text` (lowercased,
+    punctuation ignored). Texts shorter than `size` words give one hash.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {_hash(" ".join(words))} if words else set()
+    return {_hash(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+class BlockDeduper:
+    """
+    The "seen" set of the block extractor, generalized so one instance can
+    be shared by every page of a topic.
+
+    `add(block)` returns False for a block that was seen before (after
+    whitespace normalization) and, with `shingle_words`, also for one whose
+    word shingles were already seen in earlier blocks at `threshold` or
+    more: the same paragraph with a different link text, a navigation list
+    repeated with one item changed, a footer on every page.
+    """
+
+    def __init__(self, shingle_words=DEFAULT_SHINGLE_WORDS, threshold=DEFAULT_DUPLICATE_THRESHOLD):
+        self.shingle_words = shingle_words
+        self.threshold = threshold
+        self.dropped = 0
+        self._seen = set()
+        self._shingles = set()
+
+    def add(self, block: str) -> bool:
+        """Records `block` and returns True if it is new, False if it (nearly) repeats an earlier one."""
+        key = _hash(" ".join(block.split()))
+        if key in self._seen:
+            self.dropped += 1
+            return False
+        if self.shingle_words:
+            hashes = shingles(block, self.shingle_words)
+            if hashes and len(hashes & self._shingles) >= self.threshold * len(hashes):
+                self.dropped += 1
+                return False
+            self._shingles |= hashes
+        self._seen.add(key)
+        return True
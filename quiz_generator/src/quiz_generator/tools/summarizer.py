@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from quiz_generator.llm_replay import make_llm
+from quiz_generator.tools.chunking import DEFAULT_CHUNK_TOKENS, chunk_blocks, estimate_tokens, truncate_to_budget
+
+# Max chunk summaries in flight at once
+MAX_PARALLEL_SUMMARIES = 4
+# Merge rounds before partial summaries that still do not fit are truncated
+MAX_REDUCE_ROUNDS = 4
+
+CHUNK_SUMMARY_PROMPT = """
+You are condensing one section of a longer web page for a quiz writer.
+Extract every quiz-worthy item from the text: key facts, figures, dates,
+names, definitions and core concepts. Keep wording precise and factual.
+Output a compact Markdown bullet list. Do not add information that is not in the text.
+"""
+
+MERGE_PROMPT = """
+You are merging partial notes, taken from consecutive sections of one web page
+(or of several pages on one topic), into one set of notes for a quiz writer. Remove duplicates but keep every
+distinct fact, figure, date, name, definition and concept.
+Output a compact Markdown bullet list.
+"""
+
+_summary_llm = None
+
+
+def get_summary_llm():
+    """LLM used for chunk summaries (created on first use)."""
+    global _summary_llm
+    if _summary_llm is None:
+        _summary_llm = make_llm(
+            model="gemini/gemini-2.5-flash",
+            temperature=0.2
+        )
+    return _summary_llm
+
+
+def _summarize(llm, system_prompt, text):
+    return str(llm.call([
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": text},
+    ])).strip()
+
+
+def map_reduce_summarize(blocks, llm=None, chunk_tokens=DEFAULT_CHUNK_TOKENS, max_workers=MAX_PARALLEL_SUMMARIES) -> str:
+    """
+    Condenses long scraped text so that no single LLM request carries more
+    than `chunk_tokens` of input.
+
+    Map: blocks are packed into token-bounded chunks that are summarized in
+    parallel threads. Reduce: partial summaries are merged, re-chunking and
+    merging again until the result fits in one request. If a round stops
+    shrinking them (or after MAX_REDUCE_ROUNDS), the partials are truncated
+    to the budget before the final merge.
+    """
+    llm = llm or get_summary_llm()
+    chunks = chunk_blocks(blocks, chunk_tokens)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        partials = list(pool.map(lambda chunk: _summarize(llm, CHUNK_SUMMARY_PROMPT, chunk), chunks))
+
+        total = estimate_tokens("\n\n".join(partials))
+        for _ in range(MAX_REDUCE_ROUNDS):
+            if len(partials) <= 1 or total <= chunk_tokens:
+                break
+            # Oversized partials are split by chunk_blocks and condensed on their own
+            groups = chunk_blocks(partials, chunk_tokens, separator="\n\n")
+            merged = list(pool.map(lambda group: _summarize(llm, MERGE_PROMPT, group), groups))
+            merged_total = estimate_tokens("\n\n".join(merged))
+            if merged_total >= total:
+                break
+            partials, total = merged, merged_total
+
+    if len(partials) == 1:
+        return partials[0]
+    if total > chunk_tokens:
+        print(f"Warning: Partial summaries still total ~{total} tokens; truncating them to {chunk_tokens}.")
+        partials = truncate_to_budget(partials, chunk_tokens, separator="\n\n")
+    return _summarize(llm, MERGE_PROMPT, "\n\n".join(partials))
@@ -0,0 +1,180 @@
+from html.parser import HTMLParser
+
+# Subtrees stripped before extraction (scripts, styles, nav, footer, header, ads)
+SKIP_TAGS = {"script", "style", "nav", "footer", "header", "aside"}
+
+# Elements whose text is always kept
+CONTENT_TAGS = {"h1", "h2", "h3", "p", "article", "main"}
+
+# A <div> only counts as content if it has at most this many descendant tags;
+# larger divs are usually layout/UI wrappers
+MAX_DIV_DESCENDANTS = 5
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "source", "track", "wbr",
+}
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Linear-time text extraction in one traversal.
+
+    Every text node is appended once to `self.texts` in document order.
+    Each open element remembers where its text starts and counts its
+    descendants bottom-up (children add their own count + 1 when they
+    close). When a content element closes, its [start, end) range of text
+    nodes is marked as kept with a difference array, so nested content
+    elements cost O(1) each instead of re-extracting their text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.texts = []
+        self.coverage = [0]  # difference array over self.texts
+        self._stack = []  # [tag, first text index, descendant count]
+        self._skip_depth = 0
+        self._skip_tag = None
+        self.blocks = []  # (start, end) text ranges of kept content elements
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_depth:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in SKIP_TAGS:
+            self._skip_tag = tag
+            self._skip_depth = 1
+            return
+        if tag in VOID_TAGS:
+            if self._stack:
+                self._stack[-1][2] += 1
+            return
+        self._stack.append([tag, len(self.texts), 0])
+
+    def handle_startendtag(self, tag, attrs):
+        if self._skip_depth:
+            return
+        if self._stack:
+            self._stack[-1][2] += 1
+
+    def handle_endtag(self, tag):
+        if self._skip_depth:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+            return
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                while len(self._stack) > i:
+                    self._close_element()
+                return
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        text = data.strip()
+        if text:
+            self.texts.append(text)
+            self.coverage.append(0)
+
+    def close(self):
+        super().close()
+        while self._stack:
+            self._close_element()
+
+    def _close_element(self):
+        tag, start, descendants = self._stack.pop()
+        if self._stack:
+            self._stack[-1][2] += descendants + 1
+
+        end = len(self.texts)
+        if end == start:
+            return
+        if tag in CONTENT_TAGS or (tag == "div" and descendants <= MAX_DIV_DESCENDANTS):
+            self.coverage[start] += 1
+            self.coverage[end] -= 1
+            self.blocks.append((start, end))
+
+    def kept_texts(self):
+        kept = []
+        depth = 0
+        for i, text in enumerate(self.texts):
+            depth += self.coverage[i]
+            if depth > 0:
+                kept.append(text)
+        return kept
+
+
+def _parse(html: str) -> _TextExtractor:
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def extract_text(html: str) -> str:
+    """
+    Returns the readable text of `html`: every text node inside a heading,
+    paragraph, article, main or small div, emitted exactly once and with
+    whitespace collapsed.
+    """
+    return " ".join(" ".join(_parse(html).kept_texts()).split())
+
+
+def _innermost_ranges(parser):
+    """
+    Splits the kept text nodes into runs owned by the same innermost
+    content element: each leaf element is one range, and the text a
+    container holds between its children forms ranges of its own.
+    """
+    ranges = []
+    stack = []
+    pending = iter(sorted(parser.blocks, key=lambda r: (r[0], -r[1])))
+    upcoming = next(pending, None)
+    for i in range(len(parser.texts)):
+        while stack and stack[-1][1] <= i:
+            stack.pop()
+        # Element ranges nest, so the innermost one open at i is on top of the stack
+        while upcoming is not None and upcoming[0] <= i:
+            if upcoming[1] > i:
+                stack.append(upcoming)
+            upcoming = next(pending, None)
+        owner = stack[-1] if stack else None
+        if owner is None:
+            continue
+        if ranges and ranges[-1][2] == owner and ranges[-1][1] == i:
+            ranges[-1][1] = i + 1
+        else:
+            ranges.append([i, i + 1, owner])
+    return [(start, end) for start, end, _ in ranges]
+
+
+def extract_text_blocks(html: str, seen=None, innermost=False) -> list:
+    """
+    Returns the text of each outermost content element as a separate block,
+    in document order. Nested content elements are folded into their parent
+    block, so every text node still appears exactly once. With a
+    BlockDeduper as `seen` (shared across the pages of a topic), blocks it
+    has already seen are left out. With `innermost`, blocks are the
+    innermost content elements instead (each heading and paragraph of a
+    <main> on its own), for callers that diff pages block by block.
+    """
+    parser = _parse(html)
+    if innermost:
+        ranges = _innermost_ranges(parser)
+    else:
+        ranges = []
+        covered_until = 0
+        # Outermost ranges start earliest and end latest; they close after their children
+        for start, end in sorted(parser.blocks, key=lambda r: (r[0], -r[1])):
+            if start < covered_until:
+                continue
+            ranges.append((start, end))
+            covered_until = end
+
+    blocks = []
+    for start, end in ranges:
+        text = " ".join(" ".join(parser.texts[start:end]).split())
+        if text and (seen is None or seen.add(text)):
+            blocks.append(text)
+    return blocks
@@ -1,11 +1,101 @@
+import os
 import json
-from docx import Document
-from docx.shared import Inches
 # --- Corrected Import for BaseTool (Attempt 2) ---
 from crewai.tools import BaseTool
 # ---
 from pydantic import BaseModel, Field
 
+from quiz_generator.output_store import fsync_paths
+from quiz_generator.tools.docx_writer import get_docx_template
+
+
+def quiz_paragraphs(template, mcq_questions, tf_questions):
+    """Yields the paragraph XML of one quiz: MCQs with their correct answer, then T/F questions."""
+    yield template.heading('Generated Quiz', level=1)
+
+    if mcq_questions:
+        yield template.heading('Multiple Choice Questions', level=2)
+        for i, q in enumerate(mcq_questions, 1):
+            if not isinstance(q, dict): continue
+            question_text = q.get("question", "Missing question text")
+            options = q.get("options", [])
+            correct_answer = q.get("correct_answer", q.get("answer", "Missing correct answer"))
+
+            yield template.paragraph(f"{i}. {question_text}", style='List Number')
+            if isinstance(options, dict):
+                # Canonical layout from postprocess.normalize_quiz: {"A": ...} and a letter answer
+                for label, option in options.items():
+                    yield template.paragraph(f"   {label}) {option}", style='List Bullet 2')
+                if correct_answer in options:
+                    correct_answer = f"{correct_answer}) {options[correct_answer]}"
+            elif isinstance(options, list):
+                option_labels = ["A", "B", "C", "D"]
+                for j, option in enumerate(options):
+                     if j < len(option_labels):
+                         yield template.paragraph(f"   {option_labels[j]}) {option}", style='List Bullet 2')
+                     else:
+                         yield template.paragraph(f"   - {option}", style='List Bullet 2')
+            yield template.paragraph(f"   Correct Answer: {correct_answer}\n")
+
+    if tf_questions:
+        yield template.heading('True/False Questions', level=2)
+        for i, q in enumerate(tf_questions, 1):
+             if not isinstance(q, dict): continue
+             question_text = q.get("question", "Missing question text")
+             answer = q.get("answer", "Missing answer")
+
+             yield template.paragraph(f"{i}. {question_text}", style='List Number')
+             yield template.paragraph(f"   Answer: {str(answer).capitalize()}\n")
+
+
+def write_quizzes_to_word(quizzes, output_dir=None, combined_path=None):
+    """
+    Renders many quiz dicts in a single pass: one 'quiz_00001.docx', ... per
+    quiz in `output_dir`, and/or all of them in one document at
+    `combined_path`, each quiz starting on a new page. Entries that are not
+    dicts are skipped. Every file is replaced atomically, and all of them
+    are fsynced together at the end.
+
+    Raises:
+        TypeError: If `quizzes` is not a list (or tuple) of quiz dicts.
+
+    Returns:
+        The list of files written.
+    """
+    if not isinstance(quizzes, (list, tuple)):
+        raise TypeError(f"Expected a list of quiz dicts, got {type(quizzes).__name__}.")
+    template = get_docx_template()
+    written = []
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    def combined_paragraphs():
+        first = True
+        for idx, quiz_data in enumerate(quizzes, start=1):
+            if not isinstance(quiz_data, dict):
+                continue
+            paragraphs = list(quiz_paragraphs(
+                template, quiz_data.get("multiple_choice") or [], quiz_data.get("true_false") or []
+            ))
+            if output_dir:
+                file_path = os.path.join(output_dir, f"quiz_{idx:05d}.docx")
+                template.write(file_path, paragraphs, fsync=False)
+                written.append(file_path)
+            if not first:
+                yield template.page_break()
+            first = False
+            yield from paragraphs
+
+    if combined_path:
+        template.write(combined_path, combined_paragraphs(), fsync=False)
+        written.append(combined_path)
+    else:
+        for _ in combined_paragraphs():
+            pass
+    fsync_paths(written)
+    return written
+
+
 class WordOutputToolInput(BaseModel):
     """Input schema for WordOutputTool."""
     filename: str = Field(..., description="The desired filename for the output Word document (e.g., 'final_quiz'). .docx extension will be added if missing.")
@@ -39,42 +129,12 @@ class WordOutputTool(BaseTool):
              print("Warning: 'true_false' key did not contain a list.")
 
 
-        doc = Document()
-        doc.add_heading('Generated Quiz', level=1)
-
-        if mcq_questions:
-            doc.add_heading('Multiple Choice Questions', level=2)
-            for i, q in enumerate(mcq_questions, 1):
-                if not isinstance(q, dict): continue
-                question_text = q.get("question", "Missing question text")
-                options = q.get("options", [])
-                correct_answer = q.get("correct_answer", "Missing correct answer")
-
-                doc.add_paragraph(f"{i}. {question_text}", style='List Number')
-                if isinstance(options, list):
-                    option_labels = ["A", "B", "C", "D"]
-                    for j, option in enumerate(options):
-                         if j < len(option_labels):
-                             doc.add_paragraph(f"   {option_labels[j]}) {option}", style='List Bullet 2')
-                         else:
-                             doc.add_paragraph(f"   - {option}", style='List Bullet 2')
-                doc.add_paragraph(f"   Correct Answer: {correct_answer}\n")
-
-        if tf_questions:
-            doc.add_heading('True/False Questions', level=2)
-            for i, q in enumerate(tf_questions, 1):
-                 if not isinstance(q, dict): continue
-                 question_text = q.get("question", "Missing question text")
-                 answer = q.get("answer", "Missing answer")
-
-                 doc.add_paragraph(f"{i}. {question_text}", style='List Number')
-                 doc.add_paragraph(f"   Answer: {str(answer).capitalize()}\n")
-
         if not filename.lower().endswith(".docx"):
             filename += ".docx"
 
         try:
-            doc.save(filename)
+            template = get_docx_template()
+            template.write(filename, quiz_paragraphs(template, mcq_questions, tf_questions))
             return f"Successfully saved formatted quiz to Word document '{filename}'"
         except Exception as e:
             return f"Error saving Word document '{filename}': {e}"
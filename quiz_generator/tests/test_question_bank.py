@@ -0,0 +1,116 @@
+"""
+QuestionBank.plan on a temporary bank directory: new, unchanged,
+incremental, removal-only and full runs, and the repeats of banked
+questions an incremental run drops.
+
+Usage:
+    python -m unittest discover -s tests   (or: python -m pytest tests)
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from quiz_generator.question_bank import (  # noqa: E402
+    QUESTIONS_PER_SECTION,
+    QuestionBank,
+    block_hash,
+)
+
+SOURCE = "https://example.com/page"
+
+
+def make_blocks(count, start=0):
+    return [f"Block {i} explains topic{i} alpha{i} beta{i} gamma{i} in detail." for i in range(start, start + count)]
+
+
+def make_quiz(indices):
+    """One MCQ and one T/F question about each block in `indices`."""
+    return {
+        "multiple_choice": [
+            {"question": f"What does block {i} explain about topic{i} alpha{i}?",
+             "options": {"A": f"beta{i}", "B": "nothing"}, "answer": "A"}
+            for i in indices
+        ],
+        "true_false": [{"question": f"Block {i} covers gamma{i} beta{i}.", "answer": True} for i in indices],
+    }
+
+
+class QuestionBankPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.bank_dir = tempfile.mkdtemp(prefix="test-question-bank-")
+        self.bank = QuestionBank(self.bank_dir, max_changed_share=0.5)
+        self.blocks = make_blocks(10)
+        self.bank.record(SOURCE, self.blocks, make_quiz(range(4)))
+
+    def tearDown(self):
+        shutil.rmtree(self.bank_dir, ignore_errors=True)
+
+    def test_new_source_needs_a_full_quiz(self):
+        plan = self.bank.plan("https://example.com/other", self.blocks)
+        self.assertEqual(plan.mode, "new")
+        self.assertEqual(plan.counts, {"multiple_choice": QUESTIONS_PER_SECTION, "true_false": QUESTIONS_PER_SECTION})
+        self.assertEqual(plan.kept_count, 0)
+
+    def test_unchanged_page_keeps_every_question(self):
+        plan = self.bank.plan(SOURCE, self.blocks)
+        self.assertEqual(plan.mode, "unchanged")
+        self.assertEqual(plan.counts, {"multiple_choice": 0, "true_false": 0})
+        self.assertEqual(plan.kept_quiz(), make_quiz(range(4)))
+        self.assertEqual((plan.new_blocks, plan.removed, plan.dropped), ([], 0, 0))
+
+    def test_new_block_is_generated_incrementally(self):
+        added = "A new block about delta omega sigma kappa."
+        plan = self.bank.plan(SOURCE, self.blocks + [added])
+        self.assertEqual(plan.mode, "incremental")
+        self.assertEqual(plan.new_blocks, [added])
+        self.assertEqual(plan.blocks, [added])
+        self.assertEqual(plan.counts, {"multiple_choice": 1, "true_false": 1})
+        self.assertEqual(plan.kept_count, 8)
+
+    def test_removed_block_drops_its_questions_and_replaces_them(self):
+        plan = self.bank.plan(SOURCE, self.blocks[1:])
+        self.assertEqual(plan.mode, "incremental")
+        self.assertEqual((plan.removed, plan.dropped), (1, 2))
+        self.assertEqual(plan.counts, {"multiple_choice": 1, "true_false": 1})
+        self.assertEqual(plan.new_blocks, [])
+        # Replacements come from the remaining blocks no kept question covers
+        self.assertEqual(plan.blocks, self.blocks[4:])
+        self.assertNotIn(make_quiz([0])["multiple_choice"][0], plan.kept_quiz()["multiple_choice"])
+
+    def test_large_change_regenerates_the_quiz(self):
+        plan = self.bank.plan(SOURCE, self.blocks[:4] + make_blocks(6, start=10))
+        self.assertEqual(plan.mode, "full")
+        self.assertEqual(plan.counts, {"multiple_choice": QUESTIONS_PER_SECTION, "true_false": QUESTIONS_PER_SECTION})
+        self.assertEqual(plan.kept_count, 0)
+        self.assertEqual(plan.dropped, 8)
+
+    def test_unattributed_question_is_dropped_on_any_change(self):
+        quiz = make_quiz(range(4))
+        quiz["true_false"].append({"question": "Zebras migrate across savannas yearly.", "answer": True})
+        self.bank.record(SOURCE, self.blocks, quiz)
+        self.assertEqual(self.bank.plan(SOURCE, self.blocks).kept_count, 9)
+
+        plan = self.bank.plan(SOURCE, self.blocks + ["A new block about delta omega sigma kappa."])
+        self.assertEqual(plan.dropped, 1)
+        self.assertEqual(plan.counts["true_false"], 2)
+
+    def test_record_attributes_questions_to_their_blocks(self):
+        entry = self.bank.get(SOURCE)
+        self.assertEqual(entry["blocks"], [block_hash(block) for block in self.blocks])
+        self.assertEqual(entry["questions"]["multiple_choice"][2]["blocks"], [block_hash(self.blocks[2])])
+
+    def test_without_repeats_drops_new_questions_matching_kept_ones(self):
+        plan = self.bank.plan(SOURCE, self.blocks[1:])
+        new = make_quiz([2, 7])
+        quiz, duplicates = plan.without_repeats(new)
+        self.assertEqual(quiz, make_quiz([7]))
+        self.assertEqual(len(duplicates), 2)
+        self.assertEqual({d.section for d in duplicates}, {"multiple_choice", "true_false"})
+
+
+if __name__ == "__main__":
+    unittest.main()
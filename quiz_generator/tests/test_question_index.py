@@ -0,0 +1,96 @@
+"""
+Near-duplicate question detection: drop_near_duplicates, and QuestionIndex
+lookups and storage on a temporary SQLite index.
+
+Usage:
+    python -m unittest discover -s tests   (or: python -m pytest tests)
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from quiz_generator.question_index import QuestionIndex, drop_near_duplicates  # noqa: E402
+
+ORIGINAL = {"question": "Which gas do green plants absorb from the atmosphere during photosynthesis?",
+            "options": {"A": "Carbon dioxide", "B": "Oxygen"}, "answer": "A"}
+REPHRASED = {"question": "Which gas do green plants absorb from the atmosphere during photosynthesis daily?",
+             "options": {"A": "Oxygen", "B": "Carbon dioxide"}, "answer": "B"}
+UNRELATED = {"question": "In which year did the Apollo 11 crew land on the Moon?",
+             "options": {"A": "1969", "B": "1972"}, "answer": "A"}
+
+
+class DropNearDuplicatesTest(unittest.TestCase):
+    def test_rephrased_question_is_dropped(self):
+        kept, duplicates = drop_near_duplicates(
+            [("multiple_choice", REPHRASED), ("multiple_choice", UNRELATED)],
+            [("multiple_choice", ORIGINAL)],
+        )
+        self.assertEqual(kept, [("multiple_choice", UNRELATED)])
+        self.assertEqual(len(duplicates), 1)
+        duplicate = duplicates[0]
+        self.assertEqual((duplicate.section, duplicate.question, duplicate.match),
+                         ("multiple_choice", REPHRASED, ORIGINAL["question"]))
+        self.assertGreaterEqual(duplicate.similarity, 0.5)
+
+    def test_other_sections_are_not_compared(self):
+        kept, duplicates = drop_near_duplicates([("true_false", REPHRASED)], [("multiple_choice", ORIGINAL)])
+        self.assertEqual((kept, duplicates), ([("true_false", REPHRASED)], []))
+
+    def test_threshold(self):
+        kept, duplicates = drop_near_duplicates([("multiple_choice", REPHRASED)], [("multiple_choice", ORIGINAL)],
+                                                threshold=1.0)
+        self.assertEqual((len(kept), duplicates), (1, []))
+
+    def test_questions_without_words_are_kept(self):
+        empty = {"question": "?", "answer": True}
+        kept, duplicates = drop_near_duplicates([("true_false", empty)], [("true_false", empty)])
+        self.assertEqual((kept, duplicates), ([("true_false", empty)], []))
+
+
+class QuestionIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="test-question-index-")
+        self.index = QuestionIndex(os.path.join(self.tmp_dir, "questions.db"))
+
+    def tearDown(self):
+        self.index._conn.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_filtering_stores_nothing(self):
+        kept, _ = self.index.filter_questions([("multiple_choice", ORIGINAL)], "https://a.example/", "run-1")
+        self.assertEqual(len(kept), 1)
+        kept, duplicates = self.index.filter_questions([("multiple_choice", REPHRASED)], "https://b.example/", "run-2")
+        self.assertEqual((len(kept), duplicates), (1, []))
+
+    def test_repeats_within_a_batch_are_dropped(self):
+        kept, duplicates = self.index.filter_questions(
+            [("multiple_choice", ORIGINAL), ("multiple_choice", REPHRASED)], "https://a.example/", "run-1"
+        )
+        self.assertEqual(kept, [("multiple_choice", ORIGINAL)])
+        self.assertEqual(duplicates[0].match_source, "")
+
+    def test_stored_questions_of_other_sources_are_dropped(self):
+        self.assertEqual(self.index.add_questions([("multiple_choice", ORIGINAL)], "https://a.example/", "run-1"), 1)
+        kept, duplicates = self.index.filter_questions(
+            [("multiple_choice", REPHRASED), ("multiple_choice", UNRELATED)], "https://b.example/", "run-2"
+        )
+        self.assertEqual(kept, [("multiple_choice", UNRELATED)])
+        self.assertEqual(duplicates[0].match, ORIGINAL["question"])
+        self.assertEqual(self.index.stats, {"checked": 2, "dropped": 1})
+
+    def test_earlier_runs_on_the_same_source_are_ignored(self):
+        self.index.add_questions([("multiple_choice", ORIGINAL)], "https://a.example/", "run-1")
+        kept, duplicates = self.index.filter_questions([("multiple_choice", REPHRASED)], "https://a.example/", "run-2")
+        self.assertEqual((len(kept), duplicates), (1, []))
+
+    def test_near_duplicates_are_not_stored_twice(self):
+        self.index.add_questions([("multiple_choice", ORIGINAL)], "https://a.example/", "run-1")
+        self.assertEqual(self.index.add_questions([("multiple_choice", REPHRASED)], "https://b.example/", "run-2"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
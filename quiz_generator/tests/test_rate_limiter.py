@@ -0,0 +1,108 @@
+"""
+The rate limiter's pacing and parsing helpers: TokenBucket waits on a fake
+clock, LLM_RATE_LIMITS parsing, and reading the retry delay and rate-limit
+status off provider errors.
+
+Usage:
+    python -m unittest discover -s tests   (or: python -m pytest tests)
+"""
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from quiz_generator.rate_limiter import (  # noqa: E402
+    TokenBucket,
+    is_rate_limit_error,
+    parse_rate_limits,
+    retry_after_seconds,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        # 60 per minute: a burst of 6, the other 54 refilled at 0.9 per second
+        self.bucket = TokenBucket(60, window_seconds=60.0, burst_share=0.1, clock=self.clock)
+
+    def test_burst_goes_at_once(self):
+        self.assertEqual(self.bucket.capacity, 6)
+        self.assertEqual(self.bucket.wait_time(6, self.clock.now), 0.0)
+
+    def test_empty_bucket_waits_for_the_refill(self):
+        self.bucket.take(6, 0.0)
+        self.assertAlmostEqual(self.bucket.wait_time(1, 0.0), 1 / 0.9)
+        self.assertAlmostEqual(self.bucket.wait_time(1, 0.5), (1 - 0.45) / 0.9)
+        self.assertEqual(self.bucket.wait_time(1, 2.0), 0.0)
+
+    def test_refill_stops_at_capacity(self):
+        self.bucket.take(6, 0.0)
+        self.assertEqual(self.bucket.wait_time(6, 100.0), 0.0)
+        self.assertEqual(self.bucket.level, 6)
+
+    def test_debt_is_refilled_before_the_next_request(self):
+        self.bucket.take(10, 0.0)
+        self.assertAlmostEqual(self.bucket.wait_time(1, 0.0), 5 / 0.9)
+
+    def test_oversized_amount_waits_for_a_full_bucket(self):
+        self.bucket.take(6, 0.0)
+        self.assertAlmostEqual(self.bucket.wait_time(100, 0.0), 6 / 0.9)
+
+    def test_scale_slows_the_refill(self):
+        self.bucket.take(6, 0.0)
+        self.bucket.scale = 0.5
+        self.assertAlmostEqual(self.bucket.wait_time(1, 0.0), 1 / 0.45)
+
+    def test_drain_empties_the_bucket(self):
+        self.bucket.drain(0.0)
+        self.assertAlmostEqual(self.bucket.wait_time(1, 0.0), 1 / 0.9)
+
+    def test_zero_limit_never_waits(self):
+        bucket = TokenBucket(0, clock=self.clock)
+        bucket.take(1000, 0.0)
+        self.assertEqual(bucket.wait_time(1000, 0.0), 0.0)
+
+
+class ParseRateLimitsTest(unittest.TestCase):
+    def test_parses_models_and_skips_malformed_entries(self):
+        limits = parse_rate_limits("gemini-2.0-flash=15/1000000, gemini-1.5-pro = 2/32000,broken,other=x/1")
+        self.assertEqual(limits, {"gemini-2.0-flash": (15.0, 1000000.0), "gemini-1.5-pro": (2.0, 32000.0)})
+
+    def test_empty_spec(self):
+        self.assertEqual(parse_rate_limits(""), {})
+
+
+class RateLimitErrorTest(unittest.TestCase):
+    def test_retry_after_header(self):
+        error = SimpleNamespace(response=SimpleNamespace(status_code=429, headers={"Retry-After": "7"}))
+        self.assertEqual(retry_after_seconds(error), 7.0)
+        self.assertTrue(is_rate_limit_error(error))
+
+    def test_gemini_retry_info(self):
+        error = Exception("429 RESOURCE_EXHAUSTED. {'@type': 'type.googleapis.com/google.rpc.RetryInfo', "
+                          "'retryDelay': '17s'}")
+        self.assertEqual(retry_after_seconds(error), 17.0)
+        self.assertTrue(is_rate_limit_error(error))
+
+    def test_fractional_retry_delay(self):
+        self.assertEqual(retry_after_seconds(Exception("retry_delay=2.5s")), 2.5)
+
+    def test_other_errors(self):
+        error = SimpleNamespace(code=500, response=SimpleNamespace(status_code=500, headers={}))
+        self.assertIsNone(retry_after_seconds(error))
+        self.assertFalse(is_rate_limit_error(error))
+        self.assertTrue(is_rate_limit_error(SimpleNamespace(code=429)))
+
+
+if __name__ == "__main__":
+    unittest.main()